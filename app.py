@@ -1,102 +1,269 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, send_from_directory, session
+from flask import Flask, render_template, request, redirect, url_for, flash, send_from_directory, send_file, session, jsonify, Response, make_response, g, stream_with_context
 from flask_wtf.csrf import CSRFProtect
-from datetime import datetime
+from datetime import datetime, timezone, date, timedelta
+import io
 import os
+import re
+import math
+import hmac
+import time
+import uuid
+import random
+import logging
+import hashlib
+import threading
 import csv
-import bcrypt as bcrypt_lib
+import shutil
+import sqlite3
+from werkzeug.security import safe_join
+from werkzeug.http import is_resource_modified
+from werkzeug.middleware.proxy_fix import ProxyFix
 from dotenv import load_dotenv
-from database import DatabaseManager
+from database import DatabaseManager, MAX_PAGE_SIZE
+from passwords import verificador, VerifierBusy, is_bcrypt_hash
+from rate_limit import login_throttle_from_env
+from vaga_index import VagaIndex
+from busca import BuscaVagas
+from referencias import RegistroReferencias
+from vaga_store import VagaStore, vaga_to_csv
+from lru_cache import LRUCache
+from spool import ServicoSpool
+from expiracao import ExpiracaoVagas
+from exportacao import COLUNAS_EXPORT, gerar_csv, gerar_xlsx, gerar_zip
+from pdf_vagas import CachePDF, GeradorPDF, PDFOcupado, ErroPDF, chave_pdf
+import metrics
+from logging_config import configurar_logging, definir_contexto, limpar_contexto, contexto_atual
 
 # Carrega variáveis de ambiente
 load_dotenv()
 
+# Logs em JSON, escritos por uma thread em segundo plano (ver logging_config.py)
+configurar_logging()
+logger = logging.getLogger(__name__)
+log_requisicoes = logging.getLogger('requisicoes')
+LOG_REQUISICOES_AMOSTRA = float(os.getenv('LOG_REQUISICOES_AMOSTRA', 1))
+LOG_REQUISICOES_LENTAS_MS = float(os.getenv('LOG_REQUISICOES_LENTAS_MS', 1000))
+
 
 app = Flask(__name__)
 app.secret_key = os.getenv('SECRET_KEY', 'dev-secret-key')
 
+# Com "python app.py", os processos do pool de PDFs (forkserver/spawn)
+# reimportam este módulo como __mp_main__: neles não sobem threads de fundo
+PROCESSO_AUXILIAR = __name__ == '__mp_main__'
+
+# Atrás de proxy reverso (nginx etc.), PROXY_COUNT é o número de proxies
+# confiáveis na frente da aplicação: remote_addr passa a vir do
+# X-Forwarded-For. Sem isso o limite de login por IP valeria para todos os
+# usuários juntos (todos chegam com o IP do proxy). 0 = sem proxy (padrão).
+PROXY_COUNT = int(os.getenv('PROXY_COUNT', 0))
+if PROXY_COUNT > 0:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=PROXY_COUNT, x_proto=PROXY_COUNT)
+
 # Configuração CSRF
 csrf = CSRFProtect(app)
 
 # Inicializa gerenciador de banco de dados
 db_manager = DatabaseManager()
+# Abre as conexões mínimas do pool sem atrasar a inicialização
+if not PROCESSO_AUXILIAR:
+    threading.Thread(target=db_manager.pool.prefill, daemon=True).start()
 
 # Configurações de admin (fallback para desenvolvimento)
 ADMIN_USERNAME = os.getenv('ADMIN_USERNAME', 'admin')
 ADMIN_PASSWORD = os.getenv('ADMIN_PASSWORD', 'admin')
 ADMIN_PASSWORD_HASH = os.getenv('ADMIN_PASSWORD_HASH', None)
 
-# Diretório para CSVs
+# Limite de tentativas de login por IP e por usuário (token bucket)
+login_throttle = login_throttle_from_env()
+
+# Diretório dos CSVs antigos (um arquivo por vaga; migrar com scripts/migrate_csv_to_store.py)
 BASE_DIR = os.path.dirname(__file__)
-CSV_DIR = os.path.join(BASE_DIR, 'CSV')
+CSV_DIR = os.getenv('CSV_DIR') or os.path.join(BASE_DIR, 'CSV')
 os.makedirs(CSV_DIR, exist_ok=True)
+# CSVs antigos de vagas excluídas (fora de CSV_DIR, para não serem servidos em /download)
+CSV_EXCLUIDOS_DIR = os.getenv('CSV_EXCLUIDOS_DIR') or os.path.join(BASE_DIR, 'data', 'csv_excluidos')
 
-# Carregar opções únicas de OCUPACAO do CSV
-def load_unique_ocupacoes(csv_path):
-    ocupacoes = []
-    vistos = set()
-    try:
-        with open(csv_path, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                valor = (row.get('OCUPACAO') or '').strip()
-                if valor and valor not in vistos:
-                    vistos.add(valor)
-                    ocupacoes.append(valor)
-    except FileNotFoundError:
-        pass
-    except Exception:
-        pass
-    return ocupacoes or ['Teste 1', 'Teste 2']
+# Armazenamento das vagas (arquivo SQLite único, modo WAL)
+VAGA_STORE_PATH = os.getenv('VAGA_STORE_PATH') or os.path.join(BASE_DIR, 'data', 'vagas.sqlite3')
+vaga_store = VagaStore(VAGA_STORE_PATH)
 
-OCUPACAO_CSV = os.path.join(os.path.dirname(__file__), 'refs', 'ServicosConsolidados.csv')
-TIPO_ATIVIDADE_OPCOES = load_unique_ocupacoes(OCUPACAO_CSV)
+# Índice em memória das vagas (montado uma vez, ressincronizado pela versão do store)
+vaga_index = VagaIndex(vaga_store)
+vaga_index.rebuild()
 
-# Mapeamento OCUPACAO -> lista de SERVICO (sem duplicados, ordem preservada)
-def load_ocupacao_to_servicos(csv_path):
-    mapping = {}
-    try:
-        with open(csv_path, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                ocupacao = (row.get('OCUPACAO') or '').strip()
-                servico = (row.get('SERVICO') or '').strip()
-                if not ocupacao or not servico:
-                    continue
-                if ocupacao not in mapping:
-                    mapping[ocupacao] = []
-                if servico not in mapping[ocupacao]:
-                    mapping[ocupacao].append(servico)
-    except Exception:
-        pass
-    return mapping
+# Busca textual (índice invertido em memória, sem acentos)
+busca_vagas = BuscaVagas(vaga_store)
+busca_vagas.rebuild()
+
+# Caches LRU das vagas: registros lidos e páginas /vaga/<arquivo> renderizadas
+vaga_cache = LRUCache(int(os.getenv('VAGA_CACHE_MB', 16)) * 1024 * 1024)
+pagina_cache = LRUCache(int(os.getenv('PAGINA_CACHE_MB', 32)) * 1024 * 1024)
+CACHE_PAGINAS = os.getenv('CACHE_PAGINAS', '1') == '1'
+
+# PDFs das vagas: gerados em um pool de processos e guardados em disco pelo hash do conteúdo
+gerador_pdf = GeradorPDF(
+    CachePDF(
+        os.getenv('PDF_CACHE_DIR') or os.path.join(BASE_DIR, 'data', 'pdf'),
+        int(os.getenv('PDF_CACHE_MB', 200)) * 1024 * 1024,
+    ),
+    max_workers=int(os.getenv('PDF_WORKERS', 2)),
+    max_pendentes=int(os.getenv('PDF_MAX_PENDENTES', 8)),
+    timeout=float(os.getenv('PDF_TIMEOUT', 20)),
+)
+
+# Fila local (write-behind) das gravações no MySQL
+SPOOL_DIR = os.getenv('SPOOL_DIR') or os.path.join(BASE_DIR, 'spool')
+servico_spool = ServicoSpool(
+    SPOOL_DIR,
+    batch_size=int(os.getenv('SPOOL_BATCH_SIZE', 100)),
+    # Linhas novas no banco mudam as listagens: avança a versão global (ETags)
+    ao_gravar=lambda alterados: vaga_store.bump_versao(),
+)
+if not PROCESSO_AUXILIAR:
+    servico_spool.start(db_manager)
+
+# Expiração das vagas vencidas (store, índices e servicos_mei.ativo)
+expiracao_vagas = ExpiracaoVagas(
+    vaga_store,
+    db_manager,
+    intervalo=int(os.getenv('EXPIRACAO_INTERVALO', 900)),
+    batch_size=int(os.getenv('EXPIRACAO_LOTE', 500)),
+    ao_expirar=lambda arquivos: invalidar_vagas(arquivos),
+)
+if not PROCESSO_AUXILIAR:
+    expiracao_vagas.start()
+
+# Tamanho de página das listagens
+VAGAS_PAGE_SIZE = int(os.getenv('VAGAS_PAGE_SIZE', 50))
+ADMIN_PAGE_SIZE = int(os.getenv('ADMIN_PAGE_SIZE', 100))
 
-OCUPACAO_TO_SERVICOS = load_ocupacao_to_servicos(OCUPACAO_CSV)
+# Dados de referência de refs/ (recarregados quando os arquivos mudam)
+referencias = RegistroReferencias(os.path.join(os.path.dirname(__file__), 'refs'))
 
-# Carregar lista de órgãos do CSV
-def load_orgaos():
+# Token para o Prometheus coletar /admin/metrics sem sessão de login
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+
+# -----------------------------
+# Métricas (Prometheus) e log de requisições
+# -----------------------------
+REQUEST_ID_VALIDO = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+# Métodos rotulados nas métricas; qualquer outro texto enviado pelo cliente vira OTHER
+METODOS_METRICAS = frozenset({'GET', 'HEAD', 'POST', 'PUT', 'DELETE', 'OPTIONS', 'PATCH'})
+
+@app.before_request
+def inicio_requisicao():
+    g.metricas_inicio = time.perf_counter()
+    metrics.http_em_andamento.inc()
+    # Reaproveita o X-Request-ID do proxy, se vier em formato seguro
+    request_id = request.headers.get('X-Request-ID', '')
+    if not REQUEST_ID_VALIDO.match(request_id):
+        request_id = uuid.uuid4().hex[:16]
+    g.request_id = request_id
+    g.contexto_log = definir_contexto(
+        request_id=request_id, rota=request.endpoint or 'nao_encontrado', metodo=request.method
+    )
+
+@app.after_request
+def status_requisicao(response):
+    g.metricas_status = response.status_code
+    if 'request_id' in g:
+        response.headers['X-Request-ID'] = g.request_id
+    return response
+
+@app.teardown_request
+def fim_requisicao(exc):
+    inicio = g.pop('metricas_inicio', None)
+    if inicio is None:
+        return
+    duracao = time.perf_counter() - inicio
+    metrics.http_em_andamento.dec()
+    # Rotula pelo endpoint (não pela URL) para não explodir a cardinalidade
+    endpoint = request.endpoint or 'nao_encontrado'
+    metodo = request.method if request.method in METODOS_METRICAS else 'OTHER'
+    metrics.http_duracao.observe(duracao, endpoint=endpoint, method=metodo)
+    status = g.pop('metricas_status', 500) if exc is None else 500
+    metrics.http_requests.inc(endpoint=endpoint, method=metodo, status=status)
+
+    token = g.pop('contexto_log', None)
+    if token is None:
+        return
+    try:
+        registrar_requisicao(contexto_atual(), status, duracao, exc)
+    finally:
+        limpar_contexto(token)
+
+def registrar_requisicao(contexto, status, duracao, exc):
     """
-    Carrega lista de órgãos do arquivo lista_orgaos.csv
-    Retorna apenas a coluna 'orgao' ordenada alfabeticamente
+    Uma linha de log por requisição (rota, status, duração e uso do banco)
+
+    Erros e requisições lentas sempre entram; as demais seguem a
+    amostragem de LOG_REQUISICOES_AMOSTRA.
     """
-    orgaos = []
-    try:
-        orgaos_csv = os.path.join(os.path.dirname(__file__), 'refs', 'lista_orgaos.csv')
-        with open(orgaos_csv, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                orgao = (row.get('orgao') or '').strip()
-                if orgao:
-                    orgaos.append(orgao)
-        # Ordena alfabeticamente
-        orgaos.sort()
-    except FileNotFoundError:
-        print("⚠ Arquivo lista_orgaos.csv não encontrado")
-    except Exception as e:
-        print(f"⚠ Erro ao carregar órgãos: {e}")
-    
-    return orgaos
+    duracao_ms = duracao * 1000
+    if status >= 500 or exc is not None:
+        nivel = logging.ERROR
+    elif duracao_ms >= LOG_REQUISICOES_LENTAS_MS:
+        nivel = logging.WARNING
+    elif random.random() < LOG_REQUISICOES_AMOSTRA:
+        nivel = logging.INFO
+    else:
+        return
+    if not log_requisicoes.isEnabledFor(nivel):
+        return
+    extra = {
+        'path': request.path,
+        'status': status,
+        'duracao_ms': round(duracao_ms, 2),
+    }
+    if contexto['db_consultas'] or contexto['db_erros']:
+        extra['db_consultas'] = contexto['db_consultas']
+        extra['db_ms'] = round(contexto['db_ms'], 2)
+        extra['db'] = 'erro' if contexto['db_erros'] else 'ok'
+    if exc is not None:
+        # O traceback já sai no log do Flask (logger "app")
+        extra['erro'] = type(exc).__name__
+    log_requisicoes.log(nivel, '%s %s %s', request.method, request.path, status, extra=extra)
 
-ORGAOS_OPCOES = load_orgaos()
+@metrics.registro.coletor
+def metricas_estado():
+    """Pool MySQL, caches, fila de gravação e limites de login, lidos na coleta"""
+    amostras = []
+    pool = db_manager.pool_stats()
+    for chave in ('in_use', 'idle', 'total', 'waiting', 'max_size'):
+        amostras.append(('webmei_db_pool_connections', 'gauge', 'Conexões do pool MySQL por estado',
+                         {'estado': chave}, pool[chave]))
+    amostras.append(('webmei_db_pool_timeouts_total', 'counter', 'Checkouts do pool que estouraram o prazo',
+                     {}, pool['timeouts']))
+    for nome, cache in (('vagas', vaga_cache), ('paginas', pagina_cache)):
+        dados = cache.stats()
+        for chave in ('hits', 'misses', 'evictions'):
+            amostras.append((f'webmei_cache_{chave}_total', 'counter', f'Cache LRU: {chave}',
+                             {'cache': nome}, dados[chave]))
+        amostras.append(('webmei_cache_bytes', 'gauge', 'Cache LRU: bytes ocupados',
+                         {'cache': nome}, dados['bytes']))
+    dados = gerador_pdf.cache.stats()
+    for chave in ('hits', 'misses', 'evictions'):
+        amostras.append((f'webmei_cache_{chave}_total', 'counter', f'Cache LRU: {chave}',
+                         {'cache': 'pdf'}, dados[chave]))
+    amostras.append(('webmei_cache_bytes', 'gauge', 'Cache LRU: bytes ocupados',
+                     {'cache': 'pdf'}, dados['bytes']))
+    amostras.append(('webmei_pdf_recusados_total', 'counter', 'PDFs recusados (pool de geração lotado)',
+                     {}, gerador_pdf.recusadas))
+    spool = servico_spool.depth()
+    amostras.append(('webmei_spool_pendentes', 'gauge', 'Vagas aguardando gravação no MySQL',
+                     {}, spool['pendentes']))
+    amostras.append(('webmei_spool_falhas_seguidas', 'gauge', 'Falhas seguidas ao gravar a fila no MySQL',
+                     {}, spool['falhas_seguidas']))
+    amostras.append(('webmei_spool_rejeitados', 'gauge', 'Vagas recusadas pelo MySQL (servicos.rejeitados.jsonl)',
+                     {}, spool['rejeitados']))
+    amostras.append(('webmei_bcrypt_recusadas_total', 'counter', 'Verificações de senha recusadas (pool lotado)',
+                     {}, verificador.recusadas))
+    amostras.append(('webmei_login_recusados_total', 'counter', 'Logins recusados pelo limite de tentativas',
+                     {}, login_throttle.recusadas))
+    return amostras
 
 
 @app.route('/')
@@ -105,14 +272,60 @@ def index():
     return render_template(
         'index.html',
         today_iso=today_iso,
-        orgaos_opcoes=ORGAOS_OPCOES,
-        tipo_atividade_opcoes=TIPO_ATIVIDADE_OPCOES,
-        especificacao_atividade_opcoes=['Teste 1', 'Teste 2'],
-        forma_pagamento_opcoes=['Cheque', 'Dinheiro', 'Cartão', 'Transferência'],
-        ocupacao_to_servicos=OCUPACAO_TO_SERVICOS,
+        ref_versao=referencias.atual().pacote.versao,
     )
 
 
+# Ocupações e serviços de um CNAE
+@app.route('/api/cnae/<path:codigo>')
+def api_cnae(codigo):
+    entrada = referencias.atual().cnae.get(codigo)
+    if entrada is None:
+        return jsonify({'error': 'CNAE não encontrado'}), 404
+    resposta = dict(entrada)
+    resposta['vagas'] = vaga_store.count_por_cnae(entrada['cnae'])
+    return jsonify(resposta)
+
+
+# Dados de referência versionados (cache imutável no navegador)
+@app.route('/ref/<versao>.json')
+def ref_data(versao):
+    pacote = referencias.atual().pacote
+    if versao != pacote.versao:
+        # Página antiga apontando para uma versão anterior: manda para a atual
+        return redirect(url_for('ref_data', versao=pacote.versao))
+    if 'gzip' in request.accept_encodings:
+        resp = make_response(pacote.corpo_gzip)
+        resp.headers['Content-Encoding'] = 'gzip'
+    else:
+        resp = make_response(pacote.corpo)
+    resp.mimetype = 'application/json'
+    resp.headers['Vary'] = 'Accept-Encoding'
+    resp.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    resp.set_etag(pacote.versao)
+    return resp
+
+
+# Autocompletar (typeahead) de ocupações, serviços e órgãos
+@app.route('/api/autocomplete/<lista>')
+def api_autocomplete(lista):
+    ref = referencias.atual()
+    trie = ref.autocomplete.get(lista)
+    if trie is None:
+        return jsonify({'error': 'Lista desconhecida'}), 404
+    consulta = (request.args.get('q') or '')[:100]
+    limite = request.args.get('limite', 10, type=int)
+    permitidos = None
+    ocupacao = request.args.get('ocupacao')
+    if lista == 'servicos' and ocupacao:
+        # Só os serviços da ocupação escolhida no formulário
+        permitidos = ref.servicos_por_ocupacao.get(ocupacao, frozenset())
+    resp = jsonify({'q': consulta, 'sugestoes': trie.buscar(consulta, limite, permitidos)})
+    # As listas mudam raramente: o navegador pode reaproveitar as respostas
+    resp.headers['Cache-Control'] = 'public, max-age=300'
+    return resp
+
+
 @app.route('/create_service', methods=['POST'])
 def create_service():
     # Coleta básica dos dados do formulário
@@ -152,6 +365,18 @@ def create_service():
         if not data.get(key):
             erros.append(f'{label} é obrigatório.')
 
+    # Os campos de lista agora são texto livre com sugestões: confere os valores
+    ref = referencias.atual()
+    if data.get('orgao_demandante') and ref.orgaos and data['orgao_demandante'] not in ref.orgaos_set:
+        erros.append('Selecione um Órgão Demandante da lista.')
+    if data.get('tipo_atividade') and data['tipo_atividade'] not in ref.ocupacoes_set:
+        erros.append('Selecione um Tipo de atividade da lista.')
+    if data.get('forma_pagamento') and data['forma_pagamento'] not in ref.formas_pagamento:
+        erros.append('Selecione uma Forma de pagamento da lista.')
+
+    # CNAE derivado da ocupação/serviço escolhidos (índice em memória)
+    data['cnae'] = ref.cnae.cnae_da_vaga(data['tipo_atividade'], data['especificacao_atividade'])
+
     # Número pode ser numérico ou S/N
     if data.get('numero'):
         numero_limpo = data['numero'].strip().upper()
@@ -164,88 +389,473 @@ def create_service():
             flash(e, 'error')
         return redirect(url_for('index'))
 
-    # Persistência em CSV
+    # Persistência no armazenamento de vagas
     def safe_slug(texto: str) -> str:
         permitidos = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-_"
         texto = texto.replace(' ', '_')
         return ''.join(ch for ch in texto if ch in permitidos)[:80] or 'vaga'
 
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    agora = datetime.now().replace(microsecond=0)
+    timestamp = agora.strftime('%Y%m%d_%H%M%S')
+    criado_em = agora.isoformat()
     slug = safe_slug(data['titulo_servico'])
-    filename = f"{slug}_{timestamp}.csv"
-    filepath = os.path.join(CSV_DIR, filename)
 
-    headers = [
-        'orgao_demandante','titulo_servico','tipo_atividade','especificacao_atividade',
-        'descricao_servico','outras_informacoes','endereco','numero','bairro',
-        'forma_pagamento','prazo_pagamento','prazo_expiracao','data_limite_execucao'
-    ]
-    with open(filepath, 'w', encoding='utf-8', newline='') as f:
-        writer = csv.DictWriter(f, fieldnames=headers)
-        writer.writeheader()
-        writer.writerow(data)
+    # O nome do "arquivo" continua sendo o identificador público da vaga
+    vaga_id = None
+    for tentativa in range(1, 100):
+        sufixo = f"_{tentativa}" if tentativa > 1 else ''
+        filename = f"{slug}_{timestamp}{sufixo}.csv"
+        try:
+            vaga_id = vaga_store.insert(filename, data, criado_em)
+            break
+        except sqlite3.IntegrityError:
+            continue
+    if vaga_id is None:
+        flash('Não foi possível salvar a vaga. Tente novamente.', 'error')
+        return redirect(url_for('index'))
+    vaga_index.add(filename, data, vaga_id, criado_em)
+    busca_vagas.add(filename, data, vaga_id)
 
     # Persistência no banco de dados MySQL
     try:
         # prazo_expiracao já vem no formato YYYY-MM-DD do input type="date"
         # Não precisa conversão
         db_data = data.copy()
+        db_data['arquivo_csv'] = filename
+        # Mesma data de criação do store: banco e índice listam na mesma ordem
+        db_data['data_criacao'] = agora.strftime('%Y-%m-%d %H:%M:%S')
         
-        # Insere no banco
-        service_id = db_manager.insert_servico(db_data)
+        # Enfileira no spool (fsync); a thread do spool grava no banco
+        servico_spool.append(db_data)
         
-        if service_id:
-            print(f"✓ Serviço inserido no banco de dados com ID: {service_id}")
-        else:
-            print("⚠ Aviso: Serviço não foi salvo no banco de dados")
-            
-    except Exception as e:
-        print(f"✗ Erro ao salvar no banco de dados: {e}")
-        # Não interrompe o fluxo - CSV já foi salvo
+    except Exception:
+        logger.exception("Erro ao enfileirar serviço para o banco de dados", extra={'arquivo': filename})
+        # Sem spool, tenta gravar direto - a vaga já foi salva no store
+        service_id = db_manager.insert_servico(db_data)
+        if not service_id:
+            logger.warning("Serviço não foi salvo no banco de dados", extra={'arquivo': filename})
 
     flash('Serviço cadastrado com sucesso!', 'success')
     return render_template('service_success.html', data=data, csv_file=filename)
 
 
-# Download de CSV gerado
+def versao_vaga(filename):
+    """
+    Versão de uma vaga para as chaves de cache
+    
+    Returns:
+        tuple: ('store', id), ('store', id, 'encerrada') se a vaga expirou,
+               ('csv', mtime) do CSV antigo, ou None se não existir
+    """
+    vaga_index.sync()
+    resumo = vaga_index.resumo(filename)
+    if resumo is not None:
+        if resumo['excluida']:
+            return None
+        return ('store', resumo['id']) if resumo['ativo'] else ('store', resumo['id'], 'encerrada')
+    # Gravada por outro worker depois da última sincronização do índice
+    vaga = vaga_store.get(filename)
+    if vaga is not None:
+        return ('store', vaga['id'], 'encerrada') if not vaga['ativo'] else ('store', vaga['id'])
+    path = safe_join(CSV_DIR, filename)
+    if path is None:
+        return None
+    try:
+        return ('csv', os.stat(path).st_mtime_ns)
+    except OSError:
+        return None
+
+def ler_vaga(filename):
+    """
+    Lê os dados de uma vaga: primeiro no store, depois nos CSVs antigos
+    
+    Returns:
+        dict: Dados da vaga ou None se não existir
+    """
+    data = vaga_store.get(filename)
+    if data is not None:
+        return data
+    path = safe_join(CSV_DIR, filename)
+    if path is None or not os.path.isfile(path):
+        return None
+    try:
+        with metrics.store_duracao.time(operacao='csv_leitura'):
+            with open(path, 'r', encoding='utf-8') as f:
+                r = csv.DictReader(f)
+                return next(r, None) or {}
+    except Exception:
+        return None
+
+def carregar_vaga(filename, versao=None):
+    """
+    Dados de uma vaga, passando pelo cache LRU de registros
+    
+    Returns:
+        dict: Dados da vaga ou None se não existir
+    """
+    versao = versao or versao_vaga(filename)
+    if versao is None:
+        return None
+    data = vaga_cache.get(filename, versao)
+    if data is None:
+        data = ler_vaga(filename)
+        if data is not None:
+            vaga_cache.put(filename, versao, data)
+    return data
+
+def invalidar_vagas(arquivos, excluidas=False):
+    """
+    Tira vagas excluídas ou expiradas de tudo o que é derivado delas
+    
+    Índice em memória (listagem e prazos), busca e caches LRU, cada um
+    em uma única passada, e a versão do store (ETags das listagens). As
+    vagas continuam no índice, marcadas como encerradas ou excluídas, só
+    fora da listagem pública.
+    """
+    if not arquivos:
+        return
+    if excluidas:
+        vaga_index.excluir_many(arquivos)
+    else:
+        vaga_index.desativar_many(arquivos)
+    busca_vagas.remove_many(arquivos)
+    for arquivo in arquivos:
+        vaga_cache.invalidate(arquivo)
+        pagina_cache.invalidate(arquivo)
+    # As listagens também vêm do servicos_mei e dos CSVs antigos, fora do store
+    vaga_store.bump_versao()
+
+# -----------------------------
+# GET condicional (ETag / Last-Modified / 304)
+# -----------------------------
+def _hash_arquivo(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()[:12]
+
+# Mudanças no template de vaga precisam mudar a ETag das páginas
+VAGA_TEMPLATE_HASH = _hash_arquivo(os.path.join(BASE_DIR, 'templates', 'vaga_view.html'))
+
+def etag_vaga(data):
+    """ETag forte derivada do conteúdo da vaga"""
+    return hashlib.sha1(vaga_to_csv(data)).hexdigest()[:20]
+
+def vaga_excluida(filename):
+    """True se a vaga foi excluída pelo admin (continua no store só para a listagem do admin)"""
+    if not filename:
+        return False
+    vaga_index.sync()
+    resumo = vaga_index.resumo(filename)
+    return bool(resumo and resumo['excluida'])
+
+def vaga_encerrada(data):
+    """True se a vaga expirou (ativo = 0 no store ou no banco); CSVs antigos contam como ativas"""
+    return not data.get('ativo', 1)
+
+def modificada_em(data, versao):
+    """Last-Modified de uma vaga: criado_em no store ou mtime do CSV antigo"""
+    if versao and versao[0] == 'csv':
+        return datetime.fromtimestamp(versao[1] / 1e9, tz=timezone.utc)
+    try:
+        return datetime.fromisoformat(data['criado_em']).astimezone(timezone.utc)
+    except (KeyError, TypeError, ValueError):
+        return None
+
+def nao_modificado(etag, ultima_alteracao=None):
+    """True se o cliente já tem a versão atual (If-None-Match / If-Modified-Since)"""
+    return not is_resource_modified(request.environ, etag=etag, last_modified=ultima_alteracao)
+
+def resposta_condicional(corpo, etag, ultima_alteracao=None, **kwargs):
+    """
+    Resposta com validadores; 304 sem corpo quando o cliente já está atualizado
+    
+    Args:
+        corpo: Conteúdo da resposta ou função que o gera (só chamada se necessário)
+    """
+    if nao_modificado(etag, ultima_alteracao):
+        resp = Response(status=304)
+    else:
+        resp = make_response(Response(corpo() if callable(corpo) else corpo, **kwargs))
+    resp.set_etag(etag)
+    if ultima_alteracao is not None:
+        resp.last_modified = ultima_alteracao
+    # Sempre revalidar: o 304 é barato e a vaga pode ser excluída
+    resp.headers['Cache-Control'] = 'no-cache'
+    return resp
+
+# Download de CSV gerado (sob demanda a partir do store)
 @app.route('/download/<path:filename>')
 def download_file(filename):
-    return send_from_directory(CSV_DIR, filename, as_attachment=True)
+    # Inclui as vagas encerradas, que continuam no store
+    versao = versao_vaga(filename)
+    data = carregar_vaga(filename, versao) if versao and versao[0] == 'store' else None
+    if data is None:
+        # CSV antigo: send_from_directory já responde com ETag/Last-Modified/304
+        return send_from_directory(CSV_DIR, filename, as_attachment=True)
+    return resposta_condicional(
+        lambda: vaga_to_csv(data),
+        etag_vaga(data),
+        modificada_em(data, versao),
+        mimetype='text/csv',
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'},
+    )
+
+# Se o servicos_mei já cobre o store, por versão do store e por no máximo
+# COBERTURA_TTL segundos (para enxergar um backfill feito por fora)
+COBERTURA_TTL = 60
+_cobertura = {}
+_cobertura_lock = threading.Lock()
+
+def banco_cobre_store(apenas_ativos):
+    """
+    True se o servicos_mei já tem todas as vagas do store (None se o banco falhou)
+    
+    Antes do backfill (scripts/backfill_csv_to_mysql.py) ou enquanto o spool
+    não grava as vagas novas, as que só estão no store sumiriam da listagem
+    pelo banco; nesse caso a listagem usa o índice do store.
+    """
+    versao = vaga_store.versao()
+    agora = time.monotonic()
+    with _cobertura_lock:
+        anterior = _cobertura.get(apenas_ativos)
+    if anterior and anterior[0] == versao and agora - anterior[1] < COBERTURA_TTL:
+        return anterior[2]
+    no_banco = db_manager.count_servicos_com_arquivo(apenas_ativos=apenas_ativos)
+    if no_banco is None:
+        return None  # banco fora: não guarda, tenta de novo na próxima
+    cobre = no_banco >= vaga_store.count(apenas_ativas=apenas_ativos)
+    with _cobertura_lock:
+        _cobertura[apenas_ativos] = (versao, agora, cobre)
+    return cobre
+
+def listar_vagas(limit, apenas_ativos):
+    """
+    Página de vagas a partir do servicos_mei (keyset pagination)
+    
+    Se o banco ainda não tem todas as vagas do store ou estiver
+    indisponível, usa o índice em memória do store, paginado na mesma ordem
+    (data de criação, mais recentes primeiro) e com o mesmo cursor, para
+    nenhuma vaga sumir e a listagem continuar no ar. Linhas antigas do banco
+    sem arquivo_csv são exibidas pelo id (vaga_por_id).
+    
+    Returns:
+        tuple: (lista de vagas, cursor da próxima página ou None,
+                True se é página de contingência por falha do banco)
+    """
+    cursor = request.args.get('cursor') or None
+    cobre = banco_cobre_store(apenas_ativos)
+    if cobre:
+        pagina = db_manager.list_servicos(limit=limit, cursor=cursor, apenas_ativos=apenas_ativos)
+        if pagina is not None:
+            return (*pagina, False)
+    # Mesma ordem e mesmo cursor do banco: a próxima página continua de onde parou
+    return (*vaga_index.page(limit, cursor=cursor, apenas_ativas=apenas_ativos), cobre is not False)
+
+# Marca d'água do servicos_mei, lida no máximo a cada LISTAGEM_WATERMARK_TTL
+# segundos por processo: alterações feitas fora da aplicação (scripts, SQL
+# manual) também mudam a ETag das listagens
+LISTAGEM_WATERMARK_TTL = float(os.getenv('LISTAGEM_WATERMARK_TTL', 5))
+_watermark = {'marca': None, 'lida_em': None, 'mudou_em': time.time()}
+_watermark_lock = threading.Lock()
+
+def watermark_banco():
+    """
+    Marca d'água atual do banco
+    
+    Returns:
+        tuple: (marca em texto, timestamp de quando ela mudou neste processo)
+    """
+    agora = time.monotonic()
+    with _watermark_lock:
+        lida_em = _watermark['lida_em']
+        if lida_em is not None and agora - lida_em < LISTAGEM_WATERMARK_TTL:
+            return _watermark['marca'], _watermark['mudou_em']
+        _watermark['lida_em'] = agora  # as demais requisições usam a marca anterior
+    valor = db_manager.watermark_servicos()
+    marca = 'sembanco' if valor is None else hashlib.sha1(repr(valor).encode('utf-8')).hexdigest()[:12]
+    with _watermark_lock:
+        if marca != _watermark['marca']:
+            _watermark['marca'] = marca
+            _watermark['mudou_em'] = time.time()
+        return marca, _watermark['mudou_em']
+
+def etag_listagem(nome, limit):
+    """
+    ETag de uma página de listagem a partir da versão global do store e da
+    marca d'água do servicos_mei
+    
+    Returns:
+        tuple: (etag, data da última alteração)
+    """
+    versao, alterado_em = vaga_store.estado_versao()
+    marca, marca_mudou_em = watermark_banco()
+    cursor = request.args.get('cursor') or ''
+    chave = hashlib.sha1(f"{cursor}|{limit}".encode('utf-8')).hexdigest()[:12]
+    ultima = max(alterado_em, marca_mudou_em)
+    return f"{nome}-{versao}-{marca}-{chave}", datetime.fromtimestamp(ultima, tz=timezone.utc)
 
 # Listagem pública de vagas
 @app.route('/vagas')
 def vagas_public():
+    etag, alterado_em = etag_listagem('vagas', VAGAS_PAGE_SIZE)
+    if nao_modificado(etag, alterado_em):
+        return resposta_condicional(b'', etag, alterado_em)
+    vagas, proximo_cursor, contingencia = listar_vagas(VAGAS_PAGE_SIZE, apenas_ativos=True)
+    html = render_template('vagas_public.html', vagas=vagas, proximo_cursor=proximo_cursor)
+    if contingencia:
+        # Página de contingência (banco fora): não deixa o cliente guardá-la
+        resp = make_response(html)
+        resp.headers['Cache-Control'] = 'no-store'
+        return resp
+    return resposta_condicional(html, etag, alterado_em)
+
+# Vagas que encerram em breve (ordem de prazo_expiracao)
+EXPIRANDO_DIAS_PADRAO = 7
+EXPIRANDO_DIAS_MAX = 90
+
+def _int_arg(nome, padrao, minimo, maximo):
+    try:
+        valor = int(request.args.get(nome, padrao))
+    except (TypeError, ValueError):
+        valor = padrao
+    return max(minimo, min(valor, maximo))
+
+def listar_expirando(dias, limit):
+    """
+    Próximas vagas a expirar entre hoje e hoje + dias
+    
+    Consulta de intervalo no servicos_mei (idx_ativo_prazo); se o banco
+    ainda não tem todas as vagas do store ou estiver indisponível, usa o
+    índice de prazos em memória (bisect).
+    
+    Returns:
+        tuple: (lista de vagas, data inicial, data final,
+                True se é resposta de contingência por falha do banco)
+    """
+    hoje = date.today()
+    desde, ate = hoje.isoformat(), (hoje + timedelta(days=dias)).isoformat()
+    cobre = banco_cobre_store(True)
+    if cobre:
+        vagas = db_manager.list_servicos_expirando(desde, ate, limit)
+        if vagas is not None:
+            return vagas, desde, ate, False
+    return vaga_index.expirando(desde, ate, limit), desde, ate, cobre is not False
+
+def resposta_expirando(formato):
+    """Resposta de /vagas/expirando (html) e da API (json), com ETag pela versão do store e pela data"""
+    dias = _int_arg('dias', EXPIRANDO_DIAS_PADRAO, 1, EXPIRANDO_DIAS_MAX)
+    limite = _int_arg('limite', VAGAS_PAGE_SIZE, 1, MAX_PAGE_SIZE)
+    # A janela anda com a data: ela entra na ETag e não há Last-Modified
+    etag, _ = etag_listagem(f"expirando-{formato}-{date.today().isoformat()}-{dias}", limite)
+    if nao_modificado(etag):
+        return resposta_condicional(b'', etag)
+    vagas, desde, ate, contingencia = listar_expirando(dias, limite)
+    if formato == 'json':
+        corpo = app.json.dumps({'desde': desde, 'ate': ate, 'dias': dias, 'vagas': vagas})
+        mimetype = 'application/json'
+    else:
+        corpo = render_template('vagas_expirando.html', vagas=vagas, desde=desde, ate=ate,
+                                dias=dias, opcoes_dias=(7, 15, 30))
+        mimetype = 'text/html'
+    if contingencia:
+        # Contingência (banco fora): não deixa o cliente guardar a resposta
+        return Response(corpo, mimetype=mimetype, headers={'Cache-Control': 'no-store'})
+    return resposta_condicional(corpo, etag, mimetype=mimetype)
+
+@app.route('/vagas/expirando')
+def vagas_expirando():
+    return resposta_expirando('html')
+
+@app.route('/api/vagas/expirando')
+def api_vagas_expirando():
+    return resposta_expirando('json')
+
+# Busca textual nas vagas
+@app.route('/vagas/busca')
+def vagas_busca():
+    consulta = (request.args.get('q') or '').strip()[:200]
+    if not consulta:
+        return redirect(url_for('vagas_public'))
     vagas = []
-    for name in sorted(os.listdir(CSV_DIR)):
-        if not name.lower().endswith('.csv'):
-            continue
-        try:
-            with open(os.path.join(CSV_DIR, name), 'r', encoding='utf-8') as f:
-                r = csv.DictReader(f)
-                row = next(r, None)
-                if row:
-                    vagas.append({
-                        'arquivo': name,
-                        'titulo_servico': row.get('titulo_servico',''),
-                        'tipo_atividade': row.get('tipo_atividade',''),
-                        'bairro': row.get('bairro',''),
-                        'prazo_expiracao': row.get('prazo_expiracao',''),
-                    })
-        except Exception:
-            continue
-    return render_template('vagas_public.html', vagas=vagas)
+    vaga_index.sync()
+    for arquivo, _ in busca_vagas.search(consulta, limite=VAGAS_PAGE_SIZE):
+        resumo = vaga_index.resumo(arquivo)
+        if resumo is not None and resumo['ativo']:
+            vagas.append(resumo)
+    return render_template('vagas_public.html', vagas=vagas, proximo_cursor=None, consulta=consulta)
+
+# PDF imprimível de uma vaga (/vaga/<arquivo>.pdf)
+@app.route('/vaga/<path:filename>.pdf')
+def vaga_pdf(filename):
+    versao = versao_vaga(filename)
+    data = carregar_vaga(filename, versao)
+    if data is None:
+        # Vaga cujo nome termina em .pdf: segue para a página normal
+        return vaga_view(f'{filename}.pdf')
+    modificada = modificada_em(data, versao)
+    if nao_modificado(chave_pdf(data), modificada):
+        return resposta_condicional(b'', chave_pdf(data), modificada)
+    try:
+        chave, arquivo = gerador_pdf.abrir_pdf(data)
+    except PDFOcupado:
+        resp = make_response('Geração de PDF indisponível no momento. Tente novamente em instantes.', 503)
+        resp.headers['Retry-After'] = '5'
+        return resp
+    except ErroPDF as e:
+        logger.error("Erro ao gerar o PDF da vaga %s: %s", filename, e)
+        resp = make_response('Não foi possível gerar o PDF agora. Tente novamente mais tarde.', 503)
+        resp.headers['Retry-After'] = '30'
+        return resp
+    nome = f"{os.path.splitext(filename)[0]}.pdf"
+    resp = send_file(
+        arquivo,
+        mimetype='application/pdf',
+        download_name=os.path.basename(nome),
+        etag=chave,
+        last_modified=modificada,
+        conditional=True,
+    )
+    resp.headers['Cache-Control'] = 'no-cache'
+    return resp
 
 # Visualização de vaga individual
 @app.route('/vaga/<path:filename>')
 def vaga_view(filename):
-    path = os.path.join(CSV_DIR, filename)
-    if not os.path.isfile(path):
+    versao = versao_vaga(filename)
+    pagina = None
+    if CACHE_PAGINAS and versao is not None:
+        pagina = pagina_cache.get(filename, versao)
+    if pagina is None:
+        data = carregar_vaga(filename, versao)
+        if data is None:
+            flash('Vaga não encontrada.', 'error')
+            return redirect(url_for('vagas_public'))
+        encerrada = vaga_encerrada(data)
+        pagina = {
+            # A página da vaga encerrada muda (aviso), o conteúdo não
+            'etag': f"{etag_vaga(data)}-{VAGA_TEMPLATE_HASH}{'-encerrada' if encerrada else ''}",
+            'modificada': modificada_em(data, versao),
+            'html': None,
+        }
+        if nao_modificado(pagina['etag'], pagina['modificada']):
+            return resposta_condicional(b'', pagina['etag'], pagina['modificada'])
+        pagina['html'] = render_template('vaga_view.html', data=data, csv_file=filename,
+                                         encerrada=encerrada)
+        if CACHE_PAGINAS:
+            pagina_cache.put(filename, versao, pagina)
+    return resposta_condicional(pagina['html'], pagina['etag'], pagina['modificada'])
+
+# Vagas antigas do banco, gravadas antes da coluna arquivo_csv
+@app.route('/vaga/id/<int:servico_id>')
+def vaga_por_id(servico_id):
+    servico = db_manager.get_servico(servico_id)
+    if servico is None or vaga_excluida(servico.get('arquivo')):
         flash('Vaga não encontrada.', 'error')
         return redirect(url_for('vagas_public'))
-    with open(path, 'r', encoding='utf-8') as f:
-        r = csv.DictReader(f)
-        data = next(r, None) or {}
-    return render_template('vaga_view.html', data=data, csv_file=filename)
+    if servico.get('arquivo') and versao_vaga(servico['arquivo']) is not None:
+        return redirect(url_for('vaga_view', filename=servico['arquivo']))
+    # Sem arquivo no store: exibe os dados do banco, sem CSV/PDF
+    return render_template('vaga_view.html', data=servico, csv_file=None,
+                           encerrada=vaga_encerrada(servico))
 
 # -----------------------------
 # Admin: login/logout/dashboard
@@ -260,6 +870,9 @@ def verify_admin_password(username, password):
         
     Returns:
         dict: Dados do usuário se autenticado, None caso contrário
+        
+    Raises:
+        VerifierBusy: se o pool de verificação de senhas estiver lotado
     """
     # Primeira tentativa: autenticação via banco de dados
     user = db_manager.authenticate_user(username, password)
@@ -269,12 +882,9 @@ def verify_admin_password(username, password):
     # Fallback: autenticação via .env (apenas desenvolvimento)
     if username == ADMIN_USERNAME:
         if ADMIN_PASSWORD_HASH:
-            try:
-                if bcrypt_lib.checkpw(password.encode('utf-8'), ADMIN_PASSWORD_HASH.encode('utf-8')):
-                    return {'id': 0, 'login': username}
-            except Exception:
-                pass
-        elif password == ADMIN_PASSWORD:
+            if is_bcrypt_hash(ADMIN_PASSWORD_HASH) and verificador.verify(password, ADMIN_PASSWORD_HASH):
+                return {'id': 0, 'login': username}
+        elif verificador.verify(password, ADMIN_PASSWORD):
             return {'id': 0, 'login': username}
     
     return None
@@ -300,9 +910,25 @@ def admin_login():
             flash('Usuário e senha são obrigatórios.', 'error')
             return redirect(url_for('admin_login'))
         
-        # Autentica usuário
-        user = verify_admin_password(username, password)
+        # Limite de tentativas: recusa antes de tocar no banco ou no bcrypt
+        ip = request.remote_addr
+        espera = login_throttle.verificar(ip, username)
+        if espera:
+            flash('Muitas tentativas de login. Aguarde e tente novamente.', 'error')
+            resp = make_response(render_template('admin_login.html'), 429)
+            resp.headers['Retry-After'] = str(max(1, math.ceil(espera)))
+            return resp
+        
+        # Autentica usuário (bcrypt roda no pool limitado de passwords.py)
+        try:
+            user = verify_admin_password(username, password)
+        except VerifierBusy:
+            flash('Muitas tentativas de login no momento. Tente novamente em instantes.', 'error')
+            resp = make_response(render_template('admin_login.html'), 503)
+            resp.headers['Retry-After'] = '2'
+            return resp
         if user:
+            login_throttle.sucesso(ip, username)
             session['logged_in'] = True
             session['user_id'] = user['id']
             session['username'] = user['login']
@@ -311,6 +937,7 @@ def admin_login():
             flash(f'Login realizado com sucesso! Bem-vindo, {user["login"]}', 'success')
             return redirect(url_for('admin_dashboard'))
         
+        login_throttle.falha(ip, username)
         flash('Credenciais inválidas.', 'error')
         return redirect(url_for('admin_login'))
     
@@ -325,40 +952,291 @@ def admin_logout():
 @app.route('/admin')
 @login_required
 def admin_dashboard():
-    vagas = []
-    for name in sorted(os.listdir(CSV_DIR)):
-        if not name.lower().endswith('.csv'):
-            continue
+    vagas, proximo_cursor, contingencia = listar_vagas(ADMIN_PAGE_SIZE, apenas_ativos=False)
+    # Linhas do banco não distinguem excluída de expirada: a situação vem do índice do store
+    vaga_index.sync()
+    for pos, v in enumerate(vagas):
+        resumo = vaga_index.resumo(v.get('arquivo'))
+        vagas[pos] = dict(v, excluida=bool(resumo and resumo['excluida']))
+    return render_template(
+        'admin_dashboard.html',
+        vagas=vagas,
+        proximo_cursor=proximo_cursor,
+        contingencia=contingencia,
+        spool=servico_spool.depth(),
+    )
+
+@app.route('/admin/db/pool')
+@login_required
+def admin_db_pool():
+    """Estatísticas do pool de conexões MySQL (para dimensionamento)"""
+    return jsonify(db_manager.pool_stats())
+
+@app.route('/admin/spool')
+@login_required
+def admin_spool():
+    """Situação da fila de gravação no banco (write-behind)"""
+    return jsonify(servico_spool.depth())
+
+@app.route('/admin/expiracao')
+@login_required
+def admin_expiracao():
+    """Situação da expiração automática das vagas"""
+    return jsonify(expiracao_vagas.stats())
+
+@app.route('/admin/cache')
+@login_required
+def admin_cache():
+    """Contadores dos caches LRU de vagas"""
+    return jsonify({
+        'vagas': vaga_cache.stats(),
+        'paginas': pagina_cache.stats(),
+        'pdf': {**gerador_pdf.cache.stats(), **gerador_pdf.stats()},
+    })
+
+@app.route('/admin/metrics')
+def admin_metrics():
+    """
+    Métricas no formato texto do Prometheus
+
+    Aceita a sessão do admin ou o cabeçalho "Authorization: Bearer <METRICS_TOKEN>".
+    """
+    autorizado = session.get('logged_in')
+    if not autorizado and METRICS_TOKEN:
+        cabecalho = request.headers.get('Authorization', '')
+        if cabecalho.startswith('Bearer '):
+            autorizado = hmac.compare_digest(cabecalho[7:].strip().encode('utf-8'), METRICS_TOKEN.encode('utf-8'))
+    if not autorizado:
+        return Response('Não autorizado\n', 401, mimetype='text/plain',
+                        headers={'WWW-Authenticate': 'Bearer'})
+    return Response(metrics.registro.render(), content_type='text/plain; version=0.0.4; charset=utf-8',
+                    headers={'Cache-Control': 'no-store'})
+
+# Exportação de todas as vagas (CSV ou XLSX, gerada em fluxo)
+FORMATOS_EXPORT = {
+    'csv': (gerar_csv, 'text/csv'),
+    'xlsx': (gerar_xlsx, 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+}
+
+def filtros_export():
+    """Filtros de /admin/export a partir da query string"""
+    status = request.args.get('status', 'todas')
+    filtros = {'ativo': {'ativas': True, 'inativas': False}.get(status)}
+    for campo, parametro in (('orgao_demandante', 'orgao'), ('bairro', 'bairro')):
+        valor = (request.args.get(parametro) or '').strip()
+        if valor:
+            filtros[campo] = valor
+    for campo, parametro in (('criado_desde', 'desde'), ('criado_ate', 'ate')):
+        valor = request.args.get(parametro) or ''
         try:
-            with open(os.path.join(CSV_DIR, name), 'r', encoding='utf-8') as f:
-                r = csv.DictReader(f)
-                row = next(r, None)
-                if row:
-                    vagas.append({
-                        'arquivo': name,
-                        'titulo_servico': row.get('titulo_servico',''),
-                        'tipo_atividade': row.get('tipo_atividade',''),
-                        'bairro': row.get('bairro',''),
-                        'prazo_expiracao': row.get('prazo_expiracao',''),
-                    })
-        except Exception:
+            filtros[campo] = date.fromisoformat(valor).isoformat()
+        except ValueError:
+            pass
+    return filtros
+
+@app.route('/admin/export')
+@login_required
+def admin_export():
+    """
+    Todas as vagas (ou as filtradas) em um único CSV ou XLSX
+    
+    Lê o servicos_mei com cursor do lado do servidor (ou o store, se o
+    banco estiver fora) e entrega o arquivo em blocos: memória constante
+    e primeiro byte imediato, qualquer que seja o número de vagas.
+    """
+    formato = request.args.get('formato', 'csv')
+    if formato not in FORMATOS_EXPORT:
+        return jsonify({'erro': 'Formato inválido (use csv ou xlsx)'}), 400
+    gerar, mimetype = FORMATOS_EXPORT[formato]
+    
+    filtros = filtros_export()
+    linhas = db_manager.export_servicos(COLUNAS_EXPORT, filtros)
+    if linhas is None:
+        logger.warning("Exportação lida do store local (banco indisponível)")
+        linhas = vaga_store.iter_export(COLUNAS_EXPORT, filtros)
+    
+    nome = f"vagas_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{formato}"
+    return Response(
+        stream_with_context(gerar(linhas)),
+        mimetype=mimetype,
+        headers={
+            'Content-Disposition': f'attachment; filename="{nome}"',
+            'Cache-Control': 'no-store',
+            # Proxies (nginx) repassam os blocos sem acumular a resposta
+            'X-Accel-Buffering': 'no',
+        },
+    )
+
+# Limite de vagas por ZIP (cada uma é um CSV pequeno)
+MAX_ARQUIVOS_ZIP = int(os.getenv('MAX_ARQUIVOS_ZIP', 500))
+
+def arquivo_para_zip(filename):
+    """
+    Como abrir o CSV de uma vaga para o ZIP, com as mesmas regras de /download
+    
+    Returns:
+        callable: Função que abre o conteúdo em modo binário, ou None se a vaga não existir
+    """
+    versao = versao_vaga(filename)
+    if versao and versao[0] == 'store':
+        return lambda: io.BytesIO(vaga_to_csv(carregar_vaga(filename, versao) or {}))
+    path = safe_join(CSV_DIR, filename)
+    if path is None or not os.path.isfile(path):
+        return None
+    return lambda: open(path, 'rb')
+
+@app.route('/admin/download-zip', methods=['POST'])
+@login_required
+def admin_download_zip():
+    """
+    CSVs das vagas selecionadas no painel em um único ZIP
+    
+    O arquivo é comprimido enquanto é enviado: nada vai para o disco e
+    só um bloco por vez fica em memória.
+    """
+    selecionadas = list(dict.fromkeys(request.form.getlist('arquivos')))
+    if not selecionadas:
+        flash('Selecione ao menos uma vaga.', 'error')
+        return redirect(url_for('admin_dashboard'))
+    if len(selecionadas) > MAX_ARQUIVOS_ZIP:
+        flash(f'Selecione no máximo {MAX_ARQUIVOS_ZIP} vagas por download.', 'error')
+        return redirect(url_for('admin_dashboard'))
+    
+    entradas = []
+    for filename in selecionadas:
+        abrir = arquivo_para_zip(filename)
+        if abrir is None:
+            logger.warning("Vaga %s não encontrada para o ZIP", filename)
             continue
-    return render_template('admin_dashboard.html', vagas=vagas)
+        entradas.append((filename, abrir))
+    if not entradas:
+        flash('Nenhuma das vagas selecionadas foi encontrada.', 'error')
+        return redirect(url_for('admin_dashboard'))
+    
+    nome = f"vagas_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
+    return Response(
+        stream_with_context(gerar_zip(entradas)),
+        mimetype='application/zip',
+        headers={
+            'Content-Disposition': f'attachment; filename="{nome}"',
+            'Cache-Control': 'no-store',
+            'X-Accel-Buffering': 'no',
+        },
+    )
+
+# Máximo de vagas por exclusão em lote
+MAX_EXCLUSAO_LOTE = int(os.getenv('MAX_EXCLUSAO_LOTE', 1000))
+
+def excluir_vagas(arquivos):
+    """
+    Exclui vagas do store e dos CSVs antigos e as desativa no servicos_mei
+    
+    A desativação no banco (ativo = FALSE) entra no spool, depois das
+    gravações já enfileiradas: a requisição não espera o banco, funciona com
+    ele fora do ar e uma vaga excluída que ainda estava na fila é gravada e
+    logo desativada, sem voltar ativa. As vagas saem do store (uma
+    transação), os CSVs antigos são movidos para CSV_EXCLUIDOS_DIR e
+    índices e caches são invalidados de uma vez.
+    
+    Returns:
+        dict: excluidas, nao_encontradas (fora do store e dos CSVs; a
+              desativação no banco vale para todas) e desativacao_no_banco
+              ('enfileirada' ou 'concluida'), ou None se nem o spool nem o
+              banco aceitaram a desativação (nada é excluído)
+    """
+    arquivos = list(dict.fromkeys(arquivos))
+    try:
+        servico_spool.desativar(arquivos)
+        desativacao = 'enfileirada'
+    except OSError:
+        logger.exception("Erro ao enfileirar a desativação das vagas excluídas")
+        # Sem spool, desativa direto no banco
+        if db_manager.deactivate_servicos(arquivos) is None:
+            return None
+        desativacao = 'concluida'
+    
+    excluidas = set(vaga_store.delete_many(arquivos))
+    for filename in arquivos:
+        # CSV antigo ainda não migrado para o store
+        path = safe_join(CSV_DIR, filename)
+        if path is None or not os.path.isfile(path):
+            continue
+        destino = os.path.join(CSV_EXCLUIDOS_DIR, os.path.relpath(path, CSV_DIR))
+        try:
+            os.makedirs(os.path.dirname(destino), exist_ok=True)
+            # os.rename quando na mesma partição (atômico)
+            shutil.move(path, destino)
+            excluidas.add(filename)
+        except OSError as e:
+            logger.error("Erro ao mover CSV excluído %s: %s", filename, e)
+    
+    excluidas = [a for a in arquivos if a in excluidas]
+    invalidar_vagas(excluidas, excluidas=True)
+    logger.info("Vagas excluídas: %s (desativação no banco %s)", len(excluidas), desativacao)
+    return {
+        'excluidas': excluidas,
+        'nao_encontradas': [a for a in arquivos if a not in set(excluidas)],
+        'desativacao_no_banco': desativacao,
+    }
 
 @app.route('/admin/delete/<path:filename>', methods=['POST'])
 @login_required
 def admin_delete(filename):
-    path = os.path.join(CSV_DIR, filename)
-    if os.path.isfile(path):
-        try:
-            os.remove(path)
+    try:
+        resultado = excluir_vagas([filename])
+        if resultado is None:
+            flash('Não foi possível registrar a exclusão: a vaga não foi excluída. Tente novamente.', 'error')
+        elif resultado['excluidas']:
             flash('Vaga excluída com sucesso.', 'success')
-        except Exception as e:
-            flash(f'Erro ao excluir vaga: {e}', 'error')
-    else:
-        flash('Arquivo não encontrado.', 'error')
+        else:
+            flash('Arquivo não encontrado; a vaga será desativada no banco de dados, se existir.', 'error')
+    except Exception as e:
+        flash(f'Erro ao excluir vaga: {e}', 'error')
+    return redirect(url_for('admin_dashboard'))
+
+@app.route('/admin/delete', methods=['POST'])
+@login_required
+def admin_delete_lote():
+    """Exclusão das vagas selecionadas no painel"""
+    selecionadas = request.form.getlist('arquivos')
+    if not selecionadas:
+        flash('Selecione ao menos uma vaga.', 'error')
+        return redirect(url_for('admin_dashboard'))
+    if len(selecionadas) > MAX_EXCLUSAO_LOTE:
+        flash(f'Selecione no máximo {MAX_EXCLUSAO_LOTE} vagas por exclusão.', 'error')
+        return redirect(url_for('admin_dashboard'))
+    try:
+        resultado = excluir_vagas(selecionadas)
+        if resultado is None:
+            flash('Não foi possível registrar a exclusão: nenhuma vaga foi excluída. Tente novamente.', 'error')
+        else:
+            flash(f"{len(resultado['excluidas'])} vaga(s) excluída(s).", 'success')
+            if resultado['nao_encontradas']:
+                flash(f"{len(resultado['nao_encontradas'])} vaga(s) não encontrada(s); "
+                      "serão desativadas no banco de dados, se existirem.", 'error')
+    except Exception as e:
+        flash(f'Erro ao excluir vagas: {e}', 'error')
     return redirect(url_for('admin_dashboard'))
 
+@app.route('/api/admin/vagas/excluir', methods=['POST'])
+def api_admin_excluir():
+    """
+    Exclusão em lote via JSON: {"arquivos": ["...csv", ...]}
+    
+    Usa a sessão do admin; o token CSRF vai no cabeçalho X-CSRFToken.
+    """
+    if not session.get('logged_in'):
+        return jsonify({'erro': 'Não autorizado'}), 401
+    payload = request.get_json(silent=True) or {}
+    arquivos = payload.get('arquivos')
+    if not isinstance(arquivos, list) or not arquivos or not all(isinstance(a, str) and a for a in arquivos):
+        return jsonify({'erro': 'Informe "arquivos": lista de nomes de arquivo'}), 400
+    if len(arquivos) > MAX_EXCLUSAO_LOTE:
+        return jsonify({'erro': f'No máximo {MAX_EXCLUSAO_LOTE} vagas por requisição'}), 400
+    resultado = excluir_vagas(arquivos)
+    if resultado is None:
+        return jsonify({'erro': 'Fila de gravação e banco de dados indisponíveis; nenhuma vaga foi excluída'}), 503
+    return jsonify(resultado)
 
 
 if __name__ == '__main__':
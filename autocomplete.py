@@ -0,0 +1,110 @@
+"""
+Autocompletar das listas de referência (ocupações, serviços e órgãos)
+
+Cada opção é indexada por todas as suas palavras em uma trie de prefixos,
+sem acentos e sem diferenciar maiúsculas: "hidrau" encontra
+"BOMBEIRO(A) HIDRÁULICO(A) ENCANADOR (A)". Quando os prefixos não rendem
+resultados suficientes, completa com as opções que contêm o texto em
+qualquer posição.
+"""
+
+import re
+
+from busca import dobrar_acentos
+
+
+_PALAVRA_RE = re.compile(r'[a-z0-9]+')
+
+# Quantidade máxima de sugestões por consulta
+MAX_SUGESTOES = 50
+
+
+def palavras(texto):
+    """Palavras de um texto, em minúsculas e sem acentos"""
+    return _PALAVRA_RE.findall(dobrar_acentos(texto or ''))
+
+
+class PrefixTrie:
+    """Trie imutável de prefixos de palavras sobre uma lista de opções"""
+
+    def __init__(self, opcoes):
+        # A ordem da lista define a ordem das sugestões
+        self.opcoes = tuple(opcoes)
+        self._dobradas = tuple(dobrar_acentos(o) for o in self.opcoes)
+        self._raiz = {}
+        for pos, opcao in enumerate(self.opcoes):
+            for palavra in set(palavras(opcao)):
+                no = self._raiz
+                for letra in palavra:
+                    no = no.setdefault(letra, {})
+                    no.setdefault('', set()).add(pos)
+        # Congela os conjuntos de posições de cada nó
+        pilha = [self._raiz]
+        while pilha:
+            no = pilha.pop()
+            for chave, filho in no.items():
+                if chave == '':
+                    no[''] = frozenset(filho)
+                else:
+                    pilha.append(filho)
+
+    def _posicoes(self, prefixo):
+        no = self._raiz
+        for letra in prefixo:
+            no = no.get(letra)
+            if no is None:
+                return frozenset()
+        return no.get('', frozenset())
+
+    def buscar(self, consulta, limite=10, permitidos=None):
+        """
+        Sugestões para o texto digitado
+
+        Args:
+            consulta (str): Texto digitado (cada palavra vale como prefixo)
+            limite (int): Quantidade máxima de sugestões
+            permitidos (set, opcional): Restringe às opções deste conjunto
+
+        Returns:
+            list: Opções encontradas, na ordem original da lista
+        """
+        limite = max(1, min(limite, MAX_SUGESTOES))
+        termos = palavras(consulta)
+        texto = ' '.join(termos)
+        if not termos:
+            candidatas = range(len(self.opcoes))
+        else:
+            # Palavras mais longas primeiro: conjuntos menores, interseção mais barata
+            ordem = sorted(termos, key=len, reverse=True)
+            candidatas = set(self._posicoes(ordem[0]))
+            for termo in ordem[1:]:
+                if not candidatas:
+                    break
+                candidatas &= self._posicoes(termo)
+            # Opções que começam pelo texto digitado vêm antes
+            candidatas = sorted(
+                candidatas, key=lambda pos: (not self._dobradas[pos].startswith(texto), pos)
+            )
+
+        resultado = []
+        for pos in candidatas:
+            if permitidos is None or self.opcoes[pos] in permitidos:
+                resultado.append(pos)
+                if len(resultado) >= limite:
+                    break
+
+        # Fallback: o texto aparece no meio de uma palavra ("draul")
+        if len(resultado) < limite and texto:
+            ja = set(resultado)
+            for pos, dobrada in enumerate(self._dobradas):
+                if pos in ja or texto not in dobrada:
+                    continue
+                if permitidos is None or self.opcoes[pos] in permitidos:
+                    resultado.append(pos)
+                    if len(resultado) >= limite:
+                        break
+
+        return [self.opcoes[pos] for pos in resultado]
+
+    def __len__(self):
+        return len(self.opcoes)
@@ -0,0 +1,208 @@
+"""
+Busca textual das vagas: índice invertido em memória com ranking BM25
+
+Tokenização pensada para português: minúsculas, sem acentos
+("hidráulico" = "hidraulico"), sem stopwords e com um radical simples
+para plural ("canos" = "cano", "elétricas" = "eletrica"). O índice é
+atualizado a cada vaga criada ou excluída, sem reconstrução.
+"""
+
+import re
+import math
+import heapq
+import threading
+import unicodedata
+
+
+# Campos indexados e seus pesos (título conta mais que a descrição)
+CAMPOS_BUSCA = {
+    'titulo_servico': 3,
+    'especificacao_atividade': 2,
+    'descricao_servico': 1,
+    'bairro': 2,
+}
+
+STOPWORDS = frozenset("""
+a ao aos as com como da das de do dos e em entre na nas no nos num numa o os
+ou para pela pelas pelo pelos por que se sem sob sobre um uma umas uns
+""".split())
+
+# Consultas distintas guardadas entre duas alterações do índice
+MAX_RESULTADOS_EM_CACHE = 256
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+
+def dobrar_acentos(texto):
+    """Minúsculas e sem acentos/cedilha"""
+    texto = unicodedata.normalize('NFKD', texto.lower())
+    return ''.join(ch for ch in texto if not unicodedata.combining(ch))
+
+
+def radical(token):
+    """Remove plurais comuns do português (regras leves, sem dicionário)"""
+    if len(token) <= 3:
+        return token
+    if token.endswith('oes') or token.endswith('aes'):
+        return token[:-3] + 'ao'
+    if token.endswith('is') and len(token) > 4:
+        return token[:-2] + 'l'
+    if token.endswith('ns'):
+        return token[:-2] + 'm'
+    if token.endswith('res') or token.endswith('zes') or token.endswith('ses'):
+        return token[:-2]
+    if token.endswith('s'):
+        return token[:-1]
+    return token
+
+
+def tokenizar(texto):
+    """Lista de termos normalizados de um texto"""
+    return [
+        radical(t) for t in _TOKEN_RE.findall(dobrar_acentos(texto or ''))
+        if t not in STOPWORDS
+    ]
+
+
+class BuscaVagas:
+    """Índice invertido BM25 das vagas, chaveado pelo nome de arquivo"""
+
+    def __init__(self, store, k1=1.2, b=0.75):
+        self.store = store
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self._postings = {}   # termo -> {arquivo: frequência ponderada}
+        self._termos = {}     # arquivo -> termos do documento (para remoção)
+        self._tamanhos = {}   # arquivo -> tamanho ponderado do documento
+        self._total_tamanhos = 0
+        # Resultados recentes; qualquer alteração no índice os descarta
+        self._resultados = {}
+        self._max_id = 0       # maior id do store já indexado
+        self._versao = None    # versão do store na última sincronização
+
+    def _frequencias(self, data):
+        freqs = {}
+        for campo, peso in CAMPOS_BUSCA.items():
+            for termo in tokenizar(data.get(campo, '')):
+                freqs[termo] = freqs.get(termo, 0) + peso
+        return freqs
+
+    def rebuild(self):
+        """Reconstrói o índice completo a partir do store"""
+        versao = self.store.versao()
+        with self._lock:
+            self._clear_locked()
+            self._load_new_locked()
+            self._versao = versao
+
+    def _load_new_locked(self):
+        for row in self.store.iter_vagas(list(CAMPOS_BUSCA), after_id=self._max_id, apenas_ativas=True):
+            self._add_locked(row['arquivo'], self._frequencias(row))
+            self._max_id = max(self._max_id, row['id'])
+
+    def sync(self):
+        """Ressincroniza com o store se a versão dele mudou (gravações de outros workers)"""
+        versao = self.store.versao()
+        if versao == self._versao:
+            return
+        with self._lock:
+            if versao == self._versao:
+                return
+            self._load_new_locked()
+            if self.store.count(apenas_ativas=True) != len(self._tamanhos):
+                self._clear_locked()
+                self._load_new_locked()
+            self._versao = versao
+
+    def add(self, arquivo, data, vaga_id=None):
+        """Indexa (ou reindexa) uma vaga"""
+        freqs = self._frequencias(data)
+        with self._lock:
+            self._add_locked(arquivo, freqs)
+            if vaga_id:
+                self._max_id = max(self._max_id, vaga_id)
+
+    def _add_locked(self, arquivo, freqs):
+        self._remove_locked(arquivo)
+        for termo, freq in freqs.items():
+            self._postings.setdefault(termo, {})[arquivo] = freq
+        tamanho = sum(freqs.values())
+        self._termos[arquivo] = tuple(freqs)
+        self._tamanhos[arquivo] = tamanho
+        self._total_tamanhos += tamanho
+        self._resultados.clear()
+
+    def remove(self, arquivo):
+        """Remove uma vaga do índice"""
+        with self._lock:
+            self._remove_locked(arquivo)
+
+    def remove_many(self, arquivos):
+        """Remove várias vagas de uma vez (leitores nunca veem a remoção pela metade)"""
+        with self._lock:
+            for arquivo in arquivos:
+                self._remove_locked(arquivo)
+
+    def _remove_locked(self, arquivo):
+        termos = self._termos.pop(arquivo, None)
+        if termos is None:
+            return
+        self._resultados.clear()
+        for termo in termos:
+            docs = self._postings.get(termo)
+            if docs is None:
+                continue
+            docs.pop(arquivo, None)
+            if not docs:
+                del self._postings[termo]
+        self._total_tamanhos -= self._tamanhos.pop(arquivo, 0)
+
+    def _clear_locked(self):
+        self._postings.clear()
+        self._termos.clear()
+        self._tamanhos.clear()
+        self._total_tamanhos = 0
+        self._resultados.clear()
+        self._max_id = 0
+
+    def search(self, consulta, limite=20):
+        """
+        Vagas mais relevantes para a consulta (BM25)
+
+        Returns:
+            list: Tuplas (arquivo, pontuação), da mais relevante para a menos
+        """
+        termos = frozenset(tokenizar(consulta))
+        if not termos:
+            return []
+        self.sync()
+        chave = (termos, limite)
+        with self._lock:
+            resultado = self._resultados.get(chave)
+            if resultado is not None:
+                return list(resultado)
+            n = len(self._tamanhos)
+            if not n:
+                return []
+            media = self._total_tamanhos / n
+            k1, b = self.k1, self.b
+            pontos = {}
+            # Cada lista é percorrida inteira: a pontuação é o BM25 exato, e
+            # uma vaga que só tem os termos comuns também entra no ranking
+            for termo in termos:
+                docs = self._postings.get(termo)
+                if not docs:
+                    continue
+                idf = math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+                for arquivo, freq in docs.items():
+                    norma = k1 * (1 - b + b * self._tamanhos[arquivo] / media)
+                    pontos[arquivo] = pontos.get(arquivo, 0.0) + idf * freq * (k1 + 1) / (freq + norma)
+            resultado = heapq.nlargest(limite, pontos.items(), key=lambda item: item[1])
+            if len(self._resultados) >= MAX_RESULTADOS_EM_CACHE:
+                self._resultados.clear()
+            self._resultados[chave] = resultado
+        return list(resultado)
+
+    def __len__(self):
+        return len(self._tamanhos)
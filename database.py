@@ -3,13 +3,449 @@ Módulo para gerenciamento de conexão com banco de dados MySQL
 """
 
 import os
+import time
+import logging
+import threading
+import contextvars
+from collections import deque
+from functools import wraps
+from datetime import datetime
 import pymysql
-import bcrypt as bcrypt_lib
+from passwords import verificador, hash_password, needs_rehash
+import metrics
+from logging_config import registrar_consulta
 from dotenv import load_dotenv
 
 # Carrega variáveis de ambiente
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# Limite de segurança para o tamanho de página das listagens
+MAX_PAGE_SIZE = 200
+
+# Colunas usadas nas listagens de vagas
+LISTAGEM_COLUNAS = """
+    id, titulo_servico, tipo_atividade, bairro, prazo_expiracao,
+    arquivo_csv AS arquivo, data_criacao, ativo
+"""
+
+
+# Colunas gravadas pelos INSERTs de serviços, na ordem
+COLUNAS_SERVICO = (
+    'orgao_demandante', 'titulo_servico', 'tipo_atividade',
+    'especificacao_atividade', 'descricao_servico', 'outras_informacoes',
+    'endereco', 'numero', 'bairro', 'forma_pagamento', 'prazo_pagamento',
+    'prazo_expiracao', 'data_limite_execucao', 'arquivo_csv', 'cnae',
+)
+
+# Colunas criadas por ALTER TABLE em bancos antigos (docs/estrutura-mysql.md):
+# ficam fora do INSERT enquanto a migração não for aplicada
+COLUNAS_MIGRADAS = ('arquivo_csv', 'cnae')
+
+
+def montar_insert_servico(colunas):
+    """INSERT de um serviço com as colunas informadas (também usado em lote via executemany)"""
+    return (
+        f"INSERT INTO servicos_mei ({', '.join(colunas)}) "
+        f"VALUES ({', '.join(f'%({coluna})s' for coluna in colunas)})"
+    )
+
+# Campos opcionais em insert_servico (os demais são obrigatórios)
+CAMPOS_OPCIONAIS_SERVICO = ('tipo_atividade', 'outras_informacoes', 'arquivo_csv', 'cnae')
+
+# Em insert_servicos_bulk, data_criacao só entra no INSERT quando o registro a
+# traz (importação de CSVs antigos); sem ela vale o DEFAULT da tabela
+COLUNA_DATA_CRIACAO = 'data_criacao'
+
+
+# Erros do MySQL causados pelo conteúdo de um registro (valor inválido,
+# NULL em coluna obrigatória, texto longo demais, duplicidade...), e não
+# pela conexão, por permissão ou pelo esquema
+ERROS_DE_DADOS = (pymysql.err.DataError, pymysql.err.IntegrityError)
+ERRNOS_DE_DADOS = {1048, 1264, 1265, 1292, 1300, 1364, 1366, 1367, 1406, 3819}
+
+
+def erro_de_dados(exc):
+    """
+    True se a exceção de uma gravação vem dos dados do registro
+
+    Repetir a mesma gravação não adianta; os demais erros (banco fora,
+    timeout do pool, deadlock, tabela ou permissão faltando) são
+    passageiros ou do ambiente e valem nova tentativa.
+    """
+    if isinstance(exc, ERROS_DE_DADOS):
+        return True
+    if isinstance(exc, (pymysql.err.OperationalError, pymysql.err.InternalError)):
+        return bool(exc.args) and exc.args[0] in ERRNOS_DE_DADOS
+    # Registro sem um campo ou com tipo que o pymysql não sabe escapar
+    return isinstance(exc, (KeyError, TypeError, ValueError))
+
+
+def encode_cursor(data_criacao, servico_id):
+    """Gera o cursor opaco da próxima página a partir da última linha lida"""
+    return f"{data_criacao.strftime('%Y%m%d%H%M%S%f')}.{servico_id}"
+
+
+def decode_cursor(cursor):
+    """
+    Interpreta um cursor gerado por encode_cursor
+
+    Returns:
+        tuple: (data_criacao, id) ou None se o cursor for inválido
+    """
+    try:
+        carimbo, servico_id = cursor.split('.', 1)
+        return datetime.strptime(carimbo, '%Y%m%d%H%M%S%f'), int(servico_id)
+    except (AttributeError, ValueError):
+        return None
+
+
+# Operação do DatabaseManager em andamento (rótulo das métricas de consulta)
+_operacao_atual = contextvars.ContextVar('operacao_db', default='outra')
+
+
+def operacao_db(nome):
+    """Decorator que identifica as consultas feitas pelo método nas métricas"""
+    def decorator(funcao):
+        @wraps(funcao)
+        def _wrapped(*args, **kwargs):
+            token = _operacao_atual.set(nome)
+            try:
+                return funcao(*args, **kwargs)
+            finally:
+                _operacao_atual.reset(token)
+        return _wrapped
+    return decorator
+
+
+class PoolTimeout(Exception):
+    """Nenhuma conexão ficou livre dentro do prazo de checkout"""
+
+
+class TimedCursor:
+    """
+    Cursor pymysql que mede execute/executemany
+
+    A duração vai para webmei_db_query_duration_seconds e as exceções para
+    webmei_db_query_errors_total, rotuladas pela operação atual.
+    """
+    
+    def __init__(self, raw):
+        self._raw = raw
+    
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+    
+    def __iter__(self):
+        return iter(self._raw)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self._raw.close()
+        return False
+    
+    def _medir(self, metodo, *args):
+        operacao = _operacao_atual.get()
+        inicio = time.perf_counter()
+        erro = False
+        try:
+            return metodo(*args)
+        except Exception:
+            erro = True
+            metrics.db_erros.inc(operacao=operacao)
+            raise
+        finally:
+            duracao = time.perf_counter() - inicio
+            metrics.db_duracao.observe(duracao, operacao=operacao)
+            registrar_consulta(duracao, erro)
+    
+    def execute(self, query, args=None):
+        return self._medir(self._raw.execute, query, args)
+    
+    def executemany(self, query, args):
+        return self._medir(self._raw.executemany, query, args)
+
+
+class PooledConnection:
+    """
+    Conexão emprestada do pool
+    
+    Delega tudo para a conexão pymysql; close() devolve a conexão ao pool
+    em vez de fechá-la, mantendo compatível o padrão
+    ``connection = db.get_connection() ... finally: connection.close()``.
+    """
+    
+    def __init__(self, pool, raw, created_at):
+        self._pool = pool
+        self._raw = raw
+        self._created_at = created_at
+    
+    def __getattr__(self, name):
+        raw = self.__dict__.get('_raw')
+        if raw is None:
+            raise pymysql.err.InterfaceError("Conexão já devolvida ao pool")
+        return getattr(raw, name)
+    
+    def cursor(self, *args, **kwargs):
+        """Cursor com medição de tempo das consultas"""
+        return TimedCursor(self.__getattr__('cursor')(*args, **kwargs))
+    
+    def close(self):
+        raw, self._raw = self._raw, None
+        if raw is not None:
+            self._pool.release(raw, self._created_at)
+    
+    def discard(self):
+        """Fecha a conexão em vez de devolvê-la (ex.: leitura sem buffer interrompida)"""
+        raw, self._raw = self._raw, None
+        if raw is not None:
+            self._pool.discard(raw)
+
+
+class ConnectionPool:
+    """
+    Pool de conexões MySQL thread-safe e limitado
+    
+    - min_size conexões são mantidas abertas; as ociosas além disso são
+      fechadas depois de idle_timeout segundos
+    - no máximo max_size conexões abertas ao mesmo tempo; quem passar disso
+      espera até timeout segundos e recebe PoolTimeout
+    - conexões com mais de recycle segundos são substituídas
+    - conexões ociosas há mais de ping_interval segundos recebem um ping
+      antes do checkout
+    """
+    
+    def __init__(self, factory, min_size=1, max_size=10, timeout=5.0,
+                 recycle=3600, ping_interval=5.0, idle_timeout=300):
+        self._factory = factory
+        self.min_size = max(0, min_size)
+        self.max_size = max(1, max_size, self.min_size)
+        self.timeout = timeout
+        self.recycle = recycle
+        self.ping_interval = ping_interval
+        self.idle_timeout = idle_timeout
+        self._cond = threading.Condition()
+        self._reset()
+    
+    def _reset(self):
+        self._pid = os.getpid()
+        self._idle = deque()  # (conexão, criada_em, devolvida_em)
+        self._total = 0
+        self._in_use = 0
+        self._waiting = 0
+        self._stats = {
+            'created': 0,
+            'closed': 0,
+            'checkouts': 0,
+            'waits': 0,
+            'timeouts': 0,
+            'wait_time_total': 0.0,
+            'wait_time_max': 0.0,
+        }
+    
+    def _close_raw(self, raw):
+        try:
+            raw.close()
+        except Exception:
+            pass
+    
+    def _free_slot_locked(self):
+        self._total -= 1
+        self._cond.notify()
+    
+    def _discard_locked(self, raw):
+        self._free_slot_locked()
+        self._stats['closed'] += 1
+        return raw
+    
+    def _prune_idle_locked(self, now):
+        """Remove conexões ociosas demais acima de min_size"""
+        fechar = []
+        while self._idle and self._total > self.min_size:
+            raw, created_at, released_at = self._idle[0]
+            if now - released_at < self.idle_timeout:
+                break
+            self._idle.popleft()
+            fechar.append(self._discard_locked(raw))
+        return fechar
+    
+    def acquire(self, timeout=None):
+        """
+        Empresta uma conexão do pool
+        
+        Raises:
+            PoolTimeout: se nenhuma conexão ficar livre a tempo
+        """
+        timeout = self.timeout if timeout is None else timeout
+        inicio = time.monotonic()
+        fechar = []
+        esperou = False
+        
+        with self._cond:
+            # Processo filho (fork) não pode reaproveitar sockets do pai
+            if self._pid != os.getpid():
+                self._reset()
+            
+            while True:
+                if self._idle:
+                    raw, created_at, released_at = self._idle.pop()
+                    break
+                if self._total < self.max_size:
+                    self._total += 1
+                    raw = None
+                    break
+                restante = timeout - (time.monotonic() - inicio)
+                if restante <= 0:
+                    self._stats['timeouts'] += 1
+                    metrics.db_erros.inc(operacao=_operacao_atual.get())
+                    registrar_consulta(0.0, erro=True)
+                    raise PoolTimeout(
+                        f"Nenhuma conexão livre em {timeout:.1f}s "
+                        f"({self._in_use}/{self.max_size} em uso)"
+                    )
+                esperou = True
+                self._waiting += 1
+                try:
+                    self._cond.wait(restante)
+                finally:
+                    self._waiting -= 1
+            
+            self._in_use += 1
+            self._stats['checkouts'] += 1
+            espera = time.monotonic() - inicio
+            if esperou:
+                self._stats['waits'] += 1
+            self._stats['wait_time_total'] += espera
+            self._stats['wait_time_max'] = max(self._stats['wait_time_max'], espera)
+            fechar = self._prune_idle_locked(time.monotonic())
+        
+        metrics.db_pool_espera.observe(espera)
+        
+        for antiga in fechar:
+            self._close_raw(antiga)
+        
+        try:
+            if raw is not None:
+                raw, created_at = self._check(raw, created_at, released_at)
+            if raw is None:
+                raw = self._factory()
+                created_at = time.monotonic()
+                with self._cond:
+                    self._stats['created'] += 1
+        except Exception:
+            metrics.db_erros.inc(operacao=_operacao_atual.get())
+            registrar_consulta(0.0, erro=True)
+            with self._cond:
+                self._in_use -= 1
+                self._free_slot_locked()
+            raise
+        
+        return PooledConnection(self, raw, created_at)
+    
+    def _check(self, raw, created_at, released_at):
+        """Valida uma conexão ociosa antes do checkout; None se precisar de outra"""
+        now = time.monotonic()
+        if self.recycle and now - created_at > self.recycle:
+            self._close_raw(raw)
+            with self._cond:
+                self._stats['closed'] += 1
+            return None, None
+        if now - released_at > self.ping_interval:
+            try:
+                raw.ping(reconnect=False)
+            except Exception:
+                self._close_raw(raw)
+                with self._cond:
+                    self._stats['closed'] += 1
+                return None, None
+        return raw, created_at
+    
+    def release(self, raw, created_at):
+        """Devolve uma conexão ao pool (chamado por PooledConnection.close)"""
+        manter = True
+        try:
+            # Encerra qualquer transação aberta para não vazar snapshot/locks
+            raw.rollback()
+        except Exception:
+            manter = False
+        
+        now = time.monotonic()
+        if self.recycle and now - created_at > self.recycle:
+            manter = False
+        
+        with self._cond:
+            if self._pid != os.getpid():
+                return
+            self._in_use -= 1
+            if manter:
+                self._idle.append((raw, created_at, now))
+                self._cond.notify()
+                return
+            self._discard_locked(raw)
+        self._close_raw(raw)
+    
+    def discard(self, raw):
+        """Fecha uma conexão emprestada e libera a vaga dela no pool"""
+        with self._cond:
+            if self._pid != os.getpid():
+                return
+            self._in_use -= 1
+            self._discard_locked(raw)
+        self._close_raw(raw)
+    
+    def prefill(self):
+        """Abre conexões até min_size (melhor esforço)"""
+        while True:
+            with self._cond:
+                if self._total >= self.min_size:
+                    return
+                self._total += 1
+            try:
+                raw = self._factory()
+            except Exception:
+                with self._cond:
+                    self._free_slot_locked()
+                return
+            with self._cond:
+                self._stats['created'] += 1
+                self._idle.append((raw, time.monotonic(), time.monotonic()))
+                self._cond.notify()
+    
+    def close_all(self):
+        """Fecha as conexões ociosas (as emprestadas fecham ao serem devolvidas)"""
+        with self._cond:
+            fechar = [raw for raw, _, _ in self._idle]
+            self._idle.clear()
+            for raw in fechar:
+                self._discard_locked(raw)
+        for raw in fechar:
+            self._close_raw(raw)
+    
+    def stats(self):
+        """
+        Estatísticas do pool para dimensionamento
+        
+        Returns:
+            dict: Tamanhos configurados, conexões em uso/ociosas e tempos de espera
+        """
+        with self._cond:
+            dados = dict(self._stats)
+            dados.update({
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'total': self._total,
+                'waiting': self._waiting,
+            })
+        checkouts = dados['checkouts']
+        dados['wait_time_avg'] = dados['wait_time_total'] / checkouts if checkouts else 0.0
+        return dados
+
+
 class DatabaseManager:
     """Gerenciador de conexão com MySQL"""
     
@@ -20,13 +456,64 @@ class DatabaseManager:
             'user': os.getenv('DB_USER', 'root'),
             'password': os.getenv('DB_PASSWORD', ''),
             'database': os.getenv('DB_NAME', 'servicosmei'),
-            'charset': os.getenv('DB_CHARSET', 'utf8mb4')
+            'charset': os.getenv('DB_CHARSET', 'utf8mb4'),
+            'connect_timeout': int(os.getenv('DB_CONNECT_TIMEOUT', 10))
         }
+        self.pool = ConnectionPool(
+            self._connect,
+            min_size=int(os.getenv('DB_POOL_MIN_SIZE', 1)),
+            max_size=int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+            timeout=float(os.getenv('DB_POOL_TIMEOUT', 5)),
+            recycle=int(os.getenv('DB_POOL_RECYCLE', 3600)),
+            ping_interval=float(os.getenv('DB_POOL_PING_INTERVAL', 5)),
+            idle_timeout=int(os.getenv('DB_POOL_IDLE_TIMEOUT', 300)),
+        )
     
-    def get_connection(self):
-        """Retorna uma conexão com o banco"""
+        # Colunas existentes em servicos_mei (lidas na primeira gravação)
+        self._colunas_servico = None
+    
+    def _connect(self):
+        """Abre uma conexão nova (usada pelo pool)"""
         return pymysql.connect(**self.config)
     
+    def get_connection(self):
+        """Empresta uma conexão do pool; close() a devolve"""
+        return self.pool.acquire()
+    
+    def pool_stats(self):
+        """Estatísticas do pool de conexões"""
+        return self.pool.stats()
+    
+    def _colunas_existentes(self, cursor):
+        """
+        Colunas de servicos_mei, consultadas uma vez por processo
+        
+        Em bancos sem os ALTER TABLE de docs/estrutura-mysql.md, as colunas
+        que faltam ficam fora dos INSERTs (com aviso no log) em vez de
+        fazer toda gravação, e com ela o spool, falhar.
+        
+        Returns:
+            set: Nomes das colunas
+        """
+        if self._colunas_servico is None:
+            cursor.execute("SHOW COLUMNS FROM servicos_mei")
+            colunas = {row['Field'] if isinstance(row, dict) else row[0] for row in cursor.fetchall()}
+            faltando = [coluna for coluna in COLUNAS_MIGRADAS if coluna not in colunas]
+            if faltando:
+                logger.warning(
+                    "servicos_mei sem a(s) coluna(s) %s: gravando sem elas "
+                    "(aplique os ALTER TABLE de docs/estrutura-mysql.md e reinicie)",
+                    ', '.join(faltando)
+                )
+            self._colunas_servico = colunas
+        return self._colunas_servico
+    
+    def _colunas_insert(self, cursor):
+        """Colunas de COLUNAS_SERVICO presentes na tabela, na ordem do INSERT"""
+        existentes = self._colunas_existentes(cursor)
+        return [coluna for coluna in COLUNAS_SERVICO if coluna in existentes]
+    
+    @operacao_db('authenticate_user')
     def authenticate_user(self, login, password):
         """
         Autentica usuário na tabela authuser
@@ -37,6 +524,9 @@ class DatabaseManager:
             
         Returns:
             dict: Dados do usuário se autenticado, None caso contrário
+            
+        Raises:
+            VerifierBusy: se o pool de verificação de senhas estiver lotado
         """
         try:
             connection = self.get_connection()
@@ -46,34 +536,55 @@ class DatabaseManager:
                 cursor.execute("SELECT id, login, senha FROM authuser WHERE login = %s", (login,))
                 user = cursor.fetchone()
                 
-                if not user:
-                    return None
-                
-                stored_password = user['senha']
-                
-                # Verifica se a senha armazenada é um hash bcrypt
-                if stored_password.startswith('$2b$') or stored_password.startswith('$2a$'):
-                    # Senha com hash - verifica usando bcrypt
-                    is_valid = bcrypt_lib.checkpw(password.encode('utf-8'), stored_password.encode('utf-8'))
-                else:
-                    # Senha em texto plano - comparação direta (inseguro, mas compatível)
-                    is_valid = password == stored_password
-                
-                if is_valid:
-                    return {
-                        'id': user['id'],
-                        'login': user['login']
-                    }
-                
-                return None
-                
         except Exception as e:
-            print(f"Erro na autenticação: {e}")
+            logger.error("Erro na autenticação: %s", e)
             return None
         finally:
             if 'connection' in locals():
+                # Devolve a conexão ao pool antes do bcrypt, que é demorado
                 connection.close()
+        
+        if not user:
+            return None
+        
+        # Hash bcrypt (ou texto plano legado) conferido no pool de verificação
+        if verificador.verify(password, user['senha']):
+            if needs_rehash(user['senha']):
+                # Texto plano ou custo antigo: refaz o hash em segundo plano
+                verificador.submit_background(self._rehash_password, user['id'], user['senha'], password)
+            return {
+                'id': user['id'],
+                'login': user['login']
+            }
+        
+        return None
     
+    @operacao_db('rehash_password')
+    def _rehash_password(self, user_id, senha_antiga, password):
+        """
+        Regrava a senha com o custo atual (BCRYPT_ROUNDS)
+
+        Só atualiza se a senha armazenada ainda for a mesma conferida no
+        login, para não sobrescrever uma troca de senha concorrente.
+        """
+        try:
+            hashed = hash_password(password)
+            connection = self.get_connection()
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "UPDATE authuser SET senha = %s WHERE id = %s AND senha = %s",
+                    (hashed, user_id, senha_antiga)
+                )
+                connection.commit()
+                if cursor.rowcount:
+                    logger.info("Senha do usuário %s regravada com custo bcrypt atual", user_id)
+        except Exception as e:
+            logger.error("Erro ao regravar hash da senha: %s", e)
+        finally:
+            if 'connection' in locals():
+                connection.close()
+    
+    @operacao_db('update_user_password_hash')
     def update_user_password_hash(self, login, new_password):
         """
         Atualiza senha do usuário com hash bcrypt
@@ -86,28 +597,28 @@ class DatabaseManager:
             bool: True se atualizado com sucesso
         """
         try:
-            # Gera hash da nova senha
-            salt = bcrypt_lib.gensalt()
-            hashed = bcrypt_lib.hashpw(new_password.encode('utf-8'), salt)
+            # Gera hash da nova senha (custo BCRYPT_ROUNDS)
+            hashed = hash_password(new_password)
             
             connection = self.get_connection()
             
             with connection.cursor() as cursor:
                 cursor.execute(
                     "UPDATE authuser SET senha = %s WHERE login = %s",
-                    (hashed.decode('utf-8'), login)
+                    (hashed, login)
                 )
                 connection.commit()
                 
                 return cursor.rowcount > 0
                 
         except Exception as e:
-            print(f"Erro ao atualizar senha: {e}")
+            logger.error("Erro ao atualizar senha: %s", e)
             return False
         finally:
             if 'connection' in locals():
                 connection.close()
     
+    @operacao_db('list_users')
     def list_users(self):
         """
         Lista todos os usuários (sem senhas)
@@ -123,12 +634,13 @@ class DatabaseManager:
                 return cursor.fetchall()
                 
         except Exception as e:
-            print(f"Erro ao listar usuários: {e}")
+            logger.error("Erro ao listar usuários: %s", e)
             return []
         finally:
             if 'connection' in locals():
                 connection.close()
     
+    @operacao_db('insert_servico')
     def insert_servico(self, data):
         """
         Insere um novo serviço na tabela servicos_mei
@@ -149,36 +661,475 @@ class DatabaseManager:
                 - prazo_expiracao (str, formato YYYY-MM-DD)
                 - data_limite_execucao (str, formato YYYY-MM-DD)
                 - arquivo_csv (str, opcional)
+                - cnae (str, opcional)
                 
         Returns:
             int: ID do serviço inserido ou None em caso de erro
         """
+        data = dict(data)
+        for campo in CAMPOS_OPCIONAIS_SERVICO:
+            data.setdefault(campo, None)
         try:
             connection = self.get_connection()
             
             with connection.cursor() as cursor:
-                sql = """
-                    INSERT INTO servicos_mei (
-                        orgao_demandante, titulo_servico, tipo_atividade, 
-                        especificacao_atividade, descricao_servico, outras_informacoes,
-                        endereco, numero, bairro, forma_pagamento, prazo_pagamento,
-                        prazo_expiracao, data_limite_execucao
-                    ) VALUES (
-                        %(orgao_demandante)s, %(titulo_servico)s, %(tipo_atividade)s,
-                        %(especificacao_atividade)s, %(descricao_servico)s, %(outras_informacoes)s,
-                        %(endereco)s, %(numero)s, %(bairro)s, %(forma_pagamento)s, %(prazo_pagamento)s,
-                        %(prazo_expiracao)s, %(data_limite_execucao)s
-                    )
-                """
-                
-                cursor.execute(sql, data)
+                cursor.execute(montar_insert_servico(self._colunas_insert(cursor)), data)
                 connection.commit()
                 
                 return cursor.lastrowid
                 
         except Exception as e:
-            print(f"Erro ao inserir serviço no banco de dados: {e}")
+            logger.error("Erro ao inserir serviço no banco de dados: %s", e)
             return None
         finally:
             if 'connection' in locals():
-                connection.close()
\ No newline at end of file
+                connection.close()
+    
+    @operacao_db('insert_servicos_bulk')
+    def insert_servicos_bulk(self, records, chunk_size=500, skip_existing=True, raise_errors=False):
+        """
+        Insere vários serviços de uma vez (executemany, uma transação por bloco)
+        
+        O pymysql transforma o executemany em INSERTs de várias linhas, então
+        cada bloco custa uma ida ao banco em vez de uma por serviço.
+        
+        Args:
+            records (list): Lista de dicionários no formato de insert_servico;
+                            podem trazer data_criacao (datetime ou
+                            'YYYY-MM-DD HH:MM:SS') para preservar a data original
+            chunk_size (int): Linhas por transação
+            skip_existing (bool): Ignora registros cujo arquivo_csv já está na tabela
+            raise_errors (bool): Propaga a exceção em vez de retornar None
+                                 (para quem precisa distinguir com is_data_error)
+            
+        Returns:
+            int: Quantidade de linhas inseridas ou None em caso de erro
+                 (os blocos anteriores ao erro ficam gravados; com
+                 skip_existing, repetir a chamada é seguro)
+        """
+        rows = []
+        for record in records:
+            row = dict(record)
+            for campo in CAMPOS_OPCIONAIS_SERVICO:
+                row.setdefault(campo, None)
+            rows.append(row)
+        
+        if not rows:
+            return 0
+        
+        inseridos = 0
+        try:
+            connection = self.get_connection()
+            
+            with connection.cursor() as cursor:
+                colunas = self._colunas_insert(cursor)
+                sql = montar_insert_servico(colunas)
+                sql_com_data = montar_insert_servico(colunas + [COLUNA_DATA_CRIACAO])
+                # Sem a coluna arquivo_csv não há como reconhecer os já gravados
+                skip_existing = skip_existing and 'arquivo_csv' in colunas
+                for inicio in range(0, len(rows), chunk_size):
+                    bloco = rows[inicio:inicio + chunk_size]
+                    
+                    if skip_existing:
+                        existentes = self._existing_arquivos_csv(
+                            cursor, [r['arquivo_csv'] for r in bloco if r['arquivo_csv']]
+                        )
+                        bloco = [r for r in bloco if r['arquivo_csv'] not in existentes]
+                    
+                    # Um executemany por formato de INSERT, na mesma transação
+                    com_data = [r for r in bloco if r.get(COLUNA_DATA_CRIACAO)]
+                    sem_data = [r for r in bloco if not r.get(COLUNA_DATA_CRIACAO)]
+                    if sem_data:
+                        cursor.executemany(sql, sem_data)
+                    if com_data:
+                        cursor.executemany(sql_com_data, com_data)
+                    connection.commit()
+                    inseridos += len(bloco)
+                
+                return inseridos
+                
+        except Exception as e:
+            logger.error("Erro ao inserir lote de serviços no banco de dados: %s", e)
+            if raise_errors:
+                raise
+            return None
+        finally:
+            if 'connection' in locals():
+                connection.close()
+    
+    def is_data_error(self, exc):
+        """True se o erro de gravação vem dos dados do registro (ver erro_de_dados)"""
+        return erro_de_dados(exc)
+    
+    def _existing_arquivos_csv(self, cursor, nomes):
+        """Quais dos arquivos CSV informados já estão no servicos_mei (idx_arquivo_csv)"""
+        nomes = list(set(nomes))
+        if not nomes:
+            return set()
+        marcadores = ', '.join(['%s'] * len(nomes))
+        cursor.execute(
+            f"SELECT arquivo_csv FROM servicos_mei WHERE arquivo_csv IN ({marcadores})",
+            nomes
+        )
+        return {row[0] for row in cursor.fetchall()}
+    
+    @operacao_db('expire_servicos')
+    def expire_servicos(self, hoje, batch_size=500):
+        """
+        Desativa (ativo = FALSE) os serviços com prazo_expiracao anterior a hoje
+        
+        Atualiza em lotes de batch_size linhas, um commit por lote, para não
+        segurar locks da tabela; o filtro percorre idx_ativo_prazo (ou
+        idx_prazo_expiracao). Depois disso a listagem pública é só a
+        leitura indexada de ativo = TRUE.
+        
+        Args:
+            hoje (str): Data de corte no formato YYYY-MM-DD
+            batch_size (int): Linhas por lote
+            
+        Returns:
+            int: Quantidade de serviços desativados ou None em caso de erro
+                 (os lotes anteriores ao erro ficam gravados)
+        """
+        total = 0
+        try:
+            connection = self.get_connection()
+            
+            with connection.cursor() as cursor:
+                while True:
+                    cursor.execute(
+                        "UPDATE servicos_mei SET ativo = FALSE "
+                        "WHERE ativo = TRUE AND prazo_expiracao < %s LIMIT %s",
+                        (hoje, batch_size)
+                    )
+                    connection.commit()
+                    total += cursor.rowcount
+                    if cursor.rowcount < batch_size:
+                        return total
+                    
+        except Exception as e:
+            logger.error("Erro ao expirar serviços: %s", e)
+            return None
+        finally:
+            if 'connection' in locals():
+                connection.close()
+    
+    @operacao_db('deactivate_servicos')
+    def deactivate_servicos(self, arquivos_csv, chunk_size=500):
+        """
+        Desativa (ativo = FALSE) os serviços de uma lista de arquivos CSV
+        
+        Exclusão lógica em uma única transação: ou todos os blocos de
+        UPDATE ... WHERE arquivo_csv IN (...) são gravados, ou nenhum
+        (rollback). O filtro usa idx_arquivo_csv.
+        
+        Args:
+            arquivos_csv (list): Nomes dos arquivos CSV das vagas
+            chunk_size (int): Arquivos por UPDATE
+            
+        Returns:
+            int: Quantidade de serviços desativados ou None em caso de erro
+        """
+        nomes = list(dict.fromkeys(a for a in arquivos_csv if a))
+        if not nomes:
+            return 0
+        
+        total = 0
+        try:
+            connection = self.get_connection()
+            
+            try:
+                with connection.cursor() as cursor:
+                    for inicio in range(0, len(nomes), chunk_size):
+                        bloco = nomes[inicio:inicio + chunk_size]
+                        marcadores = ', '.join(['%s'] * len(bloco))
+                        cursor.execute(
+                            "UPDATE servicos_mei SET ativo = FALSE "
+                            f"WHERE ativo = TRUE AND arquivo_csv IN ({marcadores})",
+                            bloco
+                        )
+                        total += cursor.rowcount
+                connection.commit()
+                return total
+            except Exception:
+                connection.rollback()
+                raise
+                
+        except Exception as e:
+            logger.error("Erro ao desativar serviços: %s", e)
+            return None
+        finally:
+            if 'connection' in locals():
+                connection.close()
+    
+    @operacao_db('export_servicos')
+    def export_servicos(self, colunas, filtros=None, chunk_size=1000):
+        """
+        Lê os serviços para exportação com cursor do lado do servidor
+        
+        O SSDictCursor não carrega o resultado inteiro na memória: as linhas
+        chegam do MySQL em blocos de chunk_size (fetchmany) conforme o
+        gerador é consumido, na ordem da chave primária.
+        
+        Args:
+            colunas (list): Colunas de servicos_mei (arquivo_csv sai como "arquivo")
+            filtros (dict, opcional): ativo (bool), orgao_demandante, bairro,
+                                      criado_desde e criado_ate (YYYY-MM-DD)
+            chunk_size (int): Linhas por fetchmany
+            
+        Returns:
+            generator: Dicionários com as colunas pedidas, ou None se a
+                       consulta não pôde ser aberta. A conexão fica presa
+                       até o gerador terminar (ou ser fechado).
+        """
+        filtros = filtros or {}
+        condicoes = []
+        params = []
+        if filtros.get('ativo') is not None:
+            condicoes.append("ativo = %s")
+            params.append(bool(filtros['ativo']))
+        for campo in ('orgao_demandante', 'bairro'):
+            if filtros.get(campo):
+                condicoes.append(f"{campo} = %s")
+                params.append(filtros[campo])
+        if filtros.get('criado_desde'):
+            condicoes.append("data_criacao >= %s")
+            params.append(filtros['criado_desde'])
+        if filtros.get('criado_ate'):
+            condicoes.append("data_criacao < DATE_ADD(%s, INTERVAL 1 DAY)")
+            params.append(filtros['criado_ate'])
+        
+        selecao = ', '.join('arquivo_csv AS arquivo' if c == 'arquivo' else c for c in colunas)
+        where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+        sql = f"SELECT {selecao} FROM servicos_mei {where} ORDER BY id"
+        
+        connection = None
+        try:
+            connection = self.get_connection()
+            cursor = connection.cursor(pymysql.cursors.SSDictCursor)
+            cursor.execute(sql, params)
+        except Exception as e:
+            logger.error("Erro ao abrir exportação de serviços: %s", e)
+            if connection is not None:
+                connection.discard()
+            return None
+        
+        def linhas():
+            completo = False
+            try:
+                while True:
+                    bloco = cursor.fetchmany(chunk_size)
+                    if not bloco:
+                        completo = True
+                        return
+                    yield from bloco
+            finally:
+                if completo:
+                    cursor.close()
+                    connection.close()
+                else:
+                    # Resultado sem buffer pela metade: fechar o cursor leria o resto
+                    connection.discard()
+        
+        return linhas()
+    
+    @operacao_db('list_servicos_expirando')
+    def list_servicos_expirando(self, desde, ate, limit=50):
+        """
+        Próximos serviços ativos a expirar, em ordem de prazo_expiracao
+        
+        Consulta de intervalo em idx_ativo_prazo (ativo, prazo_expiracao):
+        o MySQL lê só as primeiras `limit` entradas a partir de `desde`.
+        
+        Args:
+            desde (str): Primeiro prazo incluído (YYYY-MM-DD)
+            ate (str): Último prazo incluído (YYYY-MM-DD)
+            limit (int): Máximo de serviços (limitado a MAX_PAGE_SIZE)
+            
+        Returns:
+            list: Serviços (mesmas colunas da listagem) ou None em caso de erro
+        """
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        sql = f"""
+            SELECT {LISTAGEM_COLUNAS}
+            FROM servicos_mei
+            WHERE ativo = TRUE AND prazo_expiracao BETWEEN %s AND %s
+            ORDER BY prazo_expiracao, id
+            LIMIT %s
+        """
+        try:
+            connection = self.get_connection()
+            
+            with connection.cursor(pymysql.cursors.DictCursor) as cursor:
+                cursor.execute(sql, (desde, ate, limit))
+                rows = list(cursor.fetchall())
+                
+        except Exception as e:
+            logger.error("Erro ao listar serviços a expirar: %s", e)
+            return None
+        finally:
+            if 'connection' in locals():
+                connection.close()
+        
+        for row in rows:
+            row['prazo_expiracao'] = row['prazo_expiracao'].isoformat()
+        return rows
+    
+    @operacao_db('list_servicos')
+    def list_servicos(self, limit=50, cursor=None, apenas_ativos=True):
+        """
+        Lista serviços com paginação por cursor (keyset), mais recentes primeiro
+        
+        A ordenação (data_criacao DESC, id DESC) percorre idx_data_criacao, que
+        no InnoDB já carrega o id; com apenas_ativos o filtro usa idx_ativo.
+        Cada página custa o mesmo independentemente do tamanho da tabela.
+        
+        Args:
+            limit (int): Tamanho da página (limitado a MAX_PAGE_SIZE)
+            cursor (str, opcional): Cursor devolvido pela página anterior
+            apenas_ativos (bool): Filtra ativo = TRUE (listagem pública)
+            
+        Returns:
+            tuple: (lista de serviços, cursor da próxima página ou None),
+                   ou None em caso de erro
+        """
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        condicoes = []
+        params = []
+        
+        if apenas_ativos:
+            condicoes.append("ativo = TRUE")
+        
+        posicao = decode_cursor(cursor) if cursor else None
+        if posicao:
+            data_criacao, servico_id = posicao
+            condicoes.append("(data_criacao < %s OR (data_criacao = %s AND id < %s))")
+            params.extend([data_criacao, data_criacao, servico_id])
+        
+        where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+        sql = f"""
+            SELECT {LISTAGEM_COLUNAS}
+            FROM servicos_mei
+            {where}
+            ORDER BY data_criacao DESC, id DESC
+            LIMIT %s
+        """
+        # Uma linha extra indica se existe próxima página
+        params.append(limit + 1)
+        
+        try:
+            connection = self.get_connection()
+            
+            with connection.cursor(pymysql.cursors.DictCursor) as cursor_db:
+                cursor_db.execute(sql, params)
+                rows = list(cursor_db.fetchall())
+                
+        except Exception as e:
+            logger.error("Erro ao listar serviços: %s", e)
+            return None
+        finally:
+            if 'connection' in locals():
+                connection.close()
+        
+        proximo = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            ultimo = rows[-1]
+            proximo = encode_cursor(ultimo['data_criacao'], ultimo['id'])
+        
+        for row in rows:
+            if row.get('prazo_expiracao') is not None:
+                row['prazo_expiracao'] = row['prazo_expiracao'].isoformat()
+        
+        return rows, proximo
+    
+    @operacao_db('get_servico')
+    def get_servico(self, servico_id):
+        """
+        Busca um serviço pelo id (vagas antigas sem arquivo_csv só têm o id)
+        
+        Args:
+            servico_id (int): ID do serviço
+            
+        Returns:
+            dict: Dados do serviço (com "arquivo"), ou None se não existir ou em caso de erro
+        """
+        colunas = [c for c in COLUNAS_SERVICO if c not in COLUNAS_MIGRADAS]
+        try:
+            connection = self.get_connection()
+            
+            with connection.cursor(pymysql.cursors.DictCursor) as cursor:
+                existentes = self._colunas_existentes(cursor)
+                arquivo = 'arquivo_csv' if 'arquivo_csv' in existentes else 'NULL'
+                cursor.execute(
+                    f"SELECT id, {', '.join(colunas)}, {arquivo} AS arquivo, ativo, data_criacao "
+                    "FROM servicos_mei WHERE id = %s",
+                    (servico_id,)
+                )
+                row = cursor.fetchone()
+                
+        except Exception as e:
+            logger.error("Erro ao buscar serviço %s: %s", servico_id, e)
+            return None
+        finally:
+            if 'connection' in locals():
+                connection.close()
+        
+        if row:
+            for campo in ('prazo_expiracao', 'data_limite_execucao'):
+                if row.get(campo) is not None:
+                    row[campo] = row[campo].isoformat()
+        return row
+    
+    @operacao_db('watermark_servicos')
+    def watermark_servicos(self):
+        """
+        Marca d'água do servicos_mei: muda a cada INSERT, UPDATE ou DELETE
+        
+        MAX(id) e MAX(data_atualizacao) saem dos índices (PRIMARY e
+        idx_data_atualizacao); o COUNT(*) pega exclusões físicas.
+        
+        Returns:
+            tuple: (total, maior id, última atualização), ou None em caso de erro
+        """
+        try:
+            connection = self.get_connection()
+            
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT COUNT(*), MAX(id), MAX(data_atualizacao) FROM servicos_mei")
+                return tuple(cursor.fetchone())
+                
+        except Exception as e:
+            logger.error("Erro ao ler marca d'água do servicos_mei: %s", e)
+            return None
+        finally:
+            if 'connection' in locals():
+                connection.close()
+    
+    @operacao_db('count_servicos_com_arquivo')
+    def count_servicos_com_arquivo(self, apenas_ativos=True):
+        """
+        Quantidade de serviços com arquivo_csv (vagas que também estão no store)
+        
+        Usado para saber se o servicos_mei já cobre o store (backfill feito
+        e spool drenado) antes de listar pelo banco.
+        
+        Returns:
+            int: Quantidade, ou None em caso de erro (ex.: coluna arquivo_csv ausente)
+        """
+        sql = "SELECT COUNT(*) AS total FROM servicos_mei WHERE arquivo_csv IS NOT NULL"
+        if apenas_ativos:
+            sql += " AND ativo = TRUE"
+        try:
+            connection = self.get_connection()
+            
+            with connection.cursor(pymysql.cursors.DictCursor) as cursor:
+                cursor.execute(sql)
+                return cursor.fetchone()['total']
+                
+        except Exception as e:
+            logger.error("Erro ao contar serviços: %s", e)
+            return None
+        finally:
+            if 'connection' in locals():
+                connection.close()
@@ -0,0 +1,124 @@
+"""
+Expiração automática das vagas vencidas
+
+Uma thread por processo acorda a cada `intervalo` segundos e desativa as
+vagas com prazo_expiracao anterior a hoje, em lotes:
+
+- no store local (ativo = 0), avisando a aplicação dos arquivos expirados
+  para tirá-los do índice em memória, da busca e dos caches;
+- no MySQL (ativo = FALSE), para a listagem pública seguir sendo só a
+  leitura indexada de ativo = TRUE.
+
+As duas atualizações são idempotentes: com vários workers, quem chegar
+depois não encontra nada para fazer, e os demais processos percebem a
+mudança pela versão do store.
+"""
+
+import time
+import random
+import logging
+import threading
+from datetime import date
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+vagas_expiradas = metrics.registro.registrar(metrics.Counter(
+    'webmei_vagas_expiradas_total', 'Vagas desativadas por prazo de expiração vencido',
+    ('origem',)))
+
+
+class ExpiracaoVagas:
+    """Varredura periódica das vagas vencidas (store + servicos_mei)"""
+
+    def __init__(self, store, db_manager=None, intervalo=900, batch_size=500, ao_expirar=None):
+        self.store = store
+        self.db_manager = db_manager
+        self.intervalo = intervalo
+        self.batch_size = batch_size
+        self.ao_expirar = ao_expirar  # chamado com a lista de arquivos expirados no store
+        self._thread = None
+        self._lock = threading.Lock()
+        self.last_run_at = None
+        self.last_error = None
+        self.expiradas_store = 0
+        self.expiradas_banco = 0
+
+    def run_once(self, hoje=None):
+        """
+        Uma varredura completa
+
+        Args:
+            hoje (str, opcional): Data de corte YYYY-MM-DD (padrão: hoje)
+
+        Returns:
+            tuple: (vagas expiradas no store, serviços desativados no banco ou None se o banco falhou)
+        """
+        hoje = hoje or date.today().isoformat()
+        with self._lock:
+            no_store = 0
+            while True:
+                arquivos = self.store.expirar(hoje, self.batch_size)
+                if not arquivos:
+                    break
+                no_store += len(arquivos)
+                if self.ao_expirar is not None:
+                    try:
+                        self.ao_expirar(arquivos)
+                    except Exception as e:
+                        logger.warning("Expiração: erro no callback: %s", e)
+                if len(arquivos) < self.batch_size:
+                    break
+
+            no_banco = None
+            if self.db_manager is not None:
+                no_banco = self.db_manager.expire_servicos(hoje, self.batch_size)
+                if no_banco and not no_store:
+                    # Só o banco mudou: as listagens vindas dele também precisam de ETag novo
+                    self.store.bump_versao()
+
+            self.expiradas_store += no_store
+            vagas_expiradas.inc(no_store, origem='store')
+            if no_banco:
+                self.expiradas_banco += no_banco
+                vagas_expiradas.inc(no_banco, origem='banco')
+            if self.db_manager is not None and no_banco is None:
+                self.last_error = 'Falha ao expirar serviços no banco de dados'
+            else:
+                self.last_error = None
+            self.last_run_at = time.time()
+
+        if no_store or no_banco:
+            logger.info("Vagas expiradas", extra={'store': no_store, 'banco': no_banco, 'corte': hoje})
+        return no_store, no_banco
+
+    def _run(self):
+        # Espalha a primeira varredura dos workers iniciados juntos
+        time.sleep(random.uniform(0, min(self.intervalo, 30)))
+        while True:
+            try:
+                self.run_once()
+            except Exception as e:
+                self.last_error = str(e)
+                logger.exception("Expiração: erro na varredura")
+            time.sleep(self.intervalo)
+
+    def start(self):
+        """Inicia a thread de expiração (uma por processo); intervalo 0 desliga"""
+        if self.intervalo <= 0:
+            return
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name='expiracao-vagas', daemon=True)
+        self._thread.start()
+
+    def stats(self):
+        """Situação da expiração, para a área administrativa"""
+        return {
+            'intervalo': self.intervalo,
+            'ultima_execucao_em': self.last_run_at,
+            'ultimo_erro': self.last_error,
+            'expiradas_store': self.expiradas_store,
+            'expiradas_banco': self.expiradas_banco,
+        }
@@ -0,0 +1,247 @@
+"""
+Exportação das vagas em CSV, XLSX e ZIP, gerada em fluxo
+
+Os geradores recebem um iterável de linhas (dicionários) e produzem os
+bytes do arquivo aos poucos: a memória usada não depende da quantidade
+de vagas e o primeiro bloco sai antes da leitura terminar.
+
+O XLSX é montado à mão (zipfile gravando em um buffer que é esvaziado a
+cada bloco) com células de texto inline, sem a tabela de strings
+compartilhadas, que exigiria guardar todos os textos até o fim. O ZIP
+com os CSVs individuais usa o mesmo buffer.
+"""
+
+import io
+import re
+import csv
+import logging
+import zipfile
+from xml.sax.saxutils import escape
+
+from vaga_store import CAMPOS_VAGA
+
+logger = logging.getLogger(__name__)
+
+
+# Colunas exportadas, na ordem do arquivo
+COLUNAS_EXPORT = ['arquivo', *CAMPOS_VAGA, 'cnae', 'ativo', 'data_criacao']
+
+# Colunas booleanas: MySQL (TINYINT) e SQLite entregam 0/1, não bool
+COLUNAS_SIM_NAO = frozenset({'ativo'})
+
+# Linhas acumuladas antes de entregar um bloco ao cliente
+LINHAS_POR_BLOCO = 500
+
+# Bytes lidos por vez de cada arquivo incluído no ZIP
+TAMANHO_LEITURA_ZIP = 64 * 1024
+
+# Limite de caracteres de uma célula no Excel
+MAX_CELULA = 32767
+
+# Caracteres de controle proibidos em XML 1.0
+_CONTROLE_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+# Início de fórmula em planilhas (injeção via CSV)
+_INICIO_FORMULA = ('=', '+', '-', '@', '\t', '\r')
+
+
+def _sim_nao(valor):
+    if valor is None:
+        return None
+    return 'Não' if valor in (0, '0', False) else 'Sim'
+
+
+def _valor(linha, coluna):
+    valor = linha.get(coluna)
+    if coluna in COLUNAS_SIM_NAO:
+        return _sim_nao(valor)
+    return valor
+
+
+def _texto(valor):
+    if valor is None:
+        return ''
+    if isinstance(valor, bool):
+        return _sim_nao(valor)
+    if hasattr(valor, 'isoformat'):
+        return valor.isoformat(sep=' ') if hasattr(valor, 'hour') else valor.isoformat()
+    return str(valor)
+
+
+def _celula_csv(valor):
+    texto = _texto(valor)
+    if texto.startswith(_INICIO_FORMULA):
+        # Impede que o Excel/LibreOffice interprete o texto como fórmula
+        return "'" + texto
+    return texto
+
+
+def gerar_csv(linhas, colunas=COLUNAS_EXPORT):
+    """Bytes de um CSV UTF-8 (com BOM, para o Excel) em blocos de LINHAS_POR_BLOCO linhas"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(colunas)
+    yield ('\ufeff' + buffer.getvalue()).encode('utf-8')
+
+    buffer.seek(0)
+    buffer.truncate()
+    pendentes = 0
+    for linha in linhas:
+        writer.writerow([_celula_csv(_valor(linha, coluna)) for coluna in colunas])
+        pendentes += 1
+        if pendentes >= LINHAS_POR_BLOCO:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+            pendentes = 0
+    if pendentes:
+        yield buffer.getvalue().encode('utf-8')
+
+
+class _SaidaEmBlocos(io.RawIOBase):
+    """Arquivo só de escrita e sem seek: o zipfile grava, o gerador retira os bytes"""
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._posicao = 0
+
+    def writable(self):
+        return True
+
+    def write(self, dados):
+        self._buffer += dados
+        self._posicao += len(dados)
+        return len(dados)
+
+    def tell(self):
+        # zipfile usa tell() para os offsets do diretório central
+        return self._posicao
+
+    def retirar(self):
+        dados = bytes(self._buffer)
+        self._buffer.clear()
+        return dados
+
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+
+_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="Vagas" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+
+
+def _letra_coluna(indice):
+    """0 -> A, 25 -> Z, 26 -> AA"""
+    letras = ''
+    indice += 1
+    while indice:
+        indice, resto = divmod(indice - 1, 26)
+        letras = chr(65 + resto) + letras
+    return letras
+
+
+def _linha_xlsx(numero, valores, letras):
+    celulas = []
+    for letra, valor in zip(letras, valores):
+        texto = _CONTROLE_XML.sub('', _texto(valor))[:MAX_CELULA]
+        if texto:
+            celulas.append(
+                f'<c r="{letra}{numero}" t="inlineStr"><is><t xml:space="preserve">{escape(texto)}</t></is></c>'
+            )
+    return f'<row r="{numero}">{"".join(celulas)}</row>'
+
+
+def gerar_xlsx(linhas, colunas=COLUNAS_EXPORT):
+    """Bytes de uma planilha XLSX de uma aba, em blocos de LINHAS_POR_BLOCO linhas"""
+    saida = _SaidaEmBlocos()
+    letras = [_letra_coluna(i) for i in range(len(colunas))]
+    with zipfile.ZipFile(saida, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr('[Content_Types].xml', _CONTENT_TYPES)
+        zf.writestr('_rels/.rels', _RELS)
+        zf.writestr('xl/workbook.xml', _WORKBOOK)
+        zf.writestr('xl/_rels/workbook.xml.rels', _WORKBOOK_RELS)
+
+        # force_zip64: o tamanho da aba não é conhecido antes do fim
+        with zf.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as aba:
+            aba.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                b'<sheetData>'
+            )
+            aba.write(_linha_xlsx(1, colunas, letras).encode('utf-8'))
+            yield saida.retirar()
+
+            partes = []
+            for numero, linha in enumerate(linhas, start=2):
+                partes.append(_linha_xlsx(numero, [_valor(linha, coluna) for coluna in colunas], letras))
+                if len(partes) >= LINHAS_POR_BLOCO:
+                    aba.write(''.join(partes).encode('utf-8'))
+                    partes = []
+                    dados = saida.retirar()
+                    if dados:
+                        yield dados
+            if partes:
+                aba.write(''.join(partes).encode('utf-8'))
+            aba.write(b'</sheetData></worksheet>')
+    yield saida.retirar()
+
+
+def gerar_zip(entradas):
+    """
+    Bytes de um ZIP montado em fluxo, sem arquivo temporário
+
+    Args:
+        entradas: Iterável de (nome no ZIP, função que abre o conteúdo em modo binário)
+    """
+    saida = _SaidaEmBlocos()
+    with zipfile.ZipFile(saida, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        for nome, abrir in entradas:
+            try:
+                origem = abrir()
+            except OSError as e:
+                # Excluído entre a seleção e o download: o resto do ZIP segue
+                logger.warning("Arquivo %s fora do ZIP: %s", nome, e)
+                continue
+            with origem, zf.open(nome, 'w', force_zip64=True) as destino:
+                while True:
+                    bloco = origem.read(TAMANHO_LEITURA_ZIP)
+                    if not bloco:
+                        break
+                    destino.write(bloco)
+                    dados = saida.retirar()
+                    if dados:
+                        yield dados
+            yield saida.retirar()
+    yield saida.retirar()
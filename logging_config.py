@@ -0,0 +1,198 @@
+"""
+Configuração de logs da aplicação (JSON em uma linha, sem bloquear o worker)
+
+Os módulos usam ``logging.getLogger(__name__)``. O handler da raiz só
+coloca o registro em uma fila; a formatação e a escrita no stdout ficam
+numa thread em segundo plano (QueueListener). Se a fila encher (stdout
+travado pela captura de logs do servidor), o registro é descartado e
+contado em webmei_logs_descartados_total, sem segurar a requisição.
+
+Variáveis de ambiente:
+    LOG_LEVEL                   Nível da raiz (padrão: INFO)
+    LOG_LEVELS                  Níveis por logger, ex.: "database=DEBUG,werkzeug=WARNING"
+    LOG_FORMAT                  json (padrão) ou texto
+    LOG_FILA_MAX                Registros pendentes antes de descartar (padrão: 10000)
+    LOG_REQUISICOES_AMOSTRA     Fração das requisições normais registradas (0 a 1, padrão: 1)
+    LOG_REQUISICOES_LENTAS_MS   Acima disso a requisição é sempre registrada (padrão: 1000)
+"""
+
+import os
+import sys
+import copy
+import json
+import queue
+import atexit
+import logging
+import threading
+import contextvars
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+import metrics
+
+
+# Atributos padrão do LogRecord (o resto veio em extra=...)
+_ATRIBUTOS_PADRAO = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime', 'contexto'}
+
+# Contexto da requisição atual (request_id, rota, método e consultas ao banco)
+_contexto = contextvars.ContextVar('contexto_log', default=None)
+
+logs_descartados = metrics.registro.registrar(metrics.Counter(
+    'webmei_logs_descartados_total', 'Registros de log descartados com a fila cheia'))
+
+_listener = None
+_lock = threading.Lock()
+
+
+def definir_contexto(**campos):
+    """
+    Abre o contexto de log de uma requisição
+
+    Returns:
+        Token para limpar_contexto()
+    """
+    campos.setdefault('db_consultas', 0)
+    campos.setdefault('db_ms', 0.0)
+    campos.setdefault('db_erros', 0)
+    return _contexto.set(campos)
+
+
+def limpar_contexto(token):
+    _contexto.reset(token)
+
+
+def contexto_atual():
+    """Campos do contexto da requisição atual (ou None fora de uma requisição)"""
+    return _contexto.get()
+
+
+def registrar_consulta(duracao, erro=False):
+    """Soma uma consulta ao banco no contexto da requisição (chamado pelo TimedCursor)"""
+    campos = _contexto.get()
+    if campos is None:
+        return
+    campos['db_consultas'] += 1
+    campos['db_ms'] += duracao * 1000
+    if erro:
+        campos['db_erros'] += 1
+
+
+class FormatadorJSON(logging.Formatter):
+    """Uma linha JSON por registro: horário, nível, logger, mensagem, contexto e extras"""
+
+    def format(self, record):
+        dados = {
+            'ts': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec='milliseconds'),
+            'nivel': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        contexto = getattr(record, 'contexto', None)
+        if contexto:
+            dados.update(contexto)
+        for chave, valor in record.__dict__.items():
+            if chave not in _ATRIBUTOS_PADRAO and not chave.startswith('_'):
+                dados[chave] = valor
+        if record.exc_info:
+            dados['exc'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            dados['exc'] = record.exc_text
+        return json.dumps(dados, ensure_ascii=False, default=str)
+
+
+class FormatadorTexto(logging.Formatter):
+    """Formato legível para desenvolvimento, com o request_id quando houver"""
+
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)-7s %(name)s: %(message)s')
+
+    def format(self, record):
+        linha = super().format(record)
+        contexto = getattr(record, 'contexto', None)
+        if contexto and contexto.get('request_id'):
+            linha = f"[{contexto['request_id']}] {linha}"
+        return linha
+
+
+class QueueHandlerSemBloqueio(QueueHandler):
+    """
+    QueueHandler que descarta (e conta) o registro quando a fila está cheia
+
+    Guarda no registro uma cópia do contexto da requisição, já que a
+    formatação acontece em outra thread.
+    """
+
+    def prepare(self, record):
+        # Só resolve a mensagem; a formatação fica para a thread do listener
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        campos = _contexto.get()
+        if campos is not None:
+            record.contexto = {
+                chave: valor for chave, valor in campos.items() if not chave.startswith('db_')
+            }
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            logs_descartados.inc()
+
+
+def _niveis_por_logger(valor):
+    """'database=DEBUG,werkzeug=WARNING' -> {'database': 'DEBUG', 'werkzeug': 'WARNING'}"""
+    niveis = {}
+    for item in (valor or '').split(','):
+        if '=' in item:
+            nome, nivel = item.split('=', 1)
+            niveis[nome.strip()] = nivel.strip().upper()
+    return niveis
+
+
+def _iniciar_listener(fila, handler):
+    global _listener
+    _listener = QueueListener(fila, handler, respect_handler_level=True)
+    _listener.start()
+
+
+def configurar_logging():
+    """
+    Instala o handler em fila na raiz (idempotente)
+
+    Chamado uma vez na importação de app.py. Após um fork (workers), o
+    listener é recriado no processo filho.
+    """
+    with _lock:
+        if _listener is not None:
+            return
+
+        raiz = logging.getLogger()
+        raiz.setLevel(os.getenv('LOG_LEVEL', 'INFO').upper())
+        for nome, nivel in _niveis_por_logger(os.getenv('LOG_LEVELS')).items():
+            logging.getLogger(nome).setLevel(nivel)
+
+        saida = logging.StreamHandler(sys.stdout)
+        if os.getenv('LOG_FORMAT', 'json').lower() == 'texto':
+            saida.setFormatter(FormatadorTexto())
+        else:
+            saida.setFormatter(FormatadorJSON())
+
+        fila = queue.Queue(maxsize=int(os.getenv('LOG_FILA_MAX', 10000)))
+        for handler in list(raiz.handlers):
+            raiz.removeHandler(handler)
+        raiz.addHandler(QueueHandlerSemBloqueio(fila))
+
+        _iniciar_listener(fila, saida)
+        # A thread do listener não sobrevive ao fork
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=lambda: _iniciar_listener(fila, saida))
+        atexit.register(parar_logging)
+
+
+def parar_logging():
+    """Escreve os registros pendentes e encerra a thread do listener"""
+    with _lock:
+        if _listener is not None and _listener._thread is not None:
+            _listener.stop()
@@ -0,0 +1,106 @@
+"""
+Cache LRU limitado por memória
+
+Usado para os registros de vagas e para as páginas de vaga já renderizadas.
+As chaves são (nome, versão): quando uma vaga muda de versão a entrada
+antiga deixa de ser alcançável e é descartada.
+"""
+
+import sys
+import threading
+from collections import OrderedDict
+
+
+def tamanho_aproximado(valor):
+    """Estimativa barata, em bytes, do espaço ocupado por um valor do cache"""
+    if isinstance(valor, (str, bytes)):
+        return sys.getsizeof(valor)
+    if isinstance(valor, dict):
+        return sys.getsizeof(valor) + sum(
+            sys.getsizeof(k) + sys.getsizeof(v) for k, v in valor.items()
+        )
+    return sys.getsizeof(valor)
+
+
+class LRUCache:
+    """Cache LRU thread-safe com limite de bytes e contadores de acerto/erro"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._dados = OrderedDict()  # (nome, versão) -> (valor, bytes)
+        self._versoes = {}           # nome -> chave atual
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, nome, versao):
+        """Retorna o valor em cache ou None"""
+        chave = (nome, versao)
+        with self._lock:
+            item = self._dados.get(chave)
+            if item is None:
+                self.misses += 1
+                return None
+            self._dados.move_to_end(chave)
+            self.hits += 1
+            return item[0]
+
+    def put(self, nome, versao, valor):
+        """Guarda um valor, descartando a versão anterior do mesmo nome e os menos usados"""
+        tamanho = tamanho_aproximado(valor)
+        if tamanho > self.max_bytes:
+            return
+        chave = (nome, versao)
+        with self._lock:
+            anterior = self._versoes.get(nome)
+            if anterior is not None:
+                self._pop_locked(anterior)
+            self._dados[chave] = (valor, tamanho)
+            self._versoes[nome] = chave
+            self._bytes += tamanho
+            while self._bytes > self.max_bytes:
+                antiga, _ = next(iter(self._dados.items()))
+                self._pop_locked(antiga)
+                self.evictions += 1
+
+    def _pop_locked(self, chave):
+        item = self._dados.pop(chave, None)
+        if item is None:
+            return
+        self._bytes -= item[1]
+        if self._versoes.get(chave[0]) == chave:
+            del self._versoes[chave[0]]
+
+    def invalidate(self, nome):
+        """Remove qualquer versão em cache de um nome"""
+        with self._lock:
+            chave = self._versoes.get(nome)
+            if chave is not None:
+                self._pop_locked(chave)
+
+    def clear(self):
+        with self._lock:
+            self._dados.clear()
+            self._versoes.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """
+        Contadores do cache
+
+        Returns:
+            dict: itens, bytes, limite, acertos, erros, descartes e taxa de acerto
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'items': len(self._dados),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': self.hits / total if total else 0.0,
+            }
@@ -0,0 +1,225 @@
+"""
+Métricas da aplicação no formato texto do Prometheus
+
+Contadores, gauges e histogramas simples, thread-safe e sem dependências,
+servidos em /admin/metrics. Cada processo (worker) tem os seus próprios
+valores; o Prometheus agrega pelos rótulos da instância.
+"""
+
+import time
+import logging
+import threading
+from functools import wraps
+
+logger = logging.getLogger(__name__)
+
+
+BUCKETS_HTTP = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_DB = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _rotulos(nomes, valores, extra=None):
+    pares = [f'{n}="{_escapar(v)}"' for n, v in zip(nomes, valores)]
+    if extra:
+        pares.append(extra)
+    return '{' + ','.join(pares) + '}' if pares else ''
+
+
+def _numero(valor):
+    if valor == float('inf'):
+        return '+Inf'
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return repr(valor) if isinstance(valor, float) else str(valor)
+
+
+class _Metrica:
+    tipo = None
+
+    def __init__(self, nome, descricao, rotulos=()):
+        self.nome = nome
+        self.descricao = descricao
+        self.rotulos = tuple(rotulos)
+        self._lock = threading.Lock()
+        self._valores = {}
+
+    def _chave(self, labels):
+        return tuple(str(labels.get(n, '')) for n in self.rotulos)
+
+    def cabecalho(self):
+        return [f"# HELP {self.nome} {self.descricao}", f"# TYPE {self.nome} {self.tipo}"]
+
+
+class Counter(_Metrica):
+    tipo = 'counter'
+
+    def inc(self, valor=1, **labels):
+        chave = self._chave(labels)
+        with self._lock:
+            self._valores[chave] = self._valores.get(chave, 0) + valor
+
+    def render(self):
+        linhas = self.cabecalho()
+        with self._lock:
+            itens = sorted(self._valores.items())
+        for chave, valor in itens:
+            linhas.append(f"{self.nome}{_rotulos(self.rotulos, chave)} {_numero(valor)}")
+        return linhas
+
+
+class Gauge(Counter):
+    tipo = 'gauge'
+
+    def dec(self, valor=1, **labels):
+        self.inc(-valor, **labels)
+
+    def set(self, valor, **labels):
+        with self._lock:
+            self._valores[self._chave(labels)] = valor
+
+
+class Histogram(_Metrica):
+    tipo = 'histogram'
+
+    def __init__(self, nome, descricao, rotulos=(), buckets=BUCKETS_HTTP):
+        super().__init__(nome, descricao, rotulos)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, valor, **labels):
+        chave = self._chave(labels)
+        with self._lock:
+            serie = self._valores.get(chave)
+            if serie is None:
+                # [contagem por bucket..., soma, total]
+                serie = self._valores[chave] = [0] * len(self.buckets) + [0.0, 0]
+            for i, limite in enumerate(self.buckets):
+                if valor <= limite:
+                    serie[i] += 1
+                    break
+            serie[-2] += valor
+            serie[-1] += 1
+
+    def time(self, **labels):
+        """Context manager que observa a duração do bloco"""
+        return _Cronometro(self, labels)
+
+    def render(self):
+        linhas = self.cabecalho()
+        with self._lock:
+            itens = sorted((chave, list(serie)) for chave, serie in self._valores.items())
+        for chave, serie in itens:
+            acumulado = 0
+            for limite, contagem in zip(self.buckets, serie):
+                acumulado += contagem
+                rotulos = _rotulos(self.rotulos, chave, f'le="{_numero(float(limite))}"')
+                linhas.append(f"{self.nome}_bucket{rotulos} {acumulado}")
+            rotulos = _rotulos(self.rotulos, chave, 'le="+Inf"')
+            linhas.append(f"{self.nome}_bucket{rotulos} {serie[-1]}")
+            linhas.append(f"{self.nome}_sum{_rotulos(self.rotulos, chave)} {_numero(serie[-2])}")
+            linhas.append(f"{self.nome}_count{_rotulos(self.rotulos, chave)} {serie[-1]}")
+        return linhas
+
+
+class _Cronometro:
+    def __init__(self, histograma, labels):
+        self.histograma = histograma
+        self.labels = labels
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histograma.observe(time.perf_counter() - self.inicio, **self.labels)
+        return False
+
+
+class Registro:
+    """Conjunto de métricas e coletores (valores calculados na hora da leitura)"""
+
+    def __init__(self):
+        self._metricas = []
+        self._coletores = []
+
+    def registrar(self, metrica):
+        self._metricas.append(metrica)
+        return metrica
+
+    def coletor(self, funcao):
+        """
+        Registra funcao() -> lista de (nome, tipo, descrição, {rótulos}, valor)
+
+        Usado para expor estados que já existem em outros objetos (pool,
+        caches, spool) sem duplicar contadores.
+        """
+        self._coletores.append(funcao)
+        return funcao
+
+    def render(self):
+        linhas = []
+        for metrica in self._metricas:
+            linhas.extend(metrica.render())
+        # O formato exige as amostras de cada métrica juntas, após HELP/TYPE
+        grupos = {}
+        for coletor in self._coletores:
+            try:
+                amostras = coletor()
+            except Exception as e:
+                logger.warning("Métricas: erro no coletor %s: %s", getattr(coletor, '__name__', coletor), e)
+                continue
+            for nome, tipo, descricao, labels, valor in amostras:
+                if valor is None:
+                    continue
+                grupo = grupos.setdefault(nome, [f"# HELP {nome} {descricao}", f"# TYPE {nome} {tipo}"])
+                nomes = tuple(labels)
+                grupo.append(f"{nome}{_rotulos(nomes, [labels[n] for n in nomes])} {_numero(valor)}")
+        for grupo in grupos.values():
+            linhas.extend(grupo)
+        return '\n'.join(linhas) + '\n'
+
+
+registro = Registro()
+
+# Requisições HTTP (middleware em app.py)
+http_requests = registro.registrar(Counter(
+    'webmei_http_requests_total', 'Requisições HTTP por endpoint, método e status',
+    ('endpoint', 'method', 'status')))
+http_duracao = registro.registrar(Histogram(
+    'webmei_http_request_duration_seconds', 'Duração das requisições HTTP',
+    ('endpoint', 'method'), BUCKETS_HTTP))
+http_em_andamento = registro.registrar(Gauge(
+    'webmei_http_requests_in_flight', 'Requisições HTTP em andamento'))
+
+# Consultas ao MySQL (cursor instrumentado em database.py)
+db_duracao = registro.registrar(Histogram(
+    'webmei_db_query_duration_seconds', 'Duração das consultas ao MySQL por operação',
+    ('operacao',), BUCKETS_DB))
+db_erros = registro.registrar(Counter(
+    'webmei_db_query_errors_total', 'Consultas ao MySQL que falharam, por operação',
+    ('operacao',)))
+db_pool_espera = registro.registrar(Histogram(
+    'webmei_db_pool_wait_seconds', 'Espera por uma conexão livre no pool',
+    (), BUCKETS_DB))
+
+# Armazenamento das vagas (store SQLite e CSVs antigos)
+store_duracao = registro.registrar(Histogram(
+    'webmei_store_duration_seconds', 'Duração das leituras e gravações de vagas',
+    ('operacao',), BUCKETS_DB))
+
+
+def cronometrar(histograma, **labels):
+    """Decorator que observa a duração de cada chamada no histograma"""
+    def decorator(funcao):
+        @wraps(funcao)
+        def _wrapped(*args, **kwargs):
+            inicio = time.perf_counter()
+            try:
+                return funcao(*args, **kwargs)
+            finally:
+                histograma.observe(time.perf_counter() - inicio, **labels)
+        return _wrapped
+    return decorator
@@ -0,0 +1,154 @@
+"""
+Hash e verificação de senhas bcrypt
+
+Cada bcrypt.checkpw consome dezenas a centenas de milissegundos de CPU.
+As verificações rodam em um pool pequeno e de tamanho fixo, com limite de
+verificações pendentes: numa rajada de logins (ou tentativa de força
+bruta) o excedente falha na hora com VerifierBusy, em vez de ocupar todos
+os workers e atrasar as páginas públicas.
+
+O custo do bcrypt vem de BCRYPT_ROUNDS (calibrado para o servidor com
+scripts/calibrate_bcrypt.py). Senhas em texto plano ou com outro custo
+são refeitas no próximo login bem-sucedido (needs_rehash).
+"""
+
+import os
+import hmac
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+import bcrypt as bcrypt_lib
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+PREFIXOS_BCRYPT = ('$2b$', '$2a$', '$2y$')
+
+# Custo (log2 das iterações) dos hashes novos
+BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', 12))
+
+
+class VerifierBusy(Exception):
+    """Pool de verificação de senhas lotado; o login deve ser tentado de novo depois"""
+
+
+def is_bcrypt_hash(valor):
+    return bool(valor) and valor.startswith(PREFIXOS_BCRYPT)
+
+
+def hash_password(password, rounds=None):
+    """Hash bcrypt de uma senha com o custo configurado (str pronta para gravar)"""
+    salt = bcrypt_lib.gensalt(rounds=rounds or BCRYPT_ROUNDS)
+    return bcrypt_lib.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+
+
+def rounds_do_hash(valor):
+    """Custo de um hash bcrypt ("$2b$12$..." -> 12) ou None se não for bcrypt"""
+    if not is_bcrypt_hash(valor):
+        return None
+    try:
+        return int(valor.split('$')[2])
+    except (IndexError, ValueError):
+        return None
+
+
+def needs_rehash(valor, rounds=None):
+    """True se o valor armazenado é texto plano ou bcrypt com custo diferente do atual"""
+    return rounds_do_hash(valor) != (rounds or BCRYPT_ROUNDS)
+
+
+class PasswordVerifier:
+    """Pool limitado de verificação bcrypt (bcrypt libera o GIL durante o cálculo)"""
+
+    def __init__(self, max_workers=2, max_pendentes=8, timeout=5.0):
+        self.max_workers = max_workers
+        self.max_pendentes = max_pendentes
+        self.timeout = timeout
+        self._vagas = threading.BoundedSemaphore(max_pendentes)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+        self.recusadas = 0
+
+    def _pool(self):
+        # Threads não sobrevivem a fork: cada worker cria o seu pool
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix='bcrypt'
+                )
+                self._pid = os.getpid()
+            return self._executor
+
+    def checkpw(self, password, hashed):
+        """
+        bcrypt.checkpw executado no pool
+
+        Raises:
+            VerifierBusy: se já houver max_pendentes verificações na fila
+                          ou se a verificação não terminar no timeout
+        """
+        if not self._vagas.acquire(blocking=False):
+            self.recusadas += 1
+            raise VerifierBusy('Verificação de senha indisponível no momento')
+        try:
+            futuro = self._pool().submit(
+                bcrypt_lib.checkpw, password.encode('utf-8'), hashed.encode('utf-8')
+            )
+        except Exception:
+            self._vagas.release()
+            raise
+        futuro.add_done_callback(lambda _: self._vagas.release())
+        try:
+            return futuro.result(timeout=self.timeout)
+        except FutureTimeout:
+            raise VerifierBusy('Verificação de senha demorou demais')
+
+    def verify(self, password, stored):
+        """
+        Confere uma senha com o valor armazenado (hash bcrypt ou texto plano legado)
+
+        Returns:
+            bool: True se a senha confere
+        """
+        if is_bcrypt_hash(stored):
+            try:
+                return self.checkpw(password, stored)
+            except ValueError:
+                # Hash corrompido
+                return False
+        # Texto plano (legado): comparação em tempo constante
+        return hmac.compare_digest(password.encode('utf-8'), (stored or '').encode('utf-8'))
+
+    def submit_background(self, funcao, *args):
+        """
+        Executa uma tarefa no pool sem esperar por ela (ex.: rehash após o login)
+
+        Returns:
+            bool: False se o pool estiver lotado e a tarefa foi descartada
+        """
+        if not self._vagas.acquire(blocking=False):
+            return False
+        try:
+            futuro = self._pool().submit(funcao, *args)
+        except Exception:
+            self._vagas.release()
+            return False
+        futuro.add_done_callback(lambda _: self._vagas.release())
+        return True
+
+    def stats(self):
+        return {
+            'max_workers': self.max_workers,
+            'max_pendentes': self.max_pendentes,
+            'recusadas': self.recusadas,
+        }
+
+
+# Verificador compartilhado pela aplicação
+verificador = PasswordVerifier(
+    max_workers=int(os.getenv('BCRYPT_WORKERS', 2)),
+    max_pendentes=int(os.getenv('BCRYPT_MAX_PENDENTES', 8)),
+    timeout=float(os.getenv('BCRYPT_TIMEOUT', 5)),
+)
@@ -0,0 +1,322 @@
+"""
+PDF imprimível de cada vaga (reportlab), com cache em disco
+
+A montagem do layout é CPU pura e segura o GIL: roda em um pool de
+processos pequeno e de tamanho fixo, com limite de PDFs pendentes, para
+não ocupar os workers do Flask. Numa rajada o excedente falha na hora
+com PDFOcupado.
+
+Cada PDF é gravado uma vez em PDF_CACHE_DIR com o hash do conteúdo da
+vaga no nome e, daí em diante, servido como arquivo estático. O tamanho
+da pasta é limitado: ao passar de max_bytes, os PDFs usados há mais
+tempo (mtime, atualizado a cada acesso) são removidos.
+
+Os processos do pool são criados por forkserver (ou spawn, fora do POSIX),
+nunca por fork: um fork a partir do worker do Flask herdaria locks
+presos por outras threads (logging, pool do MySQL) e poderia travar.
+"""
+
+import io
+import os
+import hashlib
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from xml.sax.saxutils import escape
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.units import cm
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+from vaga_store import CAMPOS_VAGA
+
+logger = logging.getLogger(__name__)
+
+
+# Mudou o layout: troque a versão para os PDFs em cache serem refeitos
+VERSAO_LAYOUT = 1
+
+# Campos do PDF, na ordem de templates/vaga_view.html
+ROTULOS = [
+    ('orgao_demandante', 'Órgão Demandante'),
+    ('tipo_atividade', 'Tipo de atividade'),
+    ('especificacao_atividade', 'Especificação da Atividade'),
+    ('descricao_servico', 'Descrição do Serviço'),
+    ('outras_informacoes', 'Outras informações'),
+    ('endereco', 'Endereço'),
+    ('forma_pagamento', 'Forma de pagamento'),
+    ('prazo_pagamento', 'Prazo de pagamento'),
+    ('prazo_expiracao', 'Prazo de expiração'),
+    ('data_limite_execucao', 'Data limite de execução'),
+]
+
+
+class PDFOcupado(Exception):
+    """Pool de geração de PDFs lotado; a requisição deve ser repetida depois"""
+
+
+class ErroPDF(Exception):
+    """Falha do reportlab ou de um processo do pool ao gerar o PDF"""
+
+
+def contexto_pool():
+    """Contexto multiprocessing do pool: forkserver (POSIX) ou spawn"""
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        contexto = multiprocessing.get_context('forkserver')
+        # O servidor já carrega o reportlab; cada processo novo é um fork dele
+        contexto.set_forkserver_preload([__name__])
+        return contexto
+    return multiprocessing.get_context('spawn')
+
+
+def chave_pdf(data):
+    """Hash do conteúdo da vaga (e da versão do layout) que identifica o PDF"""
+    conteudo = '\x1f'.join(str(data.get(campo) or '') for campo in CAMPOS_VAGA)
+    return hashlib.sha256(f"{VERSAO_LAYOUT}\x1e{conteudo}".encode('utf-8')).hexdigest()[:32]
+
+
+def _valor(data, campo):
+    if campo == 'endereco':
+        valor = f"{data.get('endereco') or ''}, {data.get('numero') or ''} - {data.get('bairro') or ''}"
+    else:
+        valor = data.get(campo) or ''
+    return escape(valor).replace('\n', '<br/>') or '—'
+
+
+def renderizar_pdf(data):
+    """
+    Bytes do PDF de uma vaga (executado nos processos do pool)
+
+    Args:
+        data (dict): Campos da vaga, como em vaga_view
+    """
+    estilos = getSampleStyleSheet()
+    texto = estilos['BodyText']
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(
+        buffer, pagesize=A4,
+        leftMargin=2 * cm, rightMargin=2 * cm, topMargin=2 * cm, bottomMargin=2 * cm,
+        title=data.get('titulo_servico') or 'Vaga MEI', author='Oportunidades Cariocas',
+    )
+    linhas = [
+        [Paragraph(f'<b>{rotulo}</b>', texto), Paragraph(_valor(data, campo), texto)]
+        for campo, rotulo in ROTULOS
+    ]
+    tabela = Table(linhas, colWidths=[5 * cm, doc.width - 5 * cm])
+    tabela.setStyle(TableStyle([
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ('LINEBELOW', (0, 0), (-1, -2), 0.25, colors.lightgrey),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+    ]))
+    doc.build([
+        Paragraph('Oportunidades Cariocas — Vaga MEI', estilos['Heading4']),
+        Paragraph(escape(data.get('titulo_servico') or 'Vaga MEI'), estilos['Title']),
+        Spacer(1, 0.4 * cm),
+        tabela,
+    ])
+    return buffer.getvalue()
+
+
+class CachePDF:
+    """PDFs em disco, um arquivo por chave, com remoção dos usados há mais tempo"""
+
+    def __init__(self, diretorio, max_bytes):
+        self.diretorio = diretorio
+        self.max_bytes = max_bytes
+        os.makedirs(diretorio, exist_ok=True)
+        self._lock = threading.Lock()
+        # Total estimado da pasta (outros workers também gravam: recontado na limpeza)
+        self._bytes = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _caminho(self, chave):
+        return os.path.join(self.diretorio, f'{chave}.pdf')
+
+    def abrir(self, chave):
+        """
+        PDF em cache, já aberto (não some se for removido durante o envio)
+
+        Returns:
+            file: Arquivo binário aberto ou None se não estiver em cache
+        """
+        caminho = self._caminho(chave)
+        try:
+            arquivo = open(caminho, 'rb')
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        try:
+            # mtime marca o último uso (ordem da remoção)
+            os.utime(caminho)
+        except OSError:
+            pass
+        self.hits += 1
+        return arquivo
+
+    def gravar(self, chave, dados):
+        """Grava um PDF de forma atômica e remove os mais antigos se passar do limite"""
+        caminho = self._caminho(chave)
+        temporario = f'{caminho}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(temporario, 'wb') as f:
+            f.write(dados)
+        os.replace(temporario, caminho)
+        with self._lock:
+            if self._bytes is None or self._bytes + len(dados) > self.max_bytes:
+                self._bytes = self._limpar_locked()
+            else:
+                self._bytes += len(dados)
+
+    def _limpar_locked(self):
+        """Remove os PDFs usados há mais tempo até caber em 90% do limite; devolve o total"""
+        arquivos = []
+        total = 0
+        with os.scandir(self.diretorio) as entradas:
+            for entrada in entradas:
+                if not entrada.name.endswith('.pdf'):
+                    continue
+                try:
+                    st = entrada.stat()
+                except FileNotFoundError:
+                    continue
+                arquivos.append((st.st_mtime, st.st_size, entrada.path))
+                total += st.st_size
+        if total <= self.max_bytes:
+            return total
+        alvo = self.max_bytes * 0.9
+        for _, tamanho, caminho in sorted(arquivos):
+            if total <= alvo:
+                break
+            try:
+                os.remove(caminho)
+            except FileNotFoundError:
+                pass
+            total -= tamanho
+            self.evictions += 1
+        return total
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'bytes': self._bytes or 0,
+        }
+
+
+class GeradorPDF:
+    """Pool limitado de processos que gera os PDFs que faltam no cache"""
+
+    def __init__(self, cache, max_workers=2, max_pendentes=8, timeout=20.0):
+        self.cache = cache
+        self.max_workers = max_workers
+        self.max_pendentes = max_pendentes
+        self.timeout = timeout
+        self._vagas = threading.BoundedSemaphore(max_pendentes)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+        # Chave -> future: pedidos simultâneos do mesmo PDF esperam a mesma geração
+        self._em_andamento = {}
+        self.recusadas = 0
+
+    def _pool(self):
+        # O pool não sobrevive a fork: cada worker cria o seu
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers, mp_context=contexto_pool()
+                )
+                self._pid = os.getpid()
+                self._em_andamento = {}
+            return self._executor
+
+    def _descartar_pool(self, pool):
+        """Um processo do pool morreu: o próximo pedido cria um pool novo"""
+        with self._lock:
+            if self._executor is pool:
+                self._executor = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _gerar(self, chave, data):
+        pool = self._pool()
+        novo = False
+        quebrado = None
+        with self._lock:
+            futuro = self._em_andamento.get(chave)
+            if futuro is None:
+                if not self._vagas.acquire(blocking=False):
+                    self.recusadas += 1
+                    raise PDFOcupado('Geração de PDF indisponível no momento')
+                try:
+                    futuro = pool.submit(renderizar_pdf, dict(data))
+                except BrokenProcessPool as e:
+                    self._vagas.release()
+                    quebrado = e
+                except Exception:
+                    self._vagas.release()
+                    raise
+                else:
+                    self._em_andamento[chave] = futuro
+                    novo = True
+        if quebrado is not None:
+            self._descartar_pool(pool)
+            raise ErroPDF(f'Pool de PDFs interrompido: {quebrado}') from quebrado
+        if novo:
+            # Fora do lock: se o future já terminou, o callback roda nesta thread
+            futuro.add_done_callback(lambda f: self._concluir(chave, f))
+        try:
+            return futuro.result(timeout=self.timeout)
+        except FutureTimeout:
+            raise PDFOcupado('Geração do PDF demorou demais')
+        except BrokenProcessPool as e:
+            self._descartar_pool(pool)
+            raise ErroPDF(f'Pool de PDFs interrompido: {e}') from e
+        except Exception as e:
+            raise ErroPDF(f'Erro ao gerar o PDF: {e}') from e
+
+    def _concluir(self, chave, futuro):
+        # Grava no cache aqui: mesmo que quem pediu desista (timeout), o PDF fica pronto
+        try:
+            if futuro.exception() is None:
+                self.cache.gravar(chave, futuro.result())
+            else:
+                logger.error("Erro ao gerar PDF %s: %s", chave, futuro.exception())
+        except OSError as e:
+            logger.error("Erro ao gravar PDF %s no cache: %s", chave, e)
+        finally:
+            with self._lock:
+                if self._em_andamento.get(chave) is futuro:
+                    del self._em_andamento[chave]
+            self._vagas.release()
+
+    def abrir_pdf(self, data):
+        """
+        PDF de uma vaga, do cache ou gerado no pool
+
+        Returns:
+            tuple: (chave, arquivo binário aberto)
+
+        Raises:
+            PDFOcupado: se o pool estiver lotado ou a geração estourar o timeout
+            ErroPDF: se o reportlab ou um processo do pool falhar
+        """
+        chave = chave_pdf(data)
+        arquivo = self.cache.abrir(chave)
+        if arquivo is not None:
+            return chave, arquivo
+        # Recém-gerado: entrega os bytes sem esperar a gravação no cache
+        return chave, io.BytesIO(self._gerar(chave, data))
+
+    def stats(self):
+        return {
+            'max_workers': self.max_workers,
+            'max_pendentes': self.max_pendentes,
+            'em_andamento': len(self._em_andamento),
+            'recusadas': self.recusadas,
+        }
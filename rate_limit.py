@@ -0,0 +1,275 @@
+"""
+Limite de tentativas de login (token bucket) por IP e por usuário
+
+Cada chave ("ip:<endereço>", "login_ip:<usuário>|<endereço>" ou
+"login:<usuário>") tem um balde de fichas que se repõe a uma taxa fixa;
+cada tentativa gasta uma ficha. Falhas seguidas ativam um bloqueio
+progressivo (backoff exponencial) por IP e por usuário+IP, zerado no login
+bem-sucedido. O balde só por usuário não bloqueia: ele limita a taxa de
+verificações bcrypt de uma conta sem deixar que alguém trocando de IP
+mantenha o usuário verdadeiro trancado. A checagem não toca MySQL nem
+bcrypt.
+
+Por padrão o estado fica em memória (por processo). Com vários workers,
+RATE_LIMIT_DB aponta para um arquivo SQLite compartilhado entre eles.
+"""
+
+import os
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+
+
+class EstadoBalde:
+    """Estado de uma chave: fichas, última reposição, falhas seguidas e bloqueio"""
+
+    __slots__ = ('fichas', 'atualizado', 'falhas', 'bloqueado_ate')
+
+    def __init__(self, fichas, atualizado, falhas=0, bloqueado_ate=0.0):
+        self.fichas = fichas
+        self.atualizado = atualizado
+        self.falhas = falhas
+        self.bloqueado_ate = bloqueado_ate
+
+
+class BaldesMemoria:
+    """Estados em memória, com limite de chaves (descarta as menos usadas)"""
+
+    def __init__(self, max_chaves=10000):
+        self.max_chaves = max_chaves
+        self._lock = threading.Lock()
+        self._estados = OrderedDict()
+
+    def atualizar(self, chave, funcao):
+        """Aplica funcao(estado ou None) -> (novo estado, resultado) de forma atômica"""
+        with self._lock:
+            estado, resultado = funcao(self._estados.get(chave))
+            self._estados[chave] = estado
+            self._estados.move_to_end(chave)
+            while len(self._estados) > self.max_chaves:
+                self._estados.popitem(last=False)
+            return resultado
+
+
+class BaldesSQLite:
+    """Estados em um arquivo SQLite compartilhado entre processos"""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS baldes (
+        chave TEXT PRIMARY KEY,
+        fichas REAL NOT NULL,
+        atualizado REAL NOT NULL,
+        falhas INTEGER NOT NULL DEFAULT 0,
+        bloqueado_ate REAL NOT NULL DEFAULT 0
+    );
+    CREATE INDEX IF NOT EXISTS idx_baldes_atualizado ON baldes (atualizado);
+    """
+
+    # Chaves sem uso há mais que isso são apagadas de tempos em tempos
+    EXPIRACAO = 24 * 3600
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._local = threading.local()
+        self._proxima_limpeza = 0.0
+        conn = self._conn()
+        with conn:
+            conn.executescript(self.SCHEMA)
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def atualizar(self, chave, funcao):
+        conn = self._conn()
+        # BEGIN IMMEDIATE: lê e grava o balde sem corrida entre workers
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT fichas, atualizado, falhas, bloqueado_ate FROM baldes WHERE chave = ?", (chave,)
+            ).fetchone()
+            estado, resultado = funcao(EstadoBalde(*row) if row else None)
+            conn.execute(
+                "INSERT OR REPLACE INTO baldes (chave, fichas, atualizado, falhas, bloqueado_ate) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (chave, estado.fichas, estado.atualizado, estado.falhas, estado.bloqueado_ate)
+            )
+            agora = time.time()
+            if agora >= self._proxima_limpeza:
+                self._proxima_limpeza = agora + 3600
+                conn.execute("DELETE FROM baldes WHERE atualizado < ?", (agora - self.EXPIRACAO,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return resultado
+
+
+class TokenBucket:
+    """
+    Balde de fichas com bloqueio progressivo após falhas seguidas
+
+    Args:
+        capacidade (int): Tentativas em rajada
+        por_minuto (float): Fichas repostas por minuto
+        falhas_livres (int): Falhas seguidas antes do bloqueio progressivo
+        backoff_base (float): Bloqueio, em segundos, na primeira falha além das livres
+        backoff_max (float): Teto do bloqueio
+    """
+
+    def __init__(self, baldes, capacidade, por_minuto, falhas_livres=5,
+                 backoff_base=2.0, backoff_max=900.0):
+        self.baldes = baldes
+        self.capacidade = float(capacidade)
+        self.taxa = por_minuto / 60.0
+        self.falhas_livres = falhas_livres
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+    def _repor(self, estado, agora):
+        if estado is None:
+            return EstadoBalde(self.capacidade, agora)
+        estado.fichas = min(self.capacidade, estado.fichas + (agora - estado.atualizado) * self.taxa)
+        estado.atualizado = agora
+        return estado
+
+    def _espera(self, estado, agora):
+        if estado.bloqueado_ate > agora:
+            return estado.bloqueado_ate - agora
+        if estado.fichas < 1:
+            return (1 - estado.fichas) / self.taxa
+        return 0.0
+
+    def espera(self, chave):
+        """
+        Confere a chave sem gastar ficha
+
+        Returns:
+            float: 0 se a tentativa pode seguir, senão segundos até a próxima permitida
+        """
+        def funcao(estado):
+            agora = time.time()
+            estado = self._repor(estado, agora)
+            return estado, self._espera(estado, agora)
+        return self.baldes.atualizar(chave, funcao)
+
+    def consumir(self, chave):
+        """
+        Gasta uma ficha da chave
+
+        Returns:
+            float: 0 se a tentativa pode seguir, senão segundos até a próxima permitida
+        """
+        def funcao(estado):
+            agora = time.time()
+            estado = self._repor(estado, agora)
+            espera = self._espera(estado, agora)
+            if not espera:
+                estado.fichas -= 1
+            return estado, espera
+        return self.baldes.atualizar(chave, funcao)
+
+    def registrar_falha(self, chave):
+        """Conta uma falha seguida; além das livres, bloqueia por base * 2^n segundos"""
+        def funcao(estado):
+            agora = time.time()
+            estado = self._repor(estado, agora)
+            estado.falhas += 1
+            excesso = estado.falhas - self.falhas_livres
+            if excesso > 0:
+                espera = min(self.backoff_max, self.backoff_base * 2 ** min(excesso - 1, 20))
+                estado.bloqueado_ate = agora + espera
+            return estado, None
+        self.baldes.atualizar(chave, funcao)
+
+    def registrar_sucesso(self, chave):
+        """Zera as falhas seguidas e o bloqueio"""
+        def funcao(estado):
+            estado = self._repor(estado, time.time())
+            estado.falhas = 0
+            estado.bloqueado_ate = 0.0
+            return estado, None
+        self.baldes.atualizar(chave, funcao)
+
+
+class LoginThrottle:
+    """
+    Baldes para o /admin/login: por IP, por usuário+IP e por usuário
+
+    O bloqueio progressivo vale por IP e por usuário+IP: quem erra a senha
+    de "admin" bloqueia só a própria origem. O balde por usuário, somado
+    entre todos os IPs, só limita a taxa (sem bloqueio); a espera máxima
+    que ele impõe é o tempo de repor uma ficha.
+    """
+
+    def __init__(self, baldes, ip_capacidade=20, ip_por_minuto=10,
+                 login_capacidade=5, login_por_minuto=2,
+                 login_global_capacidade=30, login_global_por_minuto=30):
+        self.por_ip = TokenBucket(baldes, ip_capacidade, ip_por_minuto, falhas_livres=10)
+        self.por_login_ip = TokenBucket(baldes, login_capacidade, login_por_minuto, falhas_livres=3)
+        self.por_login = TokenBucket(baldes, login_global_capacidade, login_global_por_minuto)
+        self.recusadas = 0
+
+    @staticmethod
+    def _login(username):
+        return (username or '').strip().lower()[:150]
+
+    def _chaves(self, ip, username):
+        ip = ip or '-'
+        login = self._login(username)
+        return (
+            (self.por_ip, 'ip:' + ip),
+            (self.por_login_ip, f'login_ip:{login}|{ip}'),
+            (self.por_login, 'login:' + login),
+        )
+
+    def verificar(self, ip, username):
+        """
+        Confere todos os baldes da tentativa e só então consome as fichas
+
+        Uma tentativa recusada por um balde não gasta ficha dos outros.
+
+        Returns:
+            float: 0 se pode tentar, senão segundos para o Retry-After
+        """
+        chaves = self._chaves(ip, username)
+        espera = max(balde.espera(chave) for balde, chave in chaves)
+        if not espera:
+            for balde, chave in chaves:
+                # Outro worker pode ter gasto a última ficha entre a conferência e aqui
+                espera = max(espera, balde.consumir(chave))
+        if espera:
+            self.recusadas += 1
+        return espera
+
+    def falha(self, ip, username):
+        # Só IP e usuário+IP contam falhas: o balde por usuário não bloqueia
+        for balde, chave in self._chaves(ip, username)[:2]:
+            balde.registrar_falha(chave)
+
+    def sucesso(self, ip, username):
+        for balde, chave in self._chaves(ip, username)[:2]:
+            balde.registrar_sucesso(chave)
+
+
+def login_throttle_from_env():
+    """LoginThrottle configurado pelas variáveis LOGIN_* e RATE_LIMIT_DB"""
+    path = os.getenv('RATE_LIMIT_DB')
+    baldes = BaldesSQLite(path) if path else BaldesMemoria()
+    return LoginThrottle(
+        baldes,
+        ip_capacidade=int(os.getenv('LOGIN_IP_CAPACIDADE', 20)),
+        ip_por_minuto=float(os.getenv('LOGIN_IP_POR_MINUTO', 10)),
+        login_capacidade=int(os.getenv('LOGIN_USUARIO_CAPACIDADE', 5)),
+        login_por_minuto=float(os.getenv('LOGIN_USUARIO_POR_MINUTO', 2)),
+        login_global_capacidade=int(os.getenv('LOGIN_USUARIO_GLOBAL_CAPACIDADE', 30)),
+        login_global_por_minuto=float(os.getenv('LOGIN_USUARIO_GLOBAL_POR_MINUTO', 30)),
+    )
@@ -0,0 +1,292 @@
+"""
+Registro dos dados de referência do formulário (pasta refs/)
+
+Cada CSV de refs/ é lido em uma única passada e todas as estruturas
+derivadas (opções, mapeamento OCUPACAO -> SERVICO, lista de órgãos, índice
+CNAE, tries de autocompletar e o JSON versionado) são montadas juntas em um
+snapshot imutável. Quando o mtime de algum arquivo muda, um novo snapshot
+é montado e trocado de uma vez: as requisições nunca veem uma tabela pela
+metade e não é preciso reiniciar o processo.
+
+O JSON é servido em /ref/<versao>.json. A versão é o hash do conteúdo:
+a URL nunca muda de conteúdo e pode ser guardada pelo navegador
+indefinidamente (Cache-Control: immutable). O corpo já fica comprimido
+em gzip para não recomprimir a cada requisição.
+"""
+
+import os
+import csv
+import gzip
+import json
+import logging
+import time
+import hashlib
+import threading
+from types import MappingProxyType
+
+from autocomplete import PrefixTrie
+
+logger = logging.getLogger(__name__)
+
+
+FORMA_PAGAMENTO_OPCOES = ('Cheque', 'Dinheiro', 'Cartão', 'Transferência')
+
+# Intervalo mínimo entre duas verificações de mtime dos arquivos
+INTERVALO_VERIFICACAO = 2.0
+
+
+class PacoteReferencia:
+    """JSON imutável dos dados de referência, em texto puro e em gzip"""
+
+    def __init__(self, dados):
+        self.corpo = json.dumps(
+            dados, ensure_ascii=False, separators=(',', ':'), sort_keys=True
+        ).encode('utf-8')
+        self.versao = hashlib.sha256(self.corpo).hexdigest()[:16]
+        # mtime=0: o gzip sai idêntico entre reinícios e workers
+        self.corpo_gzip = gzip.compress(self.corpo, compresslevel=9, mtime=0)
+
+
+def normalizar_cnae(codigo):
+    """
+    Código CNAE só com dígitos ("4322-3/01" e "4322301" viram "4322301")
+
+    Returns:
+        str: 7 dígitos ou None se o código for inválido
+    """
+    digitos = ''.join(ch for ch in (codigo or '') if ch.isdigit())
+    return digitos if len(digitos) == 7 else None
+
+
+def formatar_cnae(digitos):
+    """Formata 7 dígitos no padrão de subclasse CNAE (0000-0/00)"""
+    return f"{digitos[:4]}-{digitos[4]}/{digitos[5:]}"
+
+
+def ler_servicos(csv_path):
+    """
+    Lê ServicosConsolidados.csv em uma passada
+
+    Returns:
+        tuple: (ocupações na ordem do arquivo, dict ocupação -> serviços,
+                lista de triplas (ocupação, serviço, cnae))
+    """
+    ocupacoes = {}   # ocupação -> serviços (dict como conjunto ordenado)
+    cnaes = {}       # (ocupação, serviço, cnae) sem repetidos
+    try:
+        with open(csv_path, 'r', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                ocupacao = (row.get('OCUPACAO') or '').strip()
+                if not ocupacao:
+                    continue
+                servicos = ocupacoes.setdefault(ocupacao, {})
+                servico = (row.get('SERVICO') or '').strip()
+                if servico:
+                    servicos[servico] = None
+                cnae = normalizar_cnae(row.get('CNAE'))
+                if cnae:
+                    cnaes[(ocupacao, servico, cnae)] = None
+    except FileNotFoundError:
+        logger.warning("Arquivo %s não encontrado", os.path.basename(csv_path))
+    except Exception as e:
+        logger.error("Erro ao carregar ocupações: %s", e)
+    mapping = {ocupacao: tuple(servicos) for ocupacao, servicos in ocupacoes.items() if servicos}
+    return tuple(ocupacoes), mapping, list(cnaes)
+
+
+def ler_portal(csv_path):
+    """
+    Lê PortalEmpreendedorUnificado.csv (ocupações MEI e seus CNAEs)
+
+    Returns:
+        list: Pares (ocupação, cnae) sem repetidos
+    """
+    pares = {}
+    try:
+        with open(csv_path, 'r', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                ocupacao = (row.get('Ocupacao') or '').strip()
+                cnae = normalizar_cnae(row.get('CNAE'))
+                if ocupacao and cnae:
+                    pares[(ocupacao, cnae)] = None
+    except FileNotFoundError:
+        logger.warning("Arquivo PortalEmpreendedorUnificado.csv não encontrado")
+    except Exception as e:
+        logger.error("Erro ao carregar CNAEs do Portal do Empreendedor: %s", e)
+    return list(pares)
+
+
+class IndiceCNAE:
+    """
+    Índice bidirecional CNAE <-> ocupação <-> serviço
+
+    Junta o CNAE de cada ocupação/serviço de ServicosConsolidados.csv com as
+    ocupações MEI do Portal do Empreendedor. Todas as consultas são acessos
+    diretos a dicionários montados na carga.
+    """
+
+    def __init__(self, triplas, pares_portal):
+        por_cnae = {}
+        por_ocupacao = {}
+        por_servico = {}
+
+        def entrada(cnae):
+            return por_cnae.setdefault(cnae, ({}, {}, {}))
+
+        for ocupacao, servico, cnae in triplas:
+            ocupacoes, servicos, _ = entrada(cnae)
+            ocupacoes[ocupacao] = None
+            if servico:
+                servicos[servico] = None
+                por_servico.setdefault(servico, {})[cnae] = None
+            por_ocupacao.setdefault(ocupacao, {})[cnae] = None
+        for ocupacao, cnae in pares_portal:
+            entrada(cnae)[2][ocupacao] = None
+            por_ocupacao.setdefault(ocupacao, {})[cnae] = None
+
+        self._por_cnae = {
+            cnae: MappingProxyType({
+                'cnae': formatar_cnae(cnae),
+                'ocupacoes': tuple(ocupacoes),
+                'servicos': tuple(servicos),
+                'ocupacoes_mei': tuple(ocupacoes_mei),
+            })
+            for cnae, (ocupacoes, servicos, ocupacoes_mei) in por_cnae.items()
+        }
+        self._por_ocupacao = {o: tuple(c) for o, c in por_ocupacao.items()}
+        self._por_servico = {s: tuple(c) for s, c in por_servico.items()}
+
+    def get(self, codigo):
+        """Ocupações e serviços de um CNAE (aceita com ou sem pontuação); None se desconhecido"""
+        return self._por_cnae.get(normalizar_cnae(codigo))
+
+    def cnaes_da_ocupacao(self, ocupacao):
+        """CNAEs (só dígitos) de uma ocupação"""
+        return self._por_ocupacao.get(ocupacao, ())
+
+    def cnaes_do_servico(self, servico):
+        """CNAEs (só dígitos) de um serviço"""
+        return self._por_servico.get(servico, ())
+
+    def cnae_da_vaga(self, ocupacao, servico):
+        """
+        CNAE a gravar com uma vaga: o da ocupação escolhida ou, sem ela,
+        o do serviço; formatado (0000-0/00) ou '' se não houver
+        """
+        cnaes = self.cnaes_da_ocupacao(ocupacao) or self.cnaes_do_servico(servico)
+        if ocupacao and servico:
+            # Ocupação com mais de um CNAE: prefere o que também é do serviço
+            comuns = [c for c in cnaes if c in self.cnaes_do_servico(servico)]
+            cnaes = comuns or cnaes
+        return formatar_cnae(cnaes[0]) if cnaes else ''
+
+    def __len__(self):
+        return len(self._por_cnae)
+
+
+def ler_orgaos(csv_path):
+    """Lê a coluna 'orgao' de lista_orgaos.csv, sem repetidos e em ordem alfabética"""
+    orgaos = set()
+    try:
+        with open(csv_path, 'r', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                orgao = (row.get('orgao') or '').strip()
+                if orgao:
+                    orgaos.add(orgao)
+    except FileNotFoundError:
+        logger.warning("Arquivo lista_orgaos.csv não encontrado")
+    except Exception as e:
+        logger.error("Erro ao carregar órgãos: %s", e)
+    return tuple(sorted(orgaos))
+
+
+class SnapshotReferencia:
+    """Conjunto imutável de dados de referência montado a partir de refs/"""
+
+    def __init__(self, ocupacoes, ocupacao_to_servicos, orgaos, cnae):
+        # Sem o CSV, mantém opções de teste para o formulário continuar usável
+        self.ocupacoes = ocupacoes or ('Teste 1', 'Teste 2')
+        self.ocupacoes_set = frozenset(self.ocupacoes)
+        self.ocupacao_to_servicos = MappingProxyType(ocupacao_to_servicos)
+        self.servicos_por_ocupacao = MappingProxyType({
+            ocupacao: frozenset(servicos) for ocupacao, servicos in ocupacao_to_servicos.items()
+        })
+        self.servicos = tuple(dict.fromkeys(
+            servico for servicos in ocupacao_to_servicos.values() for servico in servicos
+        ))
+        self.orgaos = orgaos
+        self.orgaos_set = frozenset(orgaos)
+        self.formas_pagamento = FORMA_PAGAMENTO_OPCOES
+        self.cnae = cnae
+        self.autocomplete = MappingProxyType({
+            'ocupacoes': PrefixTrie(self.ocupacoes),
+            'servicos': PrefixTrie(self.servicos),
+            'orgaos': PrefixTrie(self.orgaos),
+        })
+        self.pacote = PacoteReferencia({
+            'ocupacao_to_servicos': ocupacao_to_servicos,
+            'orgaos': orgaos,
+            'formas_pagamento': self.formas_pagamento,
+        })
+
+
+class RegistroReferencias:
+    """Mantém o snapshot atual dos dados de referência e o recarrega quando refs/ muda"""
+
+    def __init__(self, refs_dir, intervalo=INTERVALO_VERIFICACAO):
+        self.servicos_csv = os.path.join(refs_dir, 'ServicosConsolidados.csv')
+        self.orgaos_csv = os.path.join(refs_dir, 'lista_orgaos.csv')
+        self.portal_csv = os.path.join(refs_dir, 'PortalEmpreendedorUnificado.csv')
+        self.intervalo = intervalo
+        self._lock = threading.Lock()
+        self._proxima_verificacao = 0.0
+        self._mtimes = None
+        self._snapshot = None
+        self.recarregar()
+
+    def _ler_mtimes(self):
+        mtimes = []
+        for path in (self.servicos_csv, self.orgaos_csv, self.portal_csv):
+            try:
+                mtimes.append(os.stat(path).st_mtime_ns)
+            except OSError:
+                mtimes.append(None)
+        return tuple(mtimes)
+
+    def recarregar(self):
+        """Monta um novo snapshot a partir dos arquivos e o publica"""
+        with self._lock:
+            self._recarregar_locked(self._ler_mtimes())
+
+    def _recarregar_locked(self, mtimes):
+        ocupacoes, mapping, triplas = ler_servicos(self.servicos_csv)
+        snapshot = SnapshotReferencia(
+            ocupacoes, mapping, ler_orgaos(self.orgaos_csv),
+            IndiceCNAE(triplas, ler_portal(self.portal_csv)),
+        )
+        if self._snapshot is not None and self._ler_mtimes() != mtimes:
+            # Arquivo alterado durante a leitura (cópia em andamento): tenta de novo depois
+            return
+        # Troca atômica: leitores já em andamento continuam com o snapshot antigo
+        self._snapshot = snapshot
+        self._mtimes = mtimes
+        logger.info("Dados de referência carregados (versão %s)", snapshot.pacote.versao)
+
+    def atual(self):
+        """
+        Snapshot vigente dos dados de referência
+
+        Verifica o mtime dos arquivos no máximo a cada `intervalo` segundos.
+        """
+        agora = time.monotonic()
+        if agora >= self._proxima_verificacao:
+            self._proxima_verificacao = agora + self.intervalo
+            mtimes = self._ler_mtimes()
+            if mtimes != self._mtimes:
+                with self._lock:
+                    if mtimes != self._mtimes:
+                        try:
+                            self._recarregar_locked(mtimes)
+                        except Exception as e:
+                            logger.exception("Erro ao recarregar dados de referência: %s", e)
+        return self._snapshot
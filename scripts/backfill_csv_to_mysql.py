@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Script para importar em lote os CSVs de vagas (pasta CSV/) para o servicos_mei
+
+Lê os arquivos em ordem de nome, grava em blocos com
+DatabaseManager.insert_servicos_bulk e salva um checkpoint após cada bloco,
+então pode ser interrompido e executado de novo sem duplicar vagas
+(as que já estão no banco são reconhecidas pela coluna arquivo_csv).
+
+A data_criacao de cada vaga vem do horário no nome do arquivo
+({titulo}_{AAAAmmdd_HHMMSS}.csv) ou, sem ele, do mtime do CSV, para a
+listagem (ordenada por data_criacao) manter a ordem original.
+"""
+
+import sys
+import os
+import csv
+import time
+import argparse
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import DatabaseManager
+from vaga_store import criado_em_do_arquivo
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Mesma pasta servida pela aplicação (CSV_DIR no .env)
+CSV_DIR_PADRAO = os.getenv('CSV_DIR') or os.path.join(BASE_DIR, 'CSV')
+CHECKPOINT_PADRAO = os.path.join(BASE_DIR, 'migration', 'backfill_csv.checkpoint')
+
+CAMPOS = [
+    'orgao_demandante', 'titulo_servico', 'tipo_atividade', 'especificacao_atividade',
+    'descricao_servico', 'outras_informacoes', 'endereco', 'numero', 'bairro',
+    'forma_pagamento', 'prazo_pagamento', 'prazo_expiracao', 'data_limite_execucao'
+]
+OBRIGATORIOS = [
+    'orgao_demandante', 'titulo_servico', 'especificacao_atividade', 'descricao_servico',
+    'endereco', 'numero', 'bairro', 'forma_pagamento', 'prazo_pagamento',
+    'prazo_expiracao', 'data_limite_execucao'
+]
+
+
+def normalizar_data(valor):
+    """Aceita YYYY-MM-DD ou DD/MM/AAAA (CSVs antigos); retorna YYYY-MM-DD ou None"""
+    valor = (valor or '').strip()
+    for formato in ('%Y-%m-%d', '%d/%m/%Y'):
+        try:
+            return datetime.strptime(valor, formato).strftime('%Y-%m-%d')
+        except ValueError:
+            continue
+    return None
+
+
+def ler_registro(csv_dir, name):
+    """
+    Lê o CSV de uma vaga no formato de insert_servico
+
+    Returns:
+        dict: Registro pronto para o banco ou None se o arquivo for inválido
+    """
+    path = os.path.join(csv_dir, name)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            row = next(csv.DictReader(f), None)
+        criado = criado_em_do_arquivo(path)
+    except Exception:
+        return None
+    if not row:
+        return None
+
+    registro = {campo: (row.get(campo) or '').strip() for campo in CAMPOS}
+    for campo in ('prazo_expiracao', 'data_limite_execucao'):
+        registro[campo] = normalizar_data(registro[campo])
+    if any(not registro[campo] for campo in OBRIGATORIOS):
+        return None
+
+    registro['tipo_atividade'] = registro['tipo_atividade'] or None
+    registro['outras_informacoes'] = registro['outras_informacoes'] or None
+    registro['arquivo_csv'] = name
+    registro['data_criacao'] = criado
+    return registro
+
+
+def ler_checkpoint(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def gravar_checkpoint(path, name):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(name)
+    os.replace(tmp, path)
+
+
+def backfill(csv_dir, checkpoint_path, chunk_size, reset=False):
+    db = DatabaseManager()
+
+    ultimo = None if reset else ler_checkpoint(checkpoint_path)
+    nomes = sorted(
+        entry.name for entry in os.scandir(csv_dir)
+        if entry.is_file() and entry.name.lower().endswith('.csv')
+    )
+    if ultimo:
+        nomes = [n for n in nomes if n > ultimo]
+        print(f"↻ Retomando após {ultimo}")
+
+    total = len(nomes)
+    print(f"📂 {total} arquivo(s) a processar em {csv_dir}")
+
+    inicio = time.monotonic()
+    lidos = inseridos = invalidos = 0
+
+    for pos in range(0, total, chunk_size):
+        bloco_nomes = nomes[pos:pos + chunk_size]
+        registros = []
+        for name in bloco_nomes:
+            registro = ler_registro(csv_dir, name)
+            if registro is None:
+                invalidos += 1
+                print(f"   ⚠ Ignorado (ilegível ou incompleto): {name}")
+                continue
+            registros.append(registro)
+
+        gravados = db.insert_servicos_bulk(registros, chunk_size=chunk_size, skip_existing=True)
+        if gravados is None:
+            print(f"❌ Falha ao gravar bloco iniciado em {bloco_nomes[0]}; execute novamente para retomar")
+            return False
+
+        gravar_checkpoint(checkpoint_path, bloco_nomes[-1])
+        lidos += len(bloco_nomes)
+        inseridos += gravados
+
+        decorrido = max(time.monotonic() - inicio, 1e-9)
+        print(f"   {lidos}/{total} arquivos | {inseridos} inseridos | "
+              f"{lidos - inseridos - invalidos} já existentes | {lidos / decorrido:.0f} linhas/s")
+
+    decorrido = time.monotonic() - inicio
+    print()
+    print(f"✅ Concluído em {decorrido:.1f}s: {inseridos} inseridos, "
+          f"{lidos - inseridos - invalidos} já existentes, {invalidos} ignorados")
+    if decorrido > 0:
+        print(f"⚡ {lidos / decorrido:.0f} linhas/s")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Importa os CSVs de vagas para a tabela servicos_mei")
+    parser.add_argument('--csv-dir', default=CSV_DIR_PADRAO, help="Pasta com os CSVs (padrão: CSV_DIR do .env ou CSV/)")
+    parser.add_argument('--chunk-size', type=int, default=1000, help="Linhas por transação (padrão: 1000)")
+    parser.add_argument('--checkpoint', default=CHECKPOINT_PADRAO, help="Arquivo de checkpoint")
+    parser.add_argument('--reset', action='store_true', help="Ignora o checkpoint e recomeça do início")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("📥 BACKFILL CSV → MySQL (servicos_mei)")
+    print("=" * 60)
+
+    ok = backfill(args.csv_dir, args.checkpoint, args.chunk_size, reset=args.reset)
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,592 @@
+#!/usr/bin/env python3
+"""
+Benchmark dos caminhos principais da aplicação, sem MySQL
+
+Gera vagas sintéticas a partir dos vocabulários de refs/ (1k, 10k, 100k...),
+sobe a aplicação com um substituto em memória do DatabaseManager e mede,
+pelo test client do Flask, create_service, /vagas, /vaga/<arquivo>, /admin
+e /admin/login: primeiro em sequência e depois com várias threads
+simultâneas. Registra p50/p95/p99 e vazão em um JSON para comparar
+execuções (--comparar falha se o p95 piorar além da tolerância).
+
+Store, spool e rate limit usam uma pasta temporária; nada do ambiente
+real é tocado.
+"""
+
+import sys
+import os
+import csv
+import json
+import time
+import bisect
+import random
+import shutil
+import platform
+import argparse
+import tempfile
+import threading
+import statistics
+import subprocess
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REFS_DIR = os.path.join(BASE_DIR, 'refs')
+
+BAIRROS = [
+    'Centro', 'Tijuca', 'Méier', 'Botafogo', 'Copacabana', 'Campo Grande', 'Bangu',
+    'Madureira', 'Barra da Tijuca', 'Jacarepaguá', 'Santa Cruz', 'Ilha do Governador',
+    'São Cristóvão', 'Penha', 'Realengo', 'Lapa', 'Flamengo', 'Vila Isabel',
+]
+
+CENARIOS = ('create_service', 'vagas', 'vagas_pagina_2', 'vaga', 'admin', 'admin_login')
+
+# Colunas devolvidas pelas listagens (LISTAGEM_COLUNAS de database.py)
+COLUNAS_LISTAGEM = (
+    'id', 'titulo_servico', 'tipo_atividade', 'bairro', 'prazo_expiracao', 'arquivo', 'data_criacao', 'ativo',
+)
+
+BENCH_LOGIN = 'benchmark'
+BENCH_SENHA = 'benchmark-senha'
+
+
+class FakePool:
+    """Pool de mentira: nada a abrir"""
+
+    def prefill(self):
+        pass
+
+    def stats(self):
+        return {'substituto': True}
+
+
+class FakeDatabaseManager:
+    """
+    Substituto em memória do DatabaseManager (mesma interface pública)
+
+    As listagens seguem a mesma ordenação e o mesmo cursor do list_servicos
+    real; --db-latencia-ms soma um atraso por consulta para simular a ida
+    ao MySQL. verificar_interface() compara os métodos com os do
+    DatabaseManager antes de cada execução.
+    """
+
+    latencia = 0.0
+
+    def __init__(self):
+        from passwords import hash_password
+        self.pool = FakePool()
+        self._lock = threading.Lock()
+        self._chaves = []   # (data_criacao, id) crescente
+        self._linhas = {}   # id -> serviço completo (com arquivo, ativo e data_criacao)
+        self._arquivos = set()
+        self._proximo_id = 1
+        self._atualizado_em = None
+        self._usuarios = {BENCH_LOGIN: {'id': 1, 'login': BENCH_LOGIN, 'senha': hash_password(BENCH_SENHA)}}
+
+    def _esperar(self):
+        if self.latencia:
+            time.sleep(self.latencia)
+
+    def get_connection(self):
+        raise RuntimeError("Substituto em memória: não há conexões MySQL")
+
+    def pool_stats(self):
+        return self.pool.stats()
+
+    def authenticate_user(self, login, password):
+        from passwords import verificador
+        self._esperar()
+        user = self._usuarios.get(login)
+        if user and verificador.verify(password, user['senha']):
+            return {'id': user['id'], 'login': user['login']}
+        return None
+
+    def update_user_password_hash(self, login, new_password):
+        from passwords import hash_password
+        self._esperar()
+        user = self._usuarios.get(login)
+        if user is None:
+            return False
+        user['senha'] = hash_password(new_password)
+        return True
+
+    def list_users(self):
+        self._esperar()
+        return [{'id': u['id'], 'login': u['login']} for _, u in sorted(self._usuarios.items())]
+
+    def insert_servico(self, data):
+        from database import COLUNAS_SERVICO
+        self._esperar()
+        with self._lock:
+            servico_id = self._proximo_id
+            self._proximo_id += 1
+            data_criacao = data.get('data_criacao') or datetime.now()
+            if isinstance(data_criacao, str):
+                data_criacao = datetime.fromisoformat(data_criacao)
+            linha = {campo: data.get(campo) for campo in COLUNAS_SERVICO if campo != 'arquivo_csv'}
+            linha.update({
+                'id': servico_id,
+                'arquivo': data.get('arquivo_csv'),
+                'data_criacao': data_criacao,
+                'ativo': True,
+            })
+            self._linhas[servico_id] = linha
+            bisect.insort(self._chaves, (data_criacao, servico_id))
+            if data.get('arquivo_csv'):
+                self._arquivos.add(data['arquivo_csv'])
+            self._atualizado_em = datetime.now()
+            return servico_id
+
+    def insert_servicos_bulk(self, records, chunk_size=500, skip_existing=True, raise_errors=False):
+        inseridos = 0
+        for record in records:
+            if skip_existing and record.get('arquivo_csv') in self._arquivos:
+                continue
+            self.insert_servico(record)
+            inseridos += 1
+        return inseridos
+
+    def is_data_error(self, exc):
+        from database import erro_de_dados
+        return erro_de_dados(exc)
+
+    def _desativar_locked(self, linhas):
+        total = 0
+        for linha in linhas:
+            if linha['ativo']:
+                linha['ativo'] = False
+                total += 1
+        if total:
+            self._atualizado_em = datetime.now()
+        return total
+
+    def expire_servicos(self, hoje, batch_size=500):
+        self._esperar()
+        with self._lock:
+            return self._desativar_locked(
+                linha for linha in self._linhas.values()
+                if linha['prazo_expiracao'] and linha['prazo_expiracao'] < hoje
+            )
+
+    def deactivate_servicos(self, arquivos_csv, chunk_size=500):
+        self._esperar()
+        nomes = set(a for a in arquivos_csv if a)
+        with self._lock:
+            return self._desativar_locked(
+                linha for linha in self._linhas.values() if linha['arquivo'] in nomes
+            )
+
+    def export_servicos(self, colunas, filtros=None, chunk_size=1000):
+        self._esperar()
+        filtros = filtros or {}
+        with self._lock:
+            linhas = [dict(self._linhas[i]) for i in sorted(self._linhas)]
+
+        def aceita(linha):
+            if filtros.get('ativo') is not None and linha['ativo'] != bool(filtros['ativo']):
+                return False
+            for campo in ('orgao_demandante', 'bairro'):
+                if filtros.get(campo) and linha[campo] != filtros[campo]:
+                    return False
+            dia = linha['data_criacao'].date().isoformat()
+            if filtros.get('criado_desde') and dia < filtros['criado_desde']:
+                return False
+            if filtros.get('criado_ate') and dia > filtros['criado_ate']:
+                return False
+            return True
+
+        return ({c: linha.get(c) for c in colunas} for linha in linhas if aceita(linha))
+
+    def list_servicos_expirando(self, desde, ate, limit=50):
+        from database import MAX_PAGE_SIZE
+        self._esperar()
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        with self._lock:
+            linhas = [
+                self._listagem(linha) for linha in self._linhas.values()
+                if linha['ativo'] and linha['prazo_expiracao']
+                and desde <= linha['prazo_expiracao'] <= ate
+            ]
+        linhas.sort(key=lambda linha: (linha['prazo_expiracao'], linha['id']))
+        return linhas[:limit]
+
+    @staticmethod
+    def _listagem(linha):
+        return {coluna: linha[coluna] for coluna in COLUNAS_LISTAGEM}
+
+    def list_servicos(self, limit=50, cursor=None, apenas_ativos=True):
+        from database import MAX_PAGE_SIZE, encode_cursor, decode_cursor
+        self._esperar()
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        with self._lock:
+            posicao = decode_cursor(cursor) if cursor else None
+            fim = bisect.bisect_left(self._chaves, posicao) if posicao else len(self._chaves)
+            rows = []
+            while fim > 0 and len(rows) <= limit:
+                fim -= 1
+                linha = self._linhas[self._chaves[fim][1]]
+                if apenas_ativos and not linha['ativo']:
+                    continue
+                rows.append(self._listagem(linha))
+        proximo = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            proximo = encode_cursor(rows[-1]['data_criacao'], rows[-1]['id'])
+        return rows, proximo
+
+    def get_servico(self, servico_id):
+        self._esperar()
+        with self._lock:
+            linha = self._linhas.get(servico_id)
+            return dict(linha) if linha else None
+
+    def watermark_servicos(self):
+        self._esperar()
+        with self._lock:
+            return len(self._linhas), max(self._linhas, default=None), self._atualizado_em
+
+    def count_servicos_com_arquivo(self, apenas_ativos=True):
+        self._esperar()
+        with self._lock:
+            return sum(
+                1 for linha in self._linhas.values()
+                if linha['arquivo'] and (linha['ativo'] or not apenas_ativos)
+            )
+
+
+def verificar_interface():
+    """Interrompe o benchmark se o substituto divergir dos métodos públicos do DatabaseManager"""
+    import inspect
+    from database import DatabaseManager
+    divergencias = []
+    for nome, metodo in inspect.getmembers(DatabaseManager, inspect.isfunction):
+        if nome.startswith('_'):
+            continue
+        substituto = getattr(FakeDatabaseManager, nome, None)
+        if substituto is None:
+            divergencias.append(f"{nome}: ausente")
+        elif inspect.signature(substituto) != inspect.signature(metodo):
+            divergencias.append(
+                f"{nome}{inspect.signature(substituto)} != {nome}{inspect.signature(metodo)}"
+            )
+    if divergencias:
+        raise SystemExit(
+            "❌ FakeDatabaseManager diverge do DatabaseManager:\n  " + "\n  ".join(divergencias)
+        )
+
+
+def carregar_vocabulario():
+    """Ocupações, serviços e órgãos de refs/ para montar vagas verossímeis"""
+    pares = []
+    with open(os.path.join(REFS_DIR, 'ServicosConsolidados.csv'), 'r', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            if row.get('OCUPACAO') and row.get('SERVICO'):
+                pares.append((row['OCUPACAO'].strip(), row['SERVICO'].strip()))
+    with open(os.path.join(REFS_DIR, 'lista_orgaos.csv'), 'r', encoding='utf-8') as f:
+        orgaos = [row['orgao'].strip() for row in csv.DictReader(f) if row.get('orgao')]
+    return pares, orgaos
+
+
+def vaga_sintetica(rng, pares, orgaos):
+    ocupacao, servico = rng.choice(pares)
+    bairro = rng.choice(BAIRROS)
+    prazo = datetime.now().date() + timedelta(days=rng.randint(1, 120))
+    return {
+        'orgao_demandante': rng.choice(orgaos),
+        'titulo_servico': servico.title(),
+        'tipo_atividade': ocupacao,
+        'especificacao_atividade': servico,
+        'descricao_servico': f"{servico.capitalize()} para o órgão, no bairro {bairro}. "
+                             f"Profissional: {ocupacao.lower()}.",
+        'outras_informacoes': '',
+        'endereco': f"Rua {rng.choice(BAIRROS)}",
+        'numero': str(rng.randint(1, 2000)),
+        'bairro': bairro,
+        'forma_pagamento': rng.choice(['Cheque', 'Dinheiro', 'Cartão', 'Transferência']),
+        'prazo_pagamento': f"{rng.choice([15, 30, 45, 60])} dias",
+        'prazo_expiracao': prazo.isoformat(),
+        'data_limite_execucao': (prazo + timedelta(days=30)).isoformat(),
+    }
+
+
+def preparar_ambiente(tmpdir):
+    """Variáveis de ambiente lidas na importação de app.py"""
+    os.environ['VAGA_STORE_PATH'] = os.path.join(tmpdir, 'vagas.sqlite3')
+    os.environ['SPOOL_DIR'] = os.path.join(tmpdir, 'spool')
+    os.environ['RATE_LIMIT_DB'] = ''
+    # Nada de CSV/ nem data/ no checkout: PDFs e CSVs também ficam na pasta temporária
+    os.environ['PDF_CACHE_DIR'] = os.path.join(tmpdir, 'pdf')
+    os.environ['CSV_DIR'] = os.path.join(tmpdir, 'csv')
+    os.environ['CSV_EXCLUIDOS_DIR'] = os.path.join(tmpdir, 'csv_excluidos')
+    # O benchmark mede o login, não o limite de tentativas
+    os.environ['LOGIN_IP_CAPACIDADE'] = '1000000000'
+    os.environ['LOGIN_IP_POR_MINUTO'] = '1000000000'
+    os.environ['LOGIN_USUARIO_CAPACIDADE'] = '1000000000'
+    os.environ['LOGIN_USUARIO_POR_MINUTO'] = '1000000000'
+    os.environ['LOGIN_USUARIO_GLOBAL_CAPACIDADE'] = '1000000000'
+    os.environ['LOGIN_USUARIO_GLOBAL_POR_MINUTO'] = '1000000000'
+    os.environ['BCRYPT_MAX_PENDENTES'] = '1000'
+    # Sem varredura de expiração concorrendo com as medições
+    os.environ['EXPIRACAO_INTERVALO'] = '0'
+    # Só avisos e erros: o log por requisição poluiria a saída do benchmark
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    # A app importa o DatabaseManager de database: troca pelo substituto antes
+    verificar_interface()
+    import database
+    database.DatabaseManager = FakeDatabaseManager
+
+
+def popular(app_module, db, quantidade, rng, pares, orgaos):
+    """Acrescenta vagas sintéticas ao store e ao banco substituto"""
+    inicio = datetime.now() - timedelta(days=365)
+    base = db._proximo_id
+    registros = []
+    for i in range(quantidade):
+        data = vaga_sintetica(rng, pares, orgaos)
+        criado = inicio + timedelta(seconds=(base + i) * 30)
+        nome = f"bench_{base + i:07d}.csv"
+        data['cnae'] = ''
+        registros.append((nome, data, criado.isoformat(timespec='seconds')))
+        db.insert_servico(dict(data, arquivo_csv=nome, data_criacao=criado))
+        if len(registros) >= 5000:
+            app_module.vaga_store.insert_many(registros)
+            registros = []
+    if registros:
+        app_module.vaga_store.insert_many(registros)
+    app_module.vaga_index.rebuild()
+    app_module.busca_vagas.rebuild()
+    app_module.vaga_cache.clear()
+    app_module.pagina_cache.clear()
+
+
+def percentis(tempos_ms):
+    ordenados = sorted(tempos_ms)
+
+    def p(q):
+        if not ordenados:
+            return None
+        pos = min(len(ordenados) - 1, max(0, int(round(q / 100 * len(ordenados))) - 1))
+        return round(ordenados[pos], 3)
+
+    return {
+        'n': len(ordenados),
+        'p50': p(50),
+        'p95': p(95),
+        'p99': p(99),
+        'media': round(statistics.fmean(ordenados), 3) if ordenados else None,
+        'max': round(ordenados[-1], 3) if ordenados else None,
+    }
+
+
+class Cenarios:
+    """Monta as requisições de cada cenário (um test client por thread)"""
+
+    def __init__(self, app_module, rng, pares, orgaos):
+        self.app = app_module.app
+        self.app_module = app_module
+        self.rng = rng
+        self.pares = pares
+        self.orgaos = orgaos
+        self._local = threading.local()
+        self._arquivos = [v['arquivo'] for v in app_module.vaga_index.list()]
+        self._cursor_2 = app_module.db_manager.list_servicos(limit=app_module.VAGAS_PAGE_SIZE)[1]
+        self._rng_lock = threading.Lock()
+
+    def _client(self):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self.app.test_client()
+            with client.session_transaction() as sess:
+                sess['logged_in'] = True
+                sess['user_id'] = 1
+                sess['username'] = BENCH_LOGIN
+            self._local.client = client
+        return client
+
+    def executar(self, cenario):
+        """Executa uma requisição do cenário; retorna o status HTTP"""
+        client = self._client()
+        if cenario == 'create_service':
+            with self._rng_lock:
+                data = vaga_sintetica(self.rng, self.pares, self.orgaos)
+            return client.post('/create_service', data=data).status_code
+        if cenario == 'vagas':
+            return client.get('/vagas').status_code
+        if cenario == 'vagas_pagina_2':
+            return client.get('/vagas', query_string={'cursor': self._cursor_2}).status_code
+        if cenario == 'vaga':
+            with self._rng_lock:
+                arquivo = self.rng.choice(self._arquivos)
+            return client.get(f'/vaga/{arquivo}').status_code
+        if cenario == 'admin':
+            return client.get('/admin').status_code
+        if cenario == 'admin_login':
+            return client.post('/admin/login', data={'username': BENCH_LOGIN, 'password': BENCH_SENHA}).status_code
+        raise ValueError(cenario)
+
+
+def medir_sequencial(cenarios, cenario, n):
+    tempos = []
+    erros = 0
+    inicio = time.perf_counter()
+    for _ in range(n):
+        t0 = time.perf_counter()
+        status = cenarios.executar(cenario)
+        tempos.append((time.perf_counter() - t0) * 1000)
+        if status >= 400:
+            erros += 1
+    total = time.perf_counter() - inicio
+    resultado = percentis(tempos)
+    resultado.update({'erros': erros, 'rps': round(n / total, 1)})
+    return resultado
+
+
+def medir_concorrente(cenarios, cenario, n, threads):
+    tempos = []
+    erros = [0]
+    lock = threading.Lock()
+
+    def uma(_):
+        t0 = time.perf_counter()
+        status = cenarios.executar(cenario)
+        ms = (time.perf_counter() - t0) * 1000
+        with lock:
+            tempos.append(ms)
+            if status >= 400:
+                erros[0] += 1
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(uma, range(n)))
+    total = time.perf_counter() - inicio
+    resultado = percentis(tempos)
+    resultado.update({'erros': erros[0], 'rps': round(n / total, 1), 'threads': threads})
+    return resultado
+
+
+def commit_atual():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR,
+            capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def comparar(atual, base_path, tolerancia):
+    """Compara o p95 com uma execução anterior; retorna a lista de regressões"""
+    with open(base_path, 'r', encoding='utf-8') as f:
+        base = json.load(f)
+    regressoes = []
+    for tamanho, cenarios in atual['resultados'].items():
+        for cenario, modos in cenarios.items():
+            for modo, r in modos.items():
+                anterior = base.get('resultados', {}).get(tamanho, {}).get(cenario, {}).get(modo)
+                if not anterior or not anterior.get('p95') or not r.get('p95'):
+                    continue
+                razao = r['p95'] / anterior['p95']
+                marca = '⚠' if razao > 1 + tolerancia else ' '
+                print(f"   {marca} {tamanho:>7} {cenario:<15} {modo:<11} "
+                      f"p95 {anterior['p95']:8.2f} -> {r['p95']:8.2f} ms ({razao:5.2f}x)")
+                if razao > 1 + tolerancia:
+                    regressoes.append((tamanho, cenario, modo, razao))
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dos caminhos principais (sem MySQL)")
+    parser.add_argument('--tamanhos', default='1000,10000',
+                        help="Quantidades de vagas, separadas por vírgula (ex.: 1000,10000,100000)")
+    parser.add_argument('--requisicoes', type=int, default=200, help="Requisições por cenário e modo")
+    parser.add_argument('--logins', type=int, default=20, help="Requisições do cenário admin_login (bcrypt)")
+    parser.add_argument('--threads', type=int, default=8, help="Threads do modo concorrente")
+    parser.add_argument('--cenarios', default=','.join(CENARIOS), help="Cenários a executar")
+    parser.add_argument('--db-latencia-ms', type=float, default=0.0,
+                        help="Atraso simulado por consulta ao banco")
+    parser.add_argument('--saida', default='benchmark_resultados.json', help="Arquivo JSON de resultados")
+    parser.add_argument('--comparar', default=None, help="JSON de uma execução anterior para comparar")
+    parser.add_argument('--tolerancia', type=float, default=0.2,
+                        help="Piora de p95 aceita na comparação (0.2 = 20%%)")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    tamanhos = sorted(int(t) for t in args.tamanhos.split(',') if t.strip())
+    cenarios_escolhidos = [c for c in args.cenarios.split(',') if c]
+    for c in cenarios_escolhidos:
+        if c not in CENARIOS:
+            parser.error(f"cenário desconhecido: {c}")
+
+    print("=" * 60)
+    print("📈 BENCHMARK - Portal Empreendedor (banco em memória)")
+    print("=" * 60)
+
+    tmpdir = tempfile.mkdtemp(prefix='webmei-bench-')
+    preparar_ambiente(tmpdir)
+    FakeDatabaseManager.latencia = args.db_latencia_ms / 1000
+
+    import app as app_module
+    app_module.app.config['WTF_CSRF_ENABLED'] = False
+    app_module.app.config['TESTING'] = True
+
+    rng = random.Random(args.seed)
+    pares, orgaos = carregar_vocabulario()
+    db = app_module.db_manager
+
+    resultado = {
+        'meta': {
+            'data': datetime.now().isoformat(timespec='seconds'),
+            'commit': commit_atual(),
+            'python': platform.python_version(),
+            'plataforma': platform.platform(),
+            'cpus': os.cpu_count(),
+            'requisicoes': args.requisicoes,
+            'threads': args.threads,
+            'db_latencia_ms': args.db_latencia_ms,
+        },
+        'resultados': {},
+    }
+
+    try:
+        atual = 0
+        for tamanho in tamanhos:
+            print(f"\n📦 Populando até {tamanho} vagas...")
+            t0 = time.perf_counter()
+            popular(app_module, db, max(0, tamanho - atual), rng, pares, orgaos)
+            atual = max(atual, tamanho)
+            print(f"   ok em {time.perf_counter() - t0:.1f}s")
+
+            cenarios = Cenarios(app_module, rng, pares, orgaos)
+            por_cenario = {}
+            for cenario in cenarios_escolhidos:
+                n = args.logins if cenario == 'admin_login' else args.requisicoes
+                # Aquecimento (templates compilados, caches, conexões)
+                for _ in range(min(5, n)):
+                    cenarios.executar(cenario)
+                seq = medir_sequencial(cenarios, cenario, n)
+                conc = medir_concorrente(cenarios, cenario, n, args.threads)
+                por_cenario[cenario] = {'sequencial': seq, 'concorrente': conc}
+                print(f"   {cenario:<15} p50 {seq['p50']:8.2f} p95 {seq['p95']:8.2f} "
+                      f"p99 {seq['p99']:8.2f} ms | {seq['rps']:8.1f} req/s | "
+                      f"{args.threads} threads: p95 {conc['p95']:8.2f} ms, {conc['rps']:8.1f} req/s"
+                      + (f" | ⚠ {seq['erros'] + conc['erros']} erro(s)" if seq['erros'] + conc['erros'] else ''))
+            resultado['resultados'][str(tamanho)] = por_cenario
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+    with open(args.saida, 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 Resultados gravados em {args.saida}")
+
+    if args.comparar:
+        print(f"\n🔍 Comparando com {args.comparar} (tolerância {args.tolerancia:.0%})")
+        regressoes = comparar(resultado, args.comparar, args.tolerancia)
+        if regressoes:
+            print(f"\n❌ {len(regressoes)} regressão(ões) de p95")
+            sys.exit(1)
+        print("\n✅ Nenhuma regressão de p95")
+
+
+if __name__ == "__main__":
+    main()
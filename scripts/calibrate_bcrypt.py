@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Script para calibrar o custo do bcrypt (BCRYPT_ROUNDS) neste servidor
+
+Mede o tempo de bcrypt.checkpw para cada custo e escolhe o maior custo
+cuja verificação fica dentro da latência alvo (padrão: 150 ms). Com o
+custo novo no .env, as senhas são regravadas com ele no próximo login de
+cada usuário (authenticate_user faz o rehash automaticamente).
+"""
+
+import sys
+import os
+import re
+import time
+import argparse
+import statistics
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bcrypt as bcrypt_lib
+from passwords import BCRYPT_ROUNDS
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def medir(rounds, amostras):
+    """Mediana, em ms, de bcrypt.checkpw com o custo informado"""
+    senha = b'calibracao-bcrypt'
+    hashed = bcrypt_lib.hashpw(senha, bcrypt_lib.gensalt(rounds=rounds))
+    tempos = []
+    for _ in range(amostras):
+        inicio = time.perf_counter()
+        bcrypt_lib.checkpw(senha, hashed)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tempos)
+
+
+def calibrar(alvo_ms, min_rounds, max_rounds, amostras):
+    escolhido = min_rounds
+    for rounds in range(min_rounds, max_rounds + 1):
+        ms = medir(rounds, amostras)
+        dentro = ms <= alvo_ms
+        print(f"   custo {rounds:2d}: {ms:8.1f} ms {'✅' if dentro else '❌'}")
+        if not dentro:
+            break
+        escolhido = rounds
+    return escolhido
+
+
+def gravar_env(env_path, rounds):
+    """Grava (ou substitui) BCRYPT_ROUNDS no arquivo .env"""
+    linhas = []
+    if os.path.exists(env_path):
+        with open(env_path, 'r', encoding='utf-8') as f:
+            linhas = f.read().splitlines()
+    nova = f"BCRYPT_ROUNDS={rounds}"
+    for i, linha in enumerate(linhas):
+        if re.match(r'\s*BCRYPT_ROUNDS\s*=', linha):
+            linhas[i] = nova
+            break
+    else:
+        linhas.append(nova)
+    with open(env_path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(linhas) + '\n')
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Calibra o custo do bcrypt para este servidor")
+    parser.add_argument('--alvo-ms', type=float, default=150, help="Latência alvo de uma verificação (ms)")
+    parser.add_argument('--min-rounds', type=int, default=10, help="Menor custo aceito")
+    parser.add_argument('--max-rounds', type=int, default=16, help="Maior custo testado")
+    parser.add_argument('--amostras', type=int, default=5, help="Verificações medidas por custo")
+    parser.add_argument('--gravar-env', action='store_true', help="Grava BCRYPT_ROUNDS no .env")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("🔐 CALIBRAÇÃO DO CUSTO BCRYPT")
+    print("=" * 60)
+    print(f"🎯 Alvo: {args.alvo_ms:.0f} ms por verificação")
+    print(f"⚙️  Custo atual (BCRYPT_ROUNDS): {BCRYPT_ROUNDS}")
+    print()
+
+    rounds = calibrar(args.alvo_ms, args.min_rounds, args.max_rounds, args.amostras)
+
+    print()
+    print(f"✅ Custo recomendado: BCRYPT_ROUNDS={rounds}")
+    if args.gravar_env:
+        env_path = os.path.join(BASE_DIR, '.env')
+        gravar_env(env_path, rounds)
+        print(f"💾 Gravado em {env_path} (reinicie a aplicação)")
+    else:
+        print("   Adicione ao .env ou rode novamente com --gravar-env")
+    if rounds != BCRYPT_ROUNDS:
+        print("🔄 As senhas serão regravadas com o novo custo no próximo login de cada usuário")
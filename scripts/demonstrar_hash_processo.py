@@ -9,6 +9,7 @@ sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
 from database import DatabaseManager
 import bcrypt as bcrypt_lib
+from passwords import BCRYPT_ROUNDS
 
 def demonstrar_processo():
     print("🔬 Demonstração: Como Suas Senhas Foram Processadas")
@@ -79,7 +80,7 @@ def demonstrar_criacao_hash():
     print(f"\n🎲 Gerando 3 hashes da MESMA senha:")
     
     for i in range(1, 4):
-        salt = bcrypt_lib.gensalt()
+        salt = bcrypt_lib.gensalt(rounds=BCRYPT_ROUNDS)
         hash_gerado = bcrypt_lib.hashpw(senha_exemplo.encode('utf-8'), salt)
         hash_string = hash_gerado.decode('utf-8')
         
@@ -99,7 +100,7 @@ def demonstrar_processo_login():
     
     # Simular hash armazenado
     senha_real = "admin123"
-    hash_armazenado = bcrypt_lib.hashpw(senha_real.encode('utf-8'), bcrypt_lib.gensalt()).decode('utf-8')
+    hash_armazenado = bcrypt_lib.hashpw(senha_real.encode('utf-8'), bcrypt_lib.gensalt(rounds=BCRYPT_ROUNDS)).decode('utf-8')
     
     print(f"💾 Hash armazenado no banco: {hash_armazenado[:50]}...")
     
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Script para desativar as vagas vencidas (prazo_expiracao anterior a hoje)
+
+Faz a mesma varredura da thread de expiração da aplicação: marca as vagas
+como inativas no store local e no servicos_mei (ativo = FALSE), em lotes.
+Útil como tarefa agendada (ex.: Scheduled Tasks do PythonAnywhere, logo
+após a meia-noite) quando a aplicação roda com EXPIRACAO_INTERVALO=0.
+Pode ser repetido: vagas já desativadas são ignoradas.
+"""
+
+import sys
+import os
+import argparse
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+from vaga_store import VagaStore
+from database import DatabaseManager
+from expiracao import ExpiracaoVagas
+
+load_dotenv()
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STORE_PADRAO = os.getenv('VAGA_STORE_PATH') or os.path.join(BASE_DIR, 'data', 'vagas.sqlite3')
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Desativa as vagas com prazo de expiração vencido")
+    parser.add_argument('--store', default=STORE_PADRAO, help="Arquivo SQLite das vagas")
+    parser.add_argument('--data', default=None, help="Data de corte YYYY-MM-DD (padrão: hoje)")
+    parser.add_argument('--lote', type=int, default=int(os.getenv('EXPIRACAO_LOTE', 500)),
+                        help="Vagas por lote/transação")
+    parser.add_argument('--sem-banco', action='store_true', help="Só o store local, sem MySQL")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("⏰ EXPIRAÇÃO DAS VAGAS VENCIDAS")
+    print("=" * 60)
+    print(f"🗄️  Store: {args.store}")
+
+    expiracao = ExpiracaoVagas(
+        VagaStore(args.store),
+        None if args.sem_banco else DatabaseManager(),
+        batch_size=args.lote,
+    )
+    no_store, no_banco = expiracao.run_once(args.data)
+
+    print(f"✅ Store: {no_store} vaga(s) desativada(s)")
+    if args.sem_banco:
+        print("⏭️  Banco ignorado (--sem-banco)")
+    elif no_banco is None:
+        print("❌ Banco: falha ao desativar os serviços (veja o erro acima)")
+        sys.exit(1)
+    else:
+        print(f"✅ Banco: {no_banco} serviço(s) desativado(s)")
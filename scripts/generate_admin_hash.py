@@ -7,6 +7,10 @@ import bcrypt
 import getpass
 from dotenv import load_dotenv
 import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from passwords import BCRYPT_ROUNDS
 
 def generate_password_hash():
     load_dotenv()
@@ -32,7 +36,7 @@ def generate_password_hash():
         password = current_password
     
     # Gera o hash
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
     hash_string = hashed.decode('utf-8')
     
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Script para migrar os CSVs de vagas (um arquivo por vaga em CSV/) para o
+armazenamento único em SQLite usado pela aplicação (data/vagas.sqlite3)
+
+Os nomes de arquivo são mantidos como identificador das vagas, então links
+antigos (/vaga/<arquivo> e /download/<arquivo>) continuam funcionando.
+Vagas que já estão no store são ignoradas; o script pode ser repetido.
+"""
+
+import sys
+import os
+import csv
+import time
+import argparse
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+from vaga_store import VagaStore, CAMPOS_VAGA, criado_em_do_arquivo
+
+load_dotenv()
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Mesma pasta servida pela aplicação (CSV_DIR no .env)
+CSV_DIR_PADRAO = os.getenv('CSV_DIR') or os.path.join(BASE_DIR, 'CSV')
+STORE_PADRAO = os.getenv('VAGA_STORE_PATH') or os.path.join(BASE_DIR, 'data', 'vagas.sqlite3')
+
+
+def ler_vaga(path):
+    """Lê a primeira linha do CSV de uma vaga; None se ilegível"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            row = next(csv.DictReader(f), None)
+    except Exception:
+        return None
+    if not row:
+        return None
+    return {campo: (row.get(campo) or '').strip() for campo in CAMPOS_VAGA}
+
+
+def migrar(csv_dir, store_path, chunk_size, arquivar_em=None):
+    store = VagaStore(store_path)
+    nomes = sorted(
+        entry.name for entry in os.scandir(csv_dir)
+        if entry.is_file() and entry.name.lower().endswith('.csv')
+    )
+    total = len(nomes)
+    print(f"📂 {total} arquivo(s) em {csv_dir}")
+    print(f"🗄️  Destino: {store_path}")
+
+    if arquivar_em:
+        os.makedirs(arquivar_em, exist_ok=True)
+
+    inicio = time.monotonic()
+    novos = invalidos = 0
+
+    for pos in range(0, total, chunk_size):
+        bloco = []
+        for name in nomes[pos:pos + chunk_size]:
+            path = os.path.join(csv_dir, name)
+            data = ler_vaga(path)
+            if data is None:
+                invalidos += 1
+                print(f"   ⚠ Ignorado (ilegível): {name}")
+                continue
+            # Mesma data de criação que o backfill grava no servicos_mei
+            bloco.append((name, data, criado_em_do_arquivo(path).isoformat()))
+
+        novos += store.insert_many(bloco)
+
+        # Só arquiva depois que o bloco foi gravado no store
+        if arquivar_em:
+            for name, _, _ in bloco:
+                os.replace(os.path.join(csv_dir, name), os.path.join(arquivar_em, name))
+
+        feitos = min(pos + chunk_size, total)
+        decorrido = max(time.monotonic() - inicio, 1e-9)
+        print(f"   {feitos}/{total} arquivos | {novos} novos | {feitos / decorrido:.0f} arquivos/s")
+
+    print()
+    print(f"✅ {novos} vaga(s) migrada(s), {total - novos - invalidos} já existente(s), "
+          f"{invalidos} ignorada(s)")
+    print(f"📊 Total no store: {store.count()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migra os CSVs de vagas para o store SQLite")
+    parser.add_argument('--csv-dir', default=CSV_DIR_PADRAO, help="Pasta com os CSVs (padrão: CSV_DIR do .env ou CSV/)")
+    parser.add_argument('--store', default=STORE_PADRAO, help="Arquivo SQLite de destino")
+    parser.add_argument('--chunk-size', type=int, default=1000, help="Vagas por transação")
+    parser.add_argument('--arquivar-em', default=None,
+                        help="Move os CSVs migrados para esta pasta (padrão: mantém em CSV/)")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("📦 MIGRAÇÃO CSV/ → STORE DE VAGAS (SQLite)")
+    print("=" * 60)
+
+    migrar(args.csv_dir, args.store, args.chunk_size, arquivar_em=args.arquivar_em)
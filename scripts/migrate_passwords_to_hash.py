@@ -10,6 +10,7 @@ sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
 from database import DatabaseManager
 import bcrypt as bcrypt_lib
+from passwords import BCRYPT_ROUNDS
 
 def show_current_passwords():
     """Mostra o estado atual das senhas (sem expor valores)"""
@@ -50,7 +51,7 @@ def migrate_user_password(user_id, login, current_password):
     print(f"\n🔄 Migrando senha do usuário: {login}")
     
     # Gera hash bcrypt
-    salt = bcrypt_lib.gensalt()
+    salt = bcrypt_lib.gensalt(rounds=BCRYPT_ROUNDS)
     hashed = bcrypt_lib.hashpw(current_password.encode('utf-8'), salt)
     hash_string = hashed.decode('utf-8')
     
@@ -9,6 +9,7 @@ sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
 from database import DatabaseManager
 import bcrypt as bcrypt_lib
+from passwords import BCRYPT_ROUNDS
 
 def quick_migration():
     """Migração rápida das senhas conhecidas"""
@@ -52,7 +53,7 @@ def quick_migration():
                         print(f"   🔄 Convertendo senha para hash...")
                         
                         # Gera hash
-                        salt = bcrypt_lib.gensalt()
+                        salt = bcrypt_lib.gensalt(rounds=BCRYPT_ROUNDS)
                         hashed = bcrypt_lib.hashpw(expected_password.encode('utf-8'), salt)
                         hash_string = hashed.decode('utf-8')
                         
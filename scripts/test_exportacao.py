@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Script para testar a exportação das vagas em XLSX e CSV
+
+Gera os arquivos a partir de linhas em memória (sem MySQL) e confere o
+resultado: o XLSX é aberto como ZIP e a aba lida como XML, como faria
+uma planilha; o CSV é relido com o módulo csv.
+"""
+
+import io
+import os
+import sys
+import csv
+import zipfile
+import xml.etree.ElementTree as ET
+from datetime import datetime
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BASE_DIR)
+
+from exportacao import gerar_csv, gerar_xlsx, COLUNAS_EXPORT, LINHAS_POR_BLOCO  # noqa: E402
+
+NS = {'s': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'}
+TOTAL_LINHAS = LINHAS_POR_BLOCO * 2 + 7  # mais de um bloco, com resto
+
+
+def linha(i):
+    return {
+        'arquivo': f'servico_{i:04d}.csv',
+        'titulo_servico': f'Pintura & reparos <{i}>',
+        'descricao_servico': 'Texto com controle\x01 e\nquebra de linha',
+        'bairro': '=HYPERLINK("http://exemplo")' if i == 1 else 'Centro',
+        'ativo': i % 2,  # MySQL/SQLite entregam 0/1
+        'data_criacao': datetime(2025, 11, 7, 10, 30, i % 60),
+    }
+
+
+class Linhas:
+    """Iterável de linhas que conta quantas já foram lidas"""
+
+    def __init__(self, total):
+        self.total = total
+        self.lidas = 0
+
+    def __iter__(self):
+        for i in range(self.total):
+            self.lidas += 1
+            yield linha(i)
+
+
+def celulas(row):
+    """Texto das células de uma <row>, pela letra da coluna"""
+    valores = {}
+    for c in row.findall('s:c', NS):
+        letra = ''.join(ch for ch in c.get('r') if ch.isalpha())
+        valores[letra] = c.findtext('s:is/s:t', default='', namespaces=NS)
+    return valores
+
+
+def teste_xlsx():
+    """Planilha válida, em fluxo, com Sim/Não, datas e texto escapado"""
+    ok = True
+    linhas = Linhas(TOTAL_LINHAS)
+    gerador = gerar_xlsx(linhas)
+    blocos = [next(gerador)]
+    if linhas.lidas:
+        print(f"❌ Primeiro bloco do XLSX só saiu depois de ler {linhas.lidas} linha(s)")
+        ok = False
+    blocos.extend(gerador)
+    if len([b for b in blocos if b]) < 3:
+        print(f"❌ XLSX não foi gerado em blocos: {len(blocos)} bloco(s)")
+        ok = False
+
+    with zipfile.ZipFile(io.BytesIO(b''.join(blocos))) as zf:
+        if zf.testzip() is not None:
+            print("❌ ZIP do XLSX corrompido")
+            return False
+        partes = {'[Content_Types].xml', '_rels/.rels', 'xl/workbook.xml',
+                  'xl/_rels/workbook.xml.rels', 'xl/worksheets/sheet1.xml'}
+        if not partes <= set(zf.namelist()):
+            print(f"❌ Partes faltando no XLSX: {sorted(partes - set(zf.namelist()))}")
+            return False
+        for nome in partes:
+            ET.fromstring(zf.read(nome))  # XML bem formado
+        rows = ET.fromstring(zf.read('xl/worksheets/sheet1.xml')).findall('s:sheetData/s:row', NS)
+
+    if len(rows) != TOTAL_LINHAS + 1:
+        print(f"❌ XLSX com {len(rows)} linhas, esperado {TOTAL_LINHAS + 1}")
+        return False
+
+    cabecalho = celulas(rows[0])
+    if list(cabecalho.values()) != COLUNAS_EXPORT:
+        print(f"❌ Cabeçalho inesperado: {list(cabecalho.values())}")
+        ok = False
+
+    letra = {coluna: letra for letra, coluna in cabecalho.items()}
+    primeira, segunda = celulas(rows[1]), celulas(rows[2])
+    if (primeira[letra['ativo']], segunda[letra['ativo']]) != ('Não', 'Sim'):
+        print(f"❌ Coluna ativo não saiu como Sim/Não: {primeira[letra['ativo']]}, {segunda[letra['ativo']]}")
+        ok = False
+    if primeira[letra['titulo_servico']] != 'Pintura & reparos <0>':
+        print(f"❌ Texto com & e < não foi preservado: {primeira[letra['titulo_servico']]}")
+        ok = False
+    if '\x01' in primeira[letra['descricao_servico']]:
+        print("❌ Caractere de controle chegou à planilha")
+        ok = False
+    if primeira[letra['data_criacao']] != '2025-11-07 10:30:00':
+        print(f"❌ Data de criação inesperada: {primeira[letra['data_criacao']]}")
+        ok = False
+
+    if ok:
+        print(f"✅ XLSX válido com {TOTAL_LINHAS} linhas, gerado em {len(blocos)} blocos, ativo em Sim/Não")
+    return ok
+
+
+def teste_csv():
+    """CSV com BOM, mesmas colunas e sem fórmula interpretada pela planilha"""
+    ok = True
+    dados = b''.join(gerar_csv(Linhas(3))).decode('utf-8')
+    if not dados.startswith('\ufeff'):
+        print("❌ CSV sem BOM (o Excel não reconhece o UTF-8)")
+        ok = False
+    registros = list(csv.DictReader(io.StringIO(dados.lstrip('\ufeff'))))
+    if len(registros) != 3 or list(registros[0]) != COLUNAS_EXPORT:
+        print("❌ CSV com linhas ou colunas inesperadas")
+        return False
+    if registros[1]['bairro'] != "'" + linha(1)['bairro']:
+        print(f"❌ Fórmula não foi neutralizada no CSV: {registros[1]['bairro']}")
+        ok = False
+    if [r['ativo'] for r in registros] != ['Não', 'Sim', 'Não']:
+        print(f"❌ Coluna ativo do CSV inesperada: {[r['ativo'] for r in registros]}")
+        ok = False
+
+    if ok:
+        print("✅ CSV com BOM, fórmula neutralizada e ativo em Sim/Não")
+    return ok
+
+
+def main():
+    print("=" * 60)
+    print("📊 TESTE: EXPORTAÇÃO DAS VAGAS (XLSX E CSV)")
+    print("=" * 60)
+
+    ok = True
+    for teste in (teste_xlsx, teste_csv):
+        ok = teste() and ok
+
+    print()
+    print("✅ Todos os testes passaram" if ok else "❌ Há testes com falha")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Script para testar o limite de login por IP atrás de proxy reverso
+
+Sobe a aplicação com PROXY_COUNT=1 (Flask test client, sem MySQL) e envia
+tentativas de login com X-Forwarded-For: o limite deve valer por IP do
+cliente, e não para todos os que chegam pelo mesmo proxy.
+"""
+
+import os
+import sys
+import tempfile
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BASE_DIR)
+
+TMP_DIR = tempfile.mkdtemp(prefix='webmei_login_proxy_')
+os.environ.update({
+    'PROXY_COUNT': '1',
+    'LOGIN_IP_CAPACIDADE': '3',
+    'LOGIN_IP_POR_MINUTO': '1',
+    'LOGIN_USUARIO_CAPACIDADE': '100',
+    'RATE_LIMIT_DB': '',
+    'VAGA_STORE_PATH': os.path.join(TMP_DIR, 'vagas.sqlite3'),
+    'SPOOL_DIR': os.path.join(TMP_DIR, 'spool'),
+    'PDF_CACHE_DIR': os.path.join(TMP_DIR, 'pdf'),
+    'CSV_EXCLUIDOS_DIR': os.path.join(TMP_DIR, 'csv_excluidos'),
+    'EXPIRACAO_INTERVALO': '0',
+})
+
+import app as webmei  # noqa: E402
+
+PROXY = '10.0.0.1'
+CLIENTE_A = '203.0.113.10'
+CLIENTE_B = '203.0.113.20'
+
+
+def tentar_login(client, ip_cliente, usuario, encadeado=None):
+    """POST /admin/login vindo do proxy com o IP do cliente no X-Forwarded-For"""
+    xff = f"{encadeado}, {ip_cliente}" if encadeado else ip_cliente
+    resp = client.post(
+        '/admin/login',
+        data={'username': usuario, 'password': 'senha-errada'},
+        headers={'X-Forwarded-For': xff},
+        environ_base={'REMOTE_ADDR': PROXY},
+    )
+    return resp.status_code
+
+
+def main():
+    print("=" * 60)
+    print("🔐 TESTE: LIMITE DE LOGIN POR IP ATRÁS DE PROXY (X-Forwarded-For)")
+    print("=" * 60)
+
+    webmei.app.config['WTF_CSRF_ENABLED'] = False
+    # Sem banco nem bcrypt: toda tentativa é uma credencial inválida
+    webmei.verify_admin_password = lambda username, password: None
+    client = webmei.app.test_client()
+    ok = True
+
+    # 1. O cliente A esgota o próprio balde
+    status = []
+    for i in range(6):
+        status.append(tentar_login(client, CLIENTE_A, f'usuario_a{i}'))
+    if 429 in status:
+        print(f"✅ Cliente A bloqueado após {status.index(429)} tentativa(s): {status}")
+    else:
+        print(f"❌ Cliente A nunca recebeu 429: {status}")
+        ok = False
+
+    # 2. O cliente B, pelo mesmo proxy, não herda o bloqueio de A
+    status_b = tentar_login(client, CLIENTE_B, 'usuario_b')
+    if status_b != 429:
+        print(f"✅ Cliente B (mesmo proxy) não foi bloqueado: {status_b}")
+    else:
+        print("❌ Cliente B recebeu 429: o limite está valendo pelo IP do proxy")
+        ok = False
+
+    # 3. Com um proxy confiável, só o último IP do cabeçalho conta: o
+    #    cliente A não escapa forjando um X-Forwarded-For próprio
+    status_forjado = tentar_login(client, CLIENTE_A, 'usuario_forjado', encadeado='198.51.100.99')
+    if status_forjado == 429:
+        print("✅ X-Forwarded-For forjado pelo cliente A foi ignorado")
+    else:
+        print(f"❌ Cliente A escapou do limite forjando X-Forwarded-For: {status_forjado}")
+        ok = False
+
+    print()
+    print("✅ Todos os testes passaram" if ok else "❌ Há testes com falha")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Script para testar o limite de tentativas de login (token bucket)
+
+Troca o relógio do módulo rate_limit por um relógio manual e confere a
+reposição das fichas, o bloqueio progressivo após falhas seguidas e os
+baldes do LoginThrottle, com os estados em memória e em SQLite.
+"""
+
+import os
+import sys
+import itertools
+import tempfile
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BASE_DIR)
+
+import rate_limit  # noqa: E402
+from rate_limit import BaldesMemoria, BaldesSQLite, TokenBucket, LoginThrottle  # noqa: E402
+
+
+class Relogio:
+    """Relógio manual no lugar do módulo time (só time() é usado)"""
+
+    def __init__(self, agora=1_700_000_000.0):
+        self.agora = agora
+
+    def time(self):
+        return self.agora
+
+    def avancar(self, segundos):
+        self.agora += segundos
+
+
+def perto(valor, esperado):
+    return abs(valor - esperado) < 1e-6
+
+
+def teste_reposicao(baldes, relogio):
+    """Rajada até a capacidade, espera proporcional à taxa e reposição com teto"""
+    balde = TokenBucket(baldes, capacidade=3, por_minuto=6)  # uma ficha a cada 10 s
+    ok = True
+
+    gastos = [balde.consumir('ip:a') for _ in range(3)]
+    espera = balde.consumir('ip:a')
+    if gastos != [0.0, 0.0, 0.0] or not perto(espera, 10):
+        print(f"❌ Rajada inesperada: {gastos}, espera {espera}")
+        ok = False
+
+    if not perto(balde.espera('ip:a'), 10) or not perto(balde.espera('ip:a'), 10):
+        print("❌ espera() alterou o balde")
+        ok = False
+
+    relogio.avancar(4)
+    if not perto(balde.consumir('ip:a'), 6):
+        print("❌ Reposição parcial não reduziu a espera")
+        ok = False
+    relogio.avancar(6)
+    if balde.consumir('ip:a') != 0.0 or not perto(balde.consumir('ip:a'), 10):
+        print("❌ Ficha reposta não pôde ser usada (ou foi usada duas vezes)")
+        ok = False
+
+    # Muito tempo parado: repõe só até a capacidade
+    relogio.avancar(3600)
+    gastos = [balde.consumir('ip:a') for _ in range(4)]
+    if gastos[:3] != [0.0, 0.0, 0.0] or not gastos[3]:
+        print(f"❌ Reposição passou da capacidade: {gastos}")
+        ok = False
+
+    if balde.consumir('ip:b') != 0.0:
+        print("❌ Chaves diferentes estão dividindo o mesmo balde")
+        ok = False
+
+    if ok:
+        print("✅ Reposição de fichas: rajada, espera pela taxa e teto na capacidade")
+    return ok
+
+
+def teste_backoff(baldes, relogio):
+    """Bloqueio base * 2^n após as falhas livres, com teto, zerado no sucesso"""
+    balde = TokenBucket(baldes, capacidade=100, por_minuto=60, falhas_livres=2,
+                        backoff_base=2.0, backoff_max=16.0)
+    ok = True
+
+    esperas = []
+    for _ in range(7):
+        balde.registrar_falha('login_ip:admin|a')
+        esperas.append(round(balde.espera('login_ip:admin|a'), 6))
+    if esperas != [0.0, 0.0, 2.0, 4.0, 8.0, 16.0, 16.0]:
+        print(f"❌ Bloqueio progressivo inesperado: {esperas}")
+        ok = False
+
+    if not balde.consumir('login_ip:admin|a'):
+        print("❌ Tentativa passou durante o bloqueio")
+        ok = False
+    relogio.avancar(16)
+    if balde.consumir('login_ip:admin|a') != 0.0:
+        print("❌ Bloqueio não terminou depois do tempo")
+        ok = False
+
+    balde.registrar_sucesso('login_ip:admin|a')
+    balde.registrar_falha('login_ip:admin|a')
+    if balde.espera('login_ip:admin|a') != 0.0:
+        print("❌ Sucesso não zerou as falhas seguidas")
+        ok = False
+
+    if ok:
+        print(f"✅ Backoff após falhas seguidas: {esperas} (teto 16 s), zerado no sucesso")
+    return ok
+
+
+def teste_login_throttle(baldes, relogio):
+    """Recusa não gasta os outros baldes; erros de outro IP não trancam o usuário"""
+    throttle = LoginThrottle(baldes, ip_capacidade=5, ip_por_minuto=1,
+                             login_capacidade=3, login_por_minuto=1,
+                             login_global_capacidade=100, login_global_por_minuto=100)
+    ok = True
+
+    # Atacante erra a senha de "admin" até ser bloqueado no próprio IP
+    for _ in range(5):
+        if throttle.verificar('198.51.100.1', 'admin'):
+            break
+        throttle.falha('198.51.100.1', 'admin')
+    if not throttle.verificar('198.51.100.1', 'admin'):
+        print("❌ Atacante não foi bloqueado")
+        ok = False
+
+    if throttle.verificar('203.0.113.5', 'admin') != 0.0:
+        print("❌ Usuário verdadeiro, de outro IP, ficou bloqueado pelo atacante")
+        ok = False
+
+    # Tentativas recusadas pelo balde usuário+IP não gastam o balde do IP
+    antes = throttle.por_ip.espera('ip:198.51.100.1')
+    for _ in range(10):
+        throttle.verificar('198.51.100.1', 'admin')
+    if throttle.por_ip.espera('ip:198.51.100.1') != antes:
+        print("❌ Tentativas recusadas gastaram fichas do balde por IP")
+        ok = False
+
+    if ok:
+        print("✅ LoginThrottle: bloqueio por usuário+IP, recusas sem gastar os outros baldes")
+    return ok
+
+
+def main():
+    print("=" * 60)
+    print("🪣 TESTE: LIMITE DE TENTATIVAS DE LOGIN (TOKEN BUCKET)")
+    print("=" * 60)
+
+    tmp = tempfile.mkdtemp(prefix='webmei_rate_limit_')
+    relogio = Relogio()
+    rate_limit.time = relogio
+    arquivos = itertools.count(1)
+
+    ok = True
+    for nome, novos_baldes in (
+        ('memória', BaldesMemoria),
+        ('SQLite', lambda: BaldesSQLite(os.path.join(tmp, f'baldes_{next(arquivos)}.sqlite3'))),
+    ):
+        print(f"\n📦 Estados em {nome}")
+        for teste in (teste_reposicao, teste_backoff, teste_login_throttle):
+            ok = teste(novos_baldes(), relogio) and ok
+
+    print()
+    print("✅ Todos os testes passaram" if ok else "❌ Há testes com falha")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Script para testar a fila de gravação (spool) dos serviços
+
+Usa um banco falso em memória no lugar do MySQL (mesma interface que o
+spool usa do DatabaseManager) e confere o que acontece com a fila quando
+o banco cai entre lotes, quando recusa um registro pelos dados e quando
+o processo cai no meio da compactação do arquivo.
+"""
+
+import os
+import sys
+import json
+import tempfile
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BASE_DIR)
+
+from spool import ServicoSpool  # noqa: E402
+
+
+class BancoFora(Exception):
+    """Erro passageiro (banco fora do ar): vale nova tentativa"""
+
+
+class Queda(Exception):
+    """Queda simulada do processo"""
+
+
+class BancoFalso:
+    """Banco em memória com insert_servicos_bulk/deactivate_servicos/is_data_error"""
+
+    def __init__(self):
+        self.servicos = {}          # arquivo_csv -> registro
+        self.fora = False           # simula banco fora do ar
+        self.falhar_apos = None     # cai depois de N chamadas de inserção
+        self.chamadas = 0
+        self.ruins = set()          # arquivo_csv recusados pelos dados
+
+    def insert_servicos_bulk(self, records, skip_existing=True, raise_errors=False):
+        self.chamadas += 1
+        if self.fora or (self.falhar_apos is not None and self.chamadas > self.falhar_apos):
+            raise BancoFora('banco fora do ar')
+        for record in records:
+            if record['arquivo_csv'] in self.ruins:
+                raise ValueError(f"valor inválido em {record['arquivo_csv']}")
+        inseridos = 0
+        for record in records:
+            if skip_existing and record['arquivo_csv'] in self.servicos:
+                continue
+            self.servicos[record['arquivo_csv']] = dict(record, ativo=True)
+            inseridos += 1
+        return inseridos
+
+    def deactivate_servicos(self, arquivos):
+        if self.fora:
+            return None
+        alteradas = 0
+        for nome in arquivos:
+            if nome in self.servicos and self.servicos[nome]['ativo']:
+                self.servicos[nome]['ativo'] = False
+                alteradas += 1
+        return alteradas
+
+    def is_data_error(self, exc):
+        return isinstance(exc, (KeyError, TypeError, ValueError))
+
+
+def novo_spool(spool_dir, db, batch_size=3):
+    spool = ServicoSpool(spool_dir, batch_size=batch_size)
+    spool._db = db  # sem start(): os testes chamam drain_once diretamente
+    return spool
+
+
+def servico(i):
+    return {'arquivo_csv': f'servico_{i:03d}.csv', 'titulo_servico': f'Serviço {i}'}
+
+
+def drenar(spool, limite=50):
+    """Chama drain_once até a fila esvaziar (ou o banco falhar)"""
+    for _ in range(limite):
+        gravados = spool.drain_once()
+        if not gravados:
+            return gravados
+    return None
+
+
+def linhas_rejeitadas(spool):
+    try:
+        with open(spool.rejeitados_path, 'r', encoding='utf-8') as f:
+            return [json.loads(linha) for linha in f]
+    except FileNotFoundError:
+        return []
+
+
+def teste_drenagem_interrompida(tmp):
+    """Banco cai entre lotes, o processo reinicia e a fila continua de onde parou"""
+    db = BancoFalso()
+    spool_dir = os.path.join(tmp, 'interrompida')
+    spool = novo_spool(spool_dir, db)
+    for i in range(8):
+        spool.append(servico(i))
+
+    ok = True
+    if spool.drain_once() != 3:
+        print("❌ Primeiro lote não foi gravado")
+        ok = False
+
+    db.fora = True
+    if spool.drain_once() is not None or spool.depth()['pendentes'] != 5:
+        print("❌ Lote com o banco fora não ficou pendente na fila")
+        ok = False
+
+    # Reinício do processo: o offset gravado em disco é o ponto de partida
+    db.fora = False
+    spool = novo_spool(spool_dir, db)
+    drenar(spool)
+    esperados = {servico(i)['arquivo_csv'] for i in range(8)}
+    if set(db.servicos) != esperados:
+        print(f"❌ Registros perdidos ou a mais: {sorted(set(db.servicos) ^ esperados)}")
+        ok = False
+    if spool.depth()['pendentes'] or os.path.getsize(spool.log_path):
+        print("❌ Fila não foi compactada depois de drenar tudo")
+        ok = False
+
+    # Banco cai no meio da regravação registro a registro: o avanço é guardado
+    spool.append(servico(20))
+    spool.append(dict(servico(21), titulo_servico='ruim'))
+    spool.append(servico(22))
+    db.ruins = {servico(21)['arquivo_csv']}
+    db.chamadas = 0
+    db.falhar_apos = 3  # lote + servico_020 + servico_021 (recusado); cai no 022
+    if spool.drain_once() is not None or spool.depth()['pendentes'] != 1:
+        print("❌ Avanço parcial do lote não foi guardado quando o banco caiu")
+        ok = False
+    db.falhar_apos = None
+    drenar(spool)
+    if servico(22)['arquivo_csv'] not in db.servicos or len(linhas_rejeitadas(spool)) != 1:
+        print("❌ Resto do lote não foi gravado depois da volta do banco")
+        ok = False
+
+    if ok:
+        print("✅ Drenagem interrompida entre lotes retoma sem perder nem duplicar registros")
+    return ok
+
+
+def teste_rejeitados(tmp):
+    """Registro recusado pelos dados vai para o arquivo de rejeitados e a fila segue"""
+    db = BancoFalso()
+    spool = novo_spool(os.path.join(tmp, 'rejeitados'), db, batch_size=10)
+    for i in range(4):
+        spool.append(servico(i))
+    ruim = servico(2)['arquivo_csv']
+    db.ruins = {ruim}
+
+    ok = True
+    if spool.drain_once() != 4:
+        print("❌ Lote com um registro ruim não foi processado")
+        ok = False
+    if set(db.servicos) != {servico(i)['arquivo_csv'] for i in (0, 1, 3)}:
+        print(f"❌ Registros bons não foram gravados: {sorted(db.servicos)}")
+        ok = False
+
+    rejeitadas = linhas_rejeitadas(spool)
+    if len(rejeitadas) != 1 or rejeitadas[0]['registro']['arquivo_csv'] != ruim \
+            or 'valor inválido' not in rejeitadas[0]['erro']:
+        print(f"❌ Arquivo de rejeitados inesperado: {rejeitadas}")
+        ok = False
+
+    depth = spool.depth()
+    if depth['pendentes'] or depth['rejeitados'] != 1:
+        print(f"❌ Situação da fila inesperada: {depth}")
+        ok = False
+
+    if ok:
+        print("✅ Registro com erro de dados foi para servicos.rejeitados.jsonl sem travar a fila")
+    return ok
+
+
+def teste_queda_na_compactacao(tmp):
+    """Queda entre _write_offset(0) e o truncate: o spool é reprocessado sem duplicar"""
+    db = BancoFalso()
+    spool_dir = os.path.join(tmp, 'compactacao')
+    spool = novo_spool(spool_dir, db)
+    for i in range(3):
+        spool.append(servico(i))
+
+    write_offset = spool._write_offset
+
+    def write_offset_com_queda(offset):
+        write_offset(offset)
+        if offset == 0:
+            raise Queda('processo caiu antes do truncate')
+
+    spool._write_offset = write_offset_com_queda
+    ok = True
+    try:
+        spool.drain_once()
+        print("❌ Queda simulada não aconteceu")
+        ok = False
+    except Queda:
+        pass
+
+    if not os.path.getsize(spool.log_path) or spool._read_offset() != 0:
+        print("❌ Estado após a queda não é o esperado (offset 0 e spool inteiro)")
+        ok = False
+
+    # Reinício: um serviço novo chega antes da drenagem, que relê tudo do início
+    spool = novo_spool(spool_dir, db)
+    spool.append(servico(3))
+    spool.desativar([servico(1)['arquivo_csv']])
+    drenar(spool)
+
+    esperados = {servico(i)['arquivo_csv'] for i in range(4)}
+    if set(db.servicos) != esperados:
+        print(f"❌ Registros perdidos ou a mais após a queda: {sorted(db.servicos)}")
+        ok = False
+    if db.servicos[servico(1)['arquivo_csv']]['ativo']:
+        print("❌ Desativação anexada depois da queda não foi aplicada")
+        ok = False
+    if os.path.getsize(spool.log_path) or spool._read_offset() != 0:
+        print("❌ Spool não foi compactado depois do reprocessamento")
+        ok = False
+
+    if ok:
+        print("✅ Queda entre _write_offset(0) e o truncate reprocessa o spool sem duplicar nem perder")
+    return ok
+
+
+def main():
+    print("=" * 60)
+    print("📬 TESTE: FILA DE GRAVAÇÃO (SPOOL) DOS SERVIÇOS")
+    print("=" * 60)
+
+    tmp = tempfile.mkdtemp(prefix='webmei_spool_')
+    ok = True
+    for teste in (teste_drenagem_interrompida, teste_rejeitados, teste_queda_na_compactacao):
+        ok = teste(tmp) and ok
+
+    print()
+    print("✅ Todos os testes passaram" if ok else "❌ Há testes com falha")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
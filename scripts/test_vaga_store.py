@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Script para testar o armazenamento local das vagas e os índices em memória
+
+Grava vagas num VagaStore SQLite temporário (sem MySQL) e confere a
+exclusão lógica e a expiração no store, a paginação do VagaIndex (mesma
+ordem e cursor de DatabaseManager.list_servicos) e a busca BM25.
+"""
+
+import os
+import sys
+import tempfile
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BASE_DIR)
+
+from vaga_store import VagaStore  # noqa: E402
+from vaga_index import VagaIndex, data_criacao  # noqa: E402
+from busca import BuscaVagas  # noqa: E402
+from database import decode_cursor  # noqa: E402
+
+VAGAS = [
+    # arquivo, criado_em, título, descrição, bairro, prazo, cnae
+    ('vaga_01.csv', '2025-11-01T09:00:00', 'Encanador residencial', 'Troca de registro', 'Centro', '2099-01-10', '4322301'),
+    ('vaga_02.csv', '2025-11-01T09:00:00', 'Pintura de fachada', 'Serviço de encanador incluso', 'Aldeota', '2099-01-05', '4330404'),
+    ('vaga_03.csv', '2025-11-02T14:30:00', 'Instalação elétrica', 'Quadro de luz', 'Meireles', '2000-01-01', '4321500'),
+    ('vaga_04.csv', '2025-11-03T08:15:00', 'Manutenção de ar-condicionado', 'Limpeza e carga de gás', 'Centro', '', '4322302'),
+    ('vaga_05.csv', '2025-11-03T08:15:00', 'Jardinagem', 'Poda de árvores', 'Benfica', '2099-02-01', '8130300'),
+    ('vaga_06.csv', '2025-11-04T17:45:00', 'Eletricista predial', 'Revisão elétrica do prédio', 'Aldeota', '2099-01-20', '4321500'),
+    ('vaga_07.csv', '2025-11-05T10:00:00', 'Pedreiro', 'Reboco de muro', 'Centro', '2099-03-01', '4399103'),
+]
+
+
+def gravar(store):
+    for arquivo, criado_em, titulo, descricao, bairro, prazo, cnae in VAGAS:
+        store.insert(arquivo, {
+            'titulo_servico': titulo, 'descricao_servico': descricao, 'bairro': bairro,
+            'prazo_expiracao': prazo, 'cnae': cnae,
+        }, criado_em=criado_em)
+
+
+def ordem_esperada(store, apenas_ativas):
+    """Arquivos na ordem de list_servicos: data de criação e id, mais recentes primeiro"""
+    rows = list(store.iter_vagas(['criado_em', 'ativo'], apenas_ativas=apenas_ativas))
+    rows.sort(key=lambda r: (data_criacao(r['criado_em']), r['id']), reverse=True)
+    return [r['arquivo'] for r in rows]
+
+
+def paginar(index, limit, apenas_ativas):
+    """Percorre todas as páginas do índice; devolve arquivos e cursores"""
+    arquivos, cursores, cursor = [], [], None
+    while True:
+        vagas, cursor = index.page(limit, cursor=cursor, apenas_ativas=apenas_ativas)
+        arquivos.extend(v['arquivo'] for v in vagas)
+        if cursor is None:
+            return arquivos, cursores
+        cursores.append((cursor, vagas[-1]))
+
+
+def teste_store(store):
+    """Exclusão lógica, contagens e expiração no store"""
+    ok = True
+    if store.delete_many(['vaga_04.csv', 'vaga_inexistente.csv']) != ['vaga_04.csv']:
+        print("❌ delete_many não devolveu só a vaga excluída")
+        ok = False
+    if store.delete('vaga_04.csv'):
+        print("❌ Vaga já excluída foi excluída de novo")
+        ok = False
+    if store.get('vaga_04.csv') is not None or store.get('vaga_05.csv') is None:
+        print("❌ get() devolveu vaga excluída (ou perdeu uma ativa)")
+        ok = False
+
+    if store.expirar('2025-11-18') != ['vaga_03.csv']:
+        print("❌ Expiração não marcou só a vaga com prazo vencido")
+        ok = False
+    if store.get('vaga_03.csv') is None:
+        print("❌ Vaga expirada sumiu do get() (só as excluídas somem)")
+        ok = False
+
+    if store.contagens() != (7, 5, 1):
+        print(f"❌ Contagens inesperadas: {store.contagens()}")
+        ok = False
+    if store.count_por_cnae('4321500') != 2 or store.count_por_cnae('4322302') != 0:
+        print("❌ count_por_cnae contou vaga excluída")
+        ok = False
+
+    if ok:
+        print("✅ Store: exclusão lógica, expiração e contagens (7 vagas, 5 ativas, 1 excluída)")
+    return ok
+
+
+def teste_index(store):
+    """Páginas na ordem de list_servicos, cursor compatível e sync entre workers"""
+    ok = True
+    index = VagaIndex(store)
+    index.rebuild()
+
+    for apenas_ativas in (True, False):
+        arquivos, cursores = paginar(index, 2, apenas_ativas)
+        if arquivos != ordem_esperada(store, apenas_ativas):
+            print(f"❌ Ordem das páginas (apenas_ativas={apenas_ativas}): {arquivos}")
+            ok = False
+        for cursor, ultima in cursores:
+            if decode_cursor(cursor) != (ultima['data_criacao'], ultima['id']):
+                print(f"❌ Cursor não corresponde à última linha da página: {cursor}")
+                ok = False
+
+    situacao = {v['arquivo']: (v['ativo'], v['excluida']) for v in index.list(apenas_ativas=False)}
+    if situacao['vaga_04.csv'] != (False, True) or situacao['vaga_03.csv'] != (False, False):
+        print(f"❌ Situação das vagas inativas no índice: {situacao}")
+        ok = False
+
+    # Outro worker exclui uma vaga e grava outra: o índice acompanha pela versão
+    outro = VagaStore(store.path)
+    outro.delete('vaga_07.csv')
+    outro.insert('vaga_08.csv', {'titulo_servico': 'Marceneiro', 'prazo_expiracao': '2099-04-01'},
+                 criado_em='2025-11-06T11:00:00')
+    ativas = [v['arquivo'] for v in index.list()]
+    if ativas != ordem_esperada(store, True) or 'vaga_07.csv' in ativas or ativas[0] != 'vaga_08.csv':
+        print(f"❌ Índice não acompanhou o outro worker: {ativas}")
+        ok = False
+
+    expirando = [v['arquivo'] for v in index.expirando('2099-01-01', '2099-01-31', 10)]
+    if expirando != ['vaga_02.csv', 'vaga_01.csv', 'vaga_06.csv']:
+        print(f"❌ Vagas expirando fora da ordem de prazo: {expirando}")
+        ok = False
+
+    if ok:
+        print("✅ Índice: páginas na ordem (data de criação, id), cursor do banco e sync entre workers")
+    return ok
+
+
+def teste_busca(store):
+    """BM25: título pesa mais que descrição, acentos ignorados, excluídas fora"""
+    ok = True
+    busca = BuscaVagas(store)
+    busca.rebuild()
+
+    encanador = [arquivo for arquivo, _ in busca.search('encanador')]
+    if encanador != ['vaga_01.csv', 'vaga_02.csv']:
+        print(f"❌ Ranking de 'encanador' inesperado: {encanador}")
+        ok = False
+
+    eletrica = {arquivo for arquivo, _ in busca.search('eletrica')}
+    if 'vaga_06.csv' not in eletrica:
+        print(f"❌ Busca sem acento não encontrou 'elétrica': {eletrica}")
+        ok = False
+
+    VagaStore(store.path).delete('vaga_01.csv')
+    encanador = [arquivo for arquivo, _ in busca.search('encanador')]
+    if encanador != ['vaga_02.csv']:
+        print(f"❌ Vaga excluída continuou na busca: {encanador}")
+        ok = False
+
+    if ok:
+        print("✅ Busca BM25: peso do título, acentos e vagas excluídas")
+    return ok
+
+
+def main():
+    print("=" * 60)
+    print("🗂️  TESTE: VAGASTORE, ÍNDICE DE LISTAGEM E BUSCA")
+    print("=" * 60)
+
+    tmp = tempfile.mkdtemp(prefix='webmei_vaga_store_')
+    store = VagaStore(os.path.join(tmp, 'vagas.sqlite3'))
+    gravar(store)
+
+    ok = True
+    for teste in (teste_store, teste_index, teste_busca):
+        ok = teste(store) and ok
+
+    print()
+    print("✅ Todos os testes passaram" if ok else "❌ Há testes com falha")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
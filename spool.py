@@ -0,0 +1,381 @@
+"""
+Fila de gravação (write-behind) dos serviços no MySQL
+
+create_service grava cada serviço num arquivo local append-only (com fsync)
+e responde na hora; uma thread em segundo plano drena esse arquivo para o
+servicos_mei em lotes, com novas tentativas e backoff exponencial quando o
+banco está lento ou fora do ar. Nada se perde se o processo reiniciar: o
+offset já gravado no banco fica em um arquivo ao lado do spool.
+
+Um lote recusado pelo banco por causa dos dados (data inválida, texto
+longo demais...) é regravado registro a registro; os registros recusados
+vão para servicos.rejeitados.jsonl e o offset passa deles, para um
+registro ruim não parar a fila inteira.
+
+A exclusão de vagas também passa pelo spool (desativar): a desativação no
+banco fica na mesma fila, depois das gravações anteriores, então uma vaga
+excluída ainda pendente é gravada e logo em seguida desativada.
+"""
+
+import os
+import json
+import logging
+import time
+import random
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem lock entre processos
+    fcntl = None
+
+
+# Chave que marca uma linha do spool como operação (e não um serviço a inserir)
+CHAVE_OPERACAO = '_operacao'
+
+
+class ServicoSpool:
+    """Spool append-only de serviços pendentes + worker que drena para o banco"""
+
+    def __init__(self, spool_dir, batch_size=100, poll_interval=2.0,
+                 backoff_base=1.0, backoff_max=60.0, ao_gravar=None):
+        self.spool_dir = spool_dir
+        self.ao_gravar = ao_gravar  # chamado após cada lote gravado no banco
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        os.makedirs(spool_dir, exist_ok=True)
+        self.log_path = os.path.join(spool_dir, 'servicos.jsonl')
+        self.offset_path = os.path.join(spool_dir, 'servicos.offset')
+        self.append_lock_path = os.path.join(spool_dir, 'servicos.lock')
+        self.drain_lock_path = os.path.join(spool_dir, 'servicos.drain.lock')
+        # Registros recusados pelo banco (dead letter), para conferência manual
+        self.rejeitados_path = os.path.join(spool_dir, 'servicos.rejeitados.jsonl')
+
+        self._append_lock = threading.Lock()
+        self._drain_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._db = None
+        self._falhas = 0
+        self.last_error = None
+        self.last_error_at = None
+        self.last_drain_at = None
+        self.drained_total = 0
+        self.rejeitados_total = 0
+        self._erro_lote = None
+
+    @contextmanager
+    def _file_lock(self, thread_lock, path):
+        """Lock entre threads e entre processos (workers) sobre o spool"""
+        with thread_lock:
+            if fcntl is None:
+                yield
+                return
+            with open(path, 'a') as lf:
+                fcntl.flock(lf, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lf, fcntl.LOCK_UN)
+
+    def append(self, record):
+        """
+        Grava um serviço no spool e só retorna depois do fsync
+
+        Args:
+            record (dict): Dados do serviço (mesmas chaves de insert_servico)
+        """
+        linha = (json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8')
+        with self._file_lock(self._append_lock, self.append_lock_path):
+            with open(self.log_path, 'ab') as f:
+                f.write(linha)
+                f.flush()
+                os.fsync(f.fileno())
+        self._wakeup.set()
+
+    def desativar(self, arquivos):
+        """
+        Enfileira a desativação (ativo = FALSE) das vagas no banco
+
+        Args:
+            arquivos (list): Nomes de arquivo (arquivo_csv) das vagas excluídas
+        """
+        self.append({CHAVE_OPERACAO: 'desativar', 'arquivos': list(arquivos)})
+
+    def _read_offset(self):
+        try:
+            with open(self.offset_path, 'r', encoding='ascii') as f:
+                return int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    def _write_offset(self, offset):
+        tmp = self.offset_path + '.tmp'
+        with open(tmp, 'w', encoding='ascii') as f:
+            f.write(str(offset))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.offset_path)
+
+    def _read_batch(self, offset):
+        """
+        Lê até batch_size linhas completas a partir do offset
+
+        Returns:
+            tuple: (registros, offset do fim de cada registro, offset final)
+        """
+        records = []
+        fins = []
+        novo_offset = offset
+        try:
+            with open(self.log_path, 'rb') as f:
+                f.seek(offset)
+                while len(records) < self.batch_size:
+                    linha = f.readline()
+                    if not linha.endswith(b'\n'):
+                        break  # fim do arquivo (ou escrita incompleta)
+                    novo_offset += len(linha)
+                    try:
+                        records.append(json.loads(linha))
+                        fins.append(novo_offset)
+                    except ValueError:
+                        logger.warning("Spool: linha inválida ignorada no offset %s", novo_offset - len(linha))
+        except FileNotFoundError:
+            pass
+        return records, fins, novo_offset
+
+    def _rejeitar(self, record, erro):
+        """Grava um registro recusado pelo banco no arquivo de rejeitados (com fsync)"""
+        linha = json.dumps({
+            'registro': record,
+            'erro': str(erro),
+            'rejeitado_em': datetime.now().isoformat(timespec='seconds'),
+        }, ensure_ascii=False) + '\n'
+        with open(self.rejeitados_path, 'ab') as f:
+            f.write(linha.encode('utf-8'))
+            f.flush()
+            os.fsync(f.fileno())
+        self.rejeitados_total += 1
+        logger.error("Spool: registro recusado pelo banco (%s): %s",
+                     record.get('arquivo_csv') if isinstance(record, dict) else None, erro)
+
+    @staticmethod
+    def _trechos(records, fins):
+        """Divide o lote em trechos consecutivos de inserções e operações, na ordem do spool"""
+        trecho, fins_trecho = [], []
+        for record, fim in zip(records, fins):
+            if CHAVE_OPERACAO in record:
+                if trecho:
+                    yield trecho, fins_trecho
+                    trecho, fins_trecho = [], []
+                yield record, [fim]
+            else:
+                trecho.append(record)
+                fins_trecho.append(fim)
+        if trecho:
+            yield trecho, fins_trecho
+
+    def _gravar_insercoes(self, records, fins):
+        """
+        Grava um trecho de inserções; se o banco recusar pelos dados, registro a registro
+
+        Returns:
+            tuple: (registros inseridos, offset até onde o spool foi
+                    processado ou None se nada foi processado)
+        """
+        try:
+            return self._db.insert_servicos_bulk(records, raise_errors=True), fins[-1]
+        except Exception as e:
+            if not self._db.is_data_error(e):
+                self._erro_lote = str(e)
+                return 0, None
+            logger.warning("Spool: lote recusado pelo banco (%s); gravando registro a registro", e)
+            return self._gravar_um_a_um(records, fins)
+
+    def _aplicar_operacao(self, operacao):
+        """
+        Aplica uma operação do spool no banco
+
+        Returns:
+            int: Linhas alteradas, ou None se o banco falhou
+        """
+        if operacao[CHAVE_OPERACAO] == 'desativar':
+            alteradas = self._db.deactivate_servicos(operacao['arquivos'])
+            if alteradas is None:
+                self._erro_lote = 'Falha ao desativar vagas excluídas no banco de dados'
+            return alteradas
+        logger.warning("Spool: operação desconhecida ignorada: %s", operacao[CHAVE_OPERACAO])
+        return 0
+
+    def _gravar_um_a_um(self, records, fins):
+        """
+        Regrava um lote recusado registro a registro (chamado com o lock de drenagem)
+
+        Registros com erro de dados vão para o arquivo de rejeitados; um
+        erro de outro tipo (banco caiu no meio) interrompe a regravação.
+
+        Returns:
+            tuple: (registros inseridos, offset até onde o spool foi
+                    processado ou None se nada foi processado)
+        """
+        inseridos = 0
+        processado = None
+        for record, fim in zip(records, fins):
+            try:
+                inseridos += self._db.insert_servicos_bulk([record], raise_errors=True)
+            except Exception as e:
+                if not self._db.is_data_error(e):
+                    self._erro_lote = str(e)
+                    return inseridos, processado
+                self._rejeitar(record, e)
+            processado = fim
+        return inseridos, processado
+
+    def drain_once(self):
+        """
+        Envia um lote do spool para o banco
+
+        Returns:
+            int: Quantidade de registros gravados (0 se não havia nada),
+                 ou None se o banco falhou (o lote fica para a próxima tentativa)
+        """
+        # O lock de drenagem não bloqueia append(): o formulário nunca
+        # espera pelo banco, só pelo fsync do spool
+        with self._file_lock(self._drain_lock, self.drain_lock_path):
+            offset = self._read_offset()
+            records, fins, novo_offset = self._read_batch(offset)
+            if novo_offset == offset:
+                self._compact(offset)
+                return 0
+
+            alterados = 0
+            processado = offset
+            completo = True
+            for trecho, fins_trecho in self._trechos(records, fins):
+                if isinstance(trecho, dict):
+                    resultado = self._aplicar_operacao(trecho)
+                    ate = fins_trecho[-1] if resultado is not None else None
+                else:
+                    resultado, ate = self._gravar_insercoes(trecho, fins_trecho)
+                alterados += resultado or 0
+                if ate is not None:
+                    processado = ate
+                if ate != fins_trecho[-1]:
+                    completo = False
+                    break
+
+            if completo:
+                self._write_offset(novo_offset)
+                self._compact(novo_offset)
+            elif processado != offset:
+                # Banco falhou no meio: guarda o avanço e tenta o resto depois
+                self._write_offset(processado)
+
+        if alterados and self.ao_gravar is not None:
+            try:
+                self.ao_gravar(alterados)
+            except Exception as e:
+                logger.warning("Spool: erro no callback após gravação: %s", e)
+
+        if not completo:
+            return None
+        self.drained_total += len(records)
+        self.last_drain_at = time.time()
+        return len(records)
+
+    def _compact(self, offset):
+        """Zera o spool quando tudo já foi gravado (chamado com o lock de drenagem)"""
+        if not offset:
+            return
+        with self._file_lock(self._append_lock, self.append_lock_path):
+            try:
+                tamanho = os.path.getsize(self.log_path)
+            except OSError:
+                return
+            if offset >= tamanho:
+                # Offset primeiro: uma queda no meio reprocessa o spool (o banco
+                # ignora o que já tem pelo arquivo_csv) em vez de perder o que
+                # for anexado depois
+                self._write_offset(0)
+                with open(self.log_path, 'wb'):
+                    pass
+
+    def rejeitados(self):
+        """Quantidade de registros no arquivo de rejeitados (todos os processos)"""
+        try:
+            with open(self.rejeitados_path, 'rb') as f:
+                return sum(bloco.count(b'\n') for bloco in iter(lambda: f.read(1 << 16), b''))
+        except OSError:
+            return 0
+
+    def depth(self):
+        """
+        Situação da fila, para a área administrativa
+
+        Returns:
+            dict: pendentes, bytes pendentes, rejeitados, falhas seguidas e último erro
+        """
+        offset = self._read_offset()
+        pendentes = 0
+        tamanho = 0
+        try:
+            tamanho = os.path.getsize(self.log_path)
+            with open(self.log_path, 'rb') as f:
+                f.seek(offset)
+                for bloco in iter(lambda: f.read(1 << 16), b''):
+                    pendentes += bloco.count(b'\n')
+        except OSError:
+            pass
+        return {
+            'pendentes': pendentes,
+            'bytes_pendentes': max(0, tamanho - offset),
+            'falhas_seguidas': self._falhas,
+            'ultimo_erro': self.last_error,
+            'ultimo_erro_em': self.last_error_at,
+            'ultima_gravacao_em': self.last_drain_at,
+            'gravados_total': self.drained_total,
+            'rejeitados': self.rejeitados(),
+            'rejeitados_arquivo': self.rejeitados_path,
+        }
+
+    def _backoff(self):
+        espera = min(self.backoff_max, self.backoff_base * (2 ** (self._falhas - 1)))
+        return espera * random.uniform(0.5, 1.0)
+
+    def _run(self):
+        while True:
+            self._wakeup.clear()
+            erro = None
+            self._erro_lote = None
+            try:
+                gravados = self.drain_once()
+            except Exception as e:
+                gravados = None
+                erro = str(e)
+                logger.exception("Spool: erro ao drenar fila")
+
+            if gravados is None:
+                self._falhas += 1
+                self.last_error = erro or self._erro_lote or 'Falha ao inserir lote no banco de dados'
+                self.last_error_at = time.time()
+                time.sleep(self._backoff())
+                continue
+
+            self._falhas = 0
+            if gravados >= self.batch_size:
+                continue  # ainda há fila, segue drenando
+            self._wakeup.wait(self.poll_interval)
+
+    def start(self, db_manager):
+        """Inicia a thread de drenagem (uma por processo)"""
+        self._db = db_manager
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name='servico-spool', daemon=True)
+        self._thread.start()
@@ -0,0 +1,96 @@
+/**
+ * Autocompletar dos campos de lista do formulário de cadastro
+ *
+ * Os órgãos e ocupações não vêm mais embutidos na página: as sugestões
+ * são buscadas em /api/autocomplete/<lista> conforme o usuário digita.
+ * O mapeamento ocupação -> serviços e as formas de pagamento vêm do JSON
+ * versionado /ref/<versao>.json, que o navegador guarda em cache.
+ */
+
+(function(){
+  const ESPERA_MS = 150;
+
+  function buscar(url, params){
+    const query = new URLSearchParams(params).toString();
+    return fetch(url + '?' + query, {headers: {'Accept': 'application/json'}})
+      .then(function(resp){ return resp.ok ? resp.json() : {sugestoes: []}; })
+      .then(function(dados){ return dados.sugestoes || []; })
+      .catch(function(){ return []; });
+  }
+
+  function preencherDatalist(datalist, opcoes){
+    datalist.innerHTML = '';
+    for(const valor of opcoes){
+      const o = document.createElement('option');
+      o.value = valor;
+      datalist.appendChild(o);
+    }
+  }
+
+  // Campos de texto com datalist: sugestões a cada digitação (com espera)
+  document.querySelectorAll('input[data-autocomplete]').forEach(function(input){
+    const datalist = document.getElementById(input.getAttribute('list'));
+    const url = input.dataset.autocomplete;
+    let timer = null;
+    let ultima = null;
+
+    function atualizar(){
+      const q = input.value.trim();
+      if(q === ultima) return;
+      ultima = q;
+      buscar(url, {q: q, limite: 20}).then(function(opcoes){
+        // Ignora respostas de uma digitação anterior
+        if(q === ultima) preencherDatalist(datalist, opcoes);
+      });
+    }
+
+    input.addEventListener('focus', atualizar, {once: true});
+    input.addEventListener('input', function(){
+      clearTimeout(timer);
+      timer = setTimeout(atualizar, ESPERA_MS);
+    });
+  });
+
+  // Dados de referência (mapeamento e formas de pagamento): JSON versionado,
+  // guardado pelo navegador entre visitas
+  const form = document.querySelector('form[data-ref]');
+  const tipoInput = document.getElementById('tipo_atividade');
+  const espSel = document.getElementById('especificacao_atividade');
+  const pagSel = document.getElementById('forma_pagamento');
+  if(!form) return;
+
+  function preencherSelect(select, opcoes){
+    select.innerHTML = '';
+    const placeholder = document.createElement('option');
+    placeholder.value = '';
+    placeholder.textContent = 'Selecione...';
+    select.appendChild(placeholder);
+    for(const valor of opcoes){
+      const o = document.createElement('option');
+      o.value = valor;
+      o.textContent = valor;
+      select.appendChild(o);
+    }
+  }
+
+  let mapping = {};
+
+  function popularEspecificacoes(ocupacao){
+    const opts = mapping[ocupacao] || [];
+    preencherSelect(espSel, opts);
+    espSel.disabled = opts.length === 0;
+  }
+
+  espSel.disabled = true;
+  tipoInput.addEventListener('change', function(){
+    popularEspecificacoes(this.value.trim());
+  });
+
+  fetch(form.dataset.ref, {credentials: 'same-origin', mode: 'cors'})
+    .then(function(resp){ return resp.json(); })
+    .then(function(ref){
+      mapping = ref.ocupacao_to_servicos || {};
+      preencherSelect(pagSel, ref.formas_pagamento || []);
+      if(tipoInput.value.trim()) popularEspecificacoes(tipoInput.value.trim());
+    });
+})();
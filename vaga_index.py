@@ -0,0 +1,262 @@
+"""
+Índice em memória das vagas do VagaStore
+
+Evita que as listagens consultem o armazenamento a cada requisição.
+O índice é montado uma vez na inicialização, atualizado diretamente por
+create_service/admin_delete/expiração e ressincronizado pelo contador de
+versão do store quando outro processo (worker) grava ou remove vagas.
+Vagas expiradas ou excluídas (ativo = 0 no store) continuam no índice para
+a listagem do admin, com a situação, mas ficam fora da listagem pública e
+dos prazos.
+
+A ordem e o cursor das páginas são os de DatabaseManager.list_servicos
+(data de criação e id, mais recentes primeiro): quando a listagem passa do
+banco para o índice, muda só a origem das linhas.
+"""
+
+import bisect
+import threading
+from datetime import datetime
+
+from database import encode_cursor, decode_cursor
+
+
+# Campos exibidos nas listagens
+CAMPOS_RESUMO = ('titulo_servico', 'tipo_atividade', 'bairro', 'prazo_expiracao')
+
+
+def data_criacao(criado_em):
+    """criado_em do store (ISO) como datetime; datetime.min se vazio ou inválido"""
+    try:
+        return datetime.fromisoformat(criado_em)
+    except (TypeError, ValueError):
+        return datetime.min
+
+
+def montar_resumo(name, data, vaga_id=None, criado_em=None, ativo=True, excluida=False):
+    """Resumo de uma vaga usado nas listagens (mesmas chaves das linhas de list_servicos)"""
+    resumo = {
+        'arquivo': name, 'id': vaga_id, 'data_criacao': data_criacao(criado_em),
+        'ativo': bool(ativo), 'excluida': bool(excluida),
+    }
+    for campo in CAMPOS_RESUMO:
+        resumo[campo] = data.get(campo, '')
+    return resumo
+
+
+def _chave(resumo):
+    return (resumo['data_criacao'], resumo['id'] or 0, resumo['arquivo'])
+
+
+def _remover(lista, chave):
+    pos = bisect.bisect_left(lista, chave)
+    if pos < len(lista) and lista[pos] == chave:
+        del lista[pos]
+
+
+class VagaIndex:
+    """Índice de vagas por nome de arquivo, em ordem de criação"""
+
+    def __init__(self, store):
+        self.store = store
+        self._lock = threading.Lock()
+        self._chaves = []       # (data_criacao, id, nome) crescentes, todas as vagas (admin)
+        self._ativas = []       # idem, só as ativas (listagem pública)
+        self._resumos = {}      # nome -> resumo
+        self._prazos = []       # (prazo_expiracao, nome) ordenados das ativas, para "expirando"
+        self._excluidas = 0     # vagas excluídas no índice (comparado com o store no sync)
+        self._max_id = 0        # maior id do store já indexado
+        self._versao = None     # versão do store na última sincronização
+
+    def rebuild(self):
+        """Reconstrói o índice completo a partir do store"""
+        with self._lock:
+            self._rebuild_locked(self.store.versao())
+
+    def _rebuild_locked(self, versao):
+        self._chaves = []
+        self._ativas = []
+        self._resumos = {}
+        self._prazos = []
+        self._excluidas = 0
+        self._max_id = 0
+        self._load_new_locked()
+        self._versao = versao
+
+    def _load_new_locked(self):
+        """Indexa as vagas com id acima do maior já indexado (varredura sequencial)"""
+        novos = []
+        colunas = (*CAMPOS_RESUMO, 'criado_em', 'ativo', 'excluido_em')
+        for row in self.store.iter_vagas(colunas, after_id=self._max_id):
+            name = row['arquivo']
+            if name in self._resumos:
+                self._remove_locked(name)
+            novos.append(name)
+            self._resumos[name] = montar_resumo(
+                name, row, row['id'], row['criado_em'], row['ativo'], row['excluido_em']
+            )
+            self._max_id = max(self._max_id, row['id'])
+        if novos:
+            # Timsort aproveita a parte já ordenada: O(n) para poucos novos
+            resumos = [self._resumos[name] for name in novos]
+            self._excluidas += sum(1 for r in resumos if r['excluida'])
+            self._chaves.extend(_chave(r) for r in resumos)
+            self._chaves.sort()
+            self._ativas.extend(_chave(r) for r in resumos if r['ativo'])
+            self._ativas.sort()
+            self._prazos.extend(
+                (r['prazo_expiracao'], r['arquivo'])
+                for r in resumos if r['ativo'] and r['prazo_expiracao']
+            )
+            self._prazos.sort()
+
+    def sync(self):
+        """Ressincroniza com o store se a versão dele mudou"""
+        versao = self.store.versao()
+        if versao == self._versao:
+            return
+        with self._lock:
+            if versao == self._versao:
+                return
+            # Inserções chegam em ordem de id; expirações e exclusões só aparecem nas contagens
+            self._load_new_locked()
+            if self.store.contagens() != (len(self._chaves), len(self._ativas), self._excluidas):
+                self._rebuild_locked(versao)
+                return
+            self._versao = versao
+
+    def _add_locked(self, resumo):
+        name = resumo['arquivo']
+        self._remove_locked(name)
+        self._resumos[name] = resumo
+        bisect.insort(self._chaves, _chave(resumo))
+        if resumo['ativo']:
+            bisect.insort(self._ativas, _chave(resumo))
+            if resumo['prazo_expiracao']:
+                bisect.insort(self._prazos, (resumo['prazo_expiracao'], name))
+
+    def _desativar_locked(self, name, excluida=False):
+        """Tira a vaga da listagem pública e dos prazos; ela segue na listagem completa"""
+        resumo = self._resumos.get(name)
+        if resumo is None:
+            return
+        if resumo['ativo']:
+            _remover(self._ativas, _chave(resumo))
+            _remover(self._prazos, (resumo['prazo_expiracao'], name))
+        elif resumo['excluida'] or not excluida:
+            return  # já inativa (ou já excluída)
+        if excluida and not resumo['excluida']:
+            self._excluidas += 1
+        # Resumo novo: quem já leu a página antiga segue com a cópia dele
+        self._resumos[name] = dict(resumo, ativo=False, excluida=resumo['excluida'] or excluida)
+
+    def _remove_locked(self, name):
+        self._desativar_locked(name)
+        resumo = self._resumos.pop(name, None)
+        if resumo is not None:
+            _remover(self._chaves, _chave(resumo))
+            if resumo['excluida']:
+                self._excluidas -= 1
+
+    def add(self, name, data, vaga_id=None, criado_em=None):
+        """
+        Registra uma vaga recém-gravada
+
+        Args:
+            name (str): Nome de arquivo (identificador) da vaga
+            data (dict): Dados da vaga
+            vaga_id (int, opcional): id no store
+            criado_em (str, opcional): Data de criação gravada no store (ISO)
+        """
+        with self._lock:
+            self._add_locked(montar_resumo(name, data, vaga_id, criado_em))
+            if vaga_id:
+                self._max_id = max(self._max_id, vaga_id)
+
+    def remove(self, name):
+        """Remove uma vaga do índice"""
+        with self._lock:
+            self._remove_locked(name)
+
+    def remove_many(self, names):
+        """Remove várias vagas de uma vez (leitores nunca veem a remoção pela metade)"""
+        with self._lock:
+            for name in names:
+                self._remove_locked(name)
+
+    def desativar_many(self, names):
+        """Marca várias vagas como inativas (expiradas) de uma vez"""
+        with self._lock:
+            for name in names:
+                self._desativar_locked(name)
+
+    def excluir_many(self, names):
+        """Marca várias vagas como excluídas de uma vez (saem das listagens públicas)"""
+        with self._lock:
+            for name in names:
+                self._desativar_locked(name, excluida=True)
+
+    def resumo(self, name):
+        """Resumo de uma vaga ou None se ela não estiver indexada (chamar sync antes)"""
+        return self._resumos.get(name)
+
+    def list(self, apenas_ativas=True):
+        """
+        Lista os resumos das vagas, mais recentes primeiro
+
+        Returns:
+            list: Cópia da lista de resumos (segura para uso fora do lock)
+        """
+        self.sync()
+        with self._lock:
+            chaves = self._ativas if apenas_ativas else self._chaves
+            return [self._resumos[name] for _, _, name in reversed(chaves)]
+
+    def page(self, limit, cursor=None, apenas_ativas=True):
+        """
+        Página de resumos, mais recentes primeiro (data de criação e id)
+
+        Args:
+            limit (int): Tamanho da página
+            cursor (str, opcional): Cursor da página anterior (encode_cursor),
+                                    o mesmo de DatabaseManager.list_servicos
+            apenas_ativas (bool): Só as vagas ativas (listagem pública)
+
+        Returns:
+            tuple: (lista de resumos, cursor da próxima página ou None)
+        """
+        posicao = decode_cursor(cursor) if cursor else None
+        self.sync()
+        with self._lock:
+            chaves = self._ativas if apenas_ativas else self._chaves
+            # Chaves abaixo de (data, id) do cursor: a própria linha fica de fora
+            fim = bisect.bisect_left(chaves, posicao) if posicao else len(chaves)
+            inicio = max(0, fim - limit)
+            vagas = [self._resumos[name] for _, _, name in reversed(chaves[inicio:fim])]
+        proximo = None
+        if inicio > 0 and vagas:
+            proximo = encode_cursor(vagas[-1]['data_criacao'], vagas[-1]['id'] or 0)
+        return vagas, proximo
+
+    def expirando(self, desde, ate, limit):
+        """
+        Próximas vagas ativas a expirar, em ordem de prazo_expiracao
+
+        Busca binária no índice de prazos: O(log n + limit).
+
+        Args:
+            desde (str): Primeiro prazo incluído (YYYY-MM-DD)
+            ate (str): Último prazo incluído (YYYY-MM-DD)
+            limit (int): Máximo de vagas
+
+        Returns:
+            list: Resumos das vagas
+        """
+        self.sync()
+        with self._lock:
+            inicio = bisect.bisect_left(self._prazos, (desde, ''))
+            fim = bisect.bisect_right(self._prazos, (ate, '\uffff'), inicio)
+            return [self._resumos[name] for _, name in self._prazos[inicio:min(fim, inicio + limit)]]
+
+    def __len__(self):
+        return len(self._ativas)
@@ -0,0 +1,359 @@
+"""
+Armazenamento das vagas em um único arquivo SQLite (modo WAL)
+
+Substitui o antigo layout de um CSV por vaga em CSV_DIR. Cada vaga continua
+identificada pelo nome de arquivo gerado em create_service
+(``{slug}_{timestamp}.csv``), que segue sendo usado nas URLs e na coluna
+arquivo_csv do MySQL; o CSV individual é gerado sob demanda no download.
+"""
+
+import os
+import io
+import re
+import csv
+import sqlite3
+import threading
+from datetime import datetime
+
+from metrics import cronometrar, store_duracao
+
+
+# Campos de uma vaga, na ordem do CSV
+CAMPOS_VAGA = [
+    'orgao_demandante', 'titulo_servico', 'tipo_atividade', 'especificacao_atividade',
+    'descricao_servico', 'outras_informacoes', 'endereco', 'numero', 'bairro',
+    'forma_pagamento', 'prazo_pagamento', 'prazo_expiracao', 'data_limite_execucao'
+]
+
+# Campos gravados além dos do CSV (derivados no cadastro, fora do download)
+CAMPOS_EXTRAS = ['cnae']
+
+# Todas as colunas de dados da tabela vagas
+CAMPOS_ARMAZENADOS = CAMPOS_VAGA + CAMPOS_EXTRAS
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS vagas (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    arquivo TEXT NOT NULL UNIQUE,
+    {campos},
+    ativo INTEGER NOT NULL DEFAULT 1,
+    criado_em TEXT NOT NULL,
+    excluido_em TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS meta (
+    chave TEXT PRIMARY KEY,
+    valor INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta (chave, valor) VALUES ('versao', 0);
+INSERT OR IGNORE INTO meta (chave, valor) VALUES ('versao_em', CAST(strftime('%s', 'now') AS INTEGER));
+""".format(campos=',\n    '.join(f"{campo} TEXT NOT NULL DEFAULT ''" for campo in CAMPOS_ARMAZENADOS))
+
+# Índices criados depois da tabela (colunas extras podem vir de migração)
+INDICES = """
+CREATE INDEX IF NOT EXISTS idx_vagas_cnae ON vagas (cnae);
+CREATE INDEX IF NOT EXISTS idx_vagas_ativo_prazo ON vagas (ativo, prazo_expiracao);
+"""
+
+
+# Horário gravado no nome pelo formulário: {titulo}_{AAAAmmdd_HHMMSS}[_n].csv
+HORARIO_NO_NOME = re.compile(r'_(\d{8}_\d{6})(?:_\d+)?\.csv$', re.IGNORECASE)
+
+
+def criado_em_do_arquivo(path):
+    """
+    Data de criação de uma vaga em CSV: horário no nome do arquivo ou, sem ele, o mtime
+
+    Usada nas migrações para o store e para o servicos_mei, para a mesma
+    vaga ter a mesma data de criação nos dois.
+
+    Returns:
+        datetime: Data de criação, sem microssegundos
+    """
+    encontrado = HORARIO_NO_NOME.search(os.path.basename(path))
+    if encontrado:
+        try:
+            return datetime.strptime(encontrado.group(1), '%Y%m%d_%H%M%S')
+        except ValueError:
+            pass
+    return datetime.fromtimestamp(os.path.getmtime(path)).replace(microsecond=0)
+
+
+def vaga_to_csv(data):
+    """Gera o conteúdo do CSV individual de uma vaga (cabeçalho + linha)"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CAMPOS_VAGA, extrasaction='ignore')
+    writer.writeheader()
+    writer.writerow({campo: data.get(campo, '') for campo in CAMPOS_VAGA})
+    return buffer.getvalue().encode('utf-8')
+
+
+class VagaStore:
+    """Vagas em SQLite: busca por arquivo via índice único, listagens por varredura sequencial"""
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.executescript(SCHEMA)
+            self._migrar(conn)
+            conn.executescript(INDICES)
+
+    def _migrar(self, conn):
+        """Acrescenta colunas novas em stores criados por versões anteriores"""
+        existentes = {row['name'] for row in conn.execute("PRAGMA table_info(vagas)")}
+        for campo in CAMPOS_ARMAZENADOS:
+            if campo not in existentes:
+                conn.execute(f"ALTER TABLE vagas ADD COLUMN {campo} TEXT NOT NULL DEFAULT ''")
+        if 'ativo' not in existentes:
+            conn.execute("ALTER TABLE vagas ADD COLUMN ativo INTEGER NOT NULL DEFAULT 1")
+        if 'excluido_em' not in existentes:
+            conn.execute("ALTER TABLE vagas ADD COLUMN excluido_em TEXT NOT NULL DEFAULT ''")
+
+    def _conn(self):
+        """Conexão da thread atual (sqlite3 não compartilha conexões entre threads)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _bump_versao(self, conn):
+        conn.execute("UPDATE meta SET valor = valor + 1 WHERE chave = 'versao'")
+        conn.execute(
+            "UPDATE meta SET valor = CAST(strftime('%s', 'now') AS INTEGER) WHERE chave = 'versao_em'"
+        )
+
+    def versao(self):
+        """Contador incrementado a cada escrita (inclusive de outros processos)"""
+        row = self._conn().execute("SELECT valor FROM meta WHERE chave = 'versao'").fetchone()
+        return row[0] if row else 0
+
+    def estado_versao(self):
+        """
+        Versão global das listagens e quando ela mudou
+
+        Returns:
+            tuple: (versão, timestamp Unix da última alteração)
+        """
+        valores = dict(self._conn().execute(
+            "SELECT chave, valor FROM meta WHERE chave IN ('versao', 'versao_em')"
+        ).fetchall())
+        return valores.get('versao', 0), valores.get('versao_em', 0)
+
+    def bump_versao(self):
+        """
+        Marca as listagens como alteradas sem mudar vagas
+
+        Usado quando o conteúdo listado muda fora do store (ex.: o spool
+        gravou novas linhas no MySQL).
+        """
+        conn = self._conn()
+        with conn:
+            self._bump_versao(conn)
+
+    @cronometrar(store_duracao, operacao='insert')
+    def insert(self, arquivo, data, criado_em=None):
+        """
+        Grava uma vaga nova
+
+        Returns:
+            int: id da vaga
+
+        Raises:
+            sqlite3.IntegrityError: se já existir vaga com esse arquivo
+        """
+        valores = [data.get(campo) or '' for campo in CAMPOS_ARMAZENADOS]
+        criado_em = criado_em or datetime.now().isoformat(timespec='seconds')
+        conn = self._conn()
+        with conn:
+            cur = conn.execute(
+                f"INSERT INTO vagas (arquivo, {', '.join(CAMPOS_ARMAZENADOS)}, criado_em) "
+                f"VALUES (?, {', '.join('?' * len(CAMPOS_ARMAZENADOS))}, ?)",
+                [arquivo, *valores, criado_em]
+            )
+            self._bump_versao(conn)
+        return cur.lastrowid
+
+    @cronometrar(store_duracao, operacao='insert_many')
+    def insert_many(self, registros):
+        """
+        Grava várias vagas em uma transação, ignorando arquivos já existentes
+
+        Args:
+            registros (iterable): Tuplas (arquivo, data, criado_em)
+
+        Returns:
+            int: Quantidade de vagas novas
+        """
+        conn = self._conn()
+        with conn:
+            antes = conn.total_changes
+            conn.executemany(
+                f"INSERT OR IGNORE INTO vagas (arquivo, {', '.join(CAMPOS_ARMAZENADOS)}, criado_em) "
+                f"VALUES (?, {', '.join('?' * len(CAMPOS_ARMAZENADOS))}, ?)",
+                (
+                    [arquivo, *[data.get(campo) or '' for campo in CAMPOS_ARMAZENADOS], criado_em]
+                    for arquivo, data, criado_em in registros
+                )
+            )
+            novos = conn.total_changes - antes
+            if novos:
+                self._bump_versao(conn)
+        return novos
+
+    @cronometrar(store_duracao, operacao='get')
+    def get(self, arquivo):
+        """
+        Busca uma vaga pelo nome de arquivo (as excluídas não são devolvidas)
+
+        Returns:
+            dict: Campos da vaga (mais id, arquivo e criado_em) ou None
+        """
+        row = self._conn().execute(
+            "SELECT * FROM vagas WHERE arquivo = ? AND excluido_em = ''", (arquivo,)
+        ).fetchone()
+        return dict(row) if row else None
+
+    @cronometrar(store_duracao, operacao='delete')
+    def delete(self, arquivo):
+        """Exclui uma vaga (ver delete_many); retorna True se ela existia"""
+        return bool(self.delete_many([arquivo]))
+
+    @cronometrar(store_duracao, operacao='delete_many')
+    def delete_many(self, arquivos, chunk_size=500):
+        """
+        Exclui várias vagas em uma única transação (versão avançada uma vez)
+
+        A exclusão é lógica, como no servicos_mei: a linha fica com ativo = 0
+        e excluido_em preenchido, continua contando em count() e na listagem
+        do admin, mas some de get() e das listagens públicas.
+
+        Returns:
+            list: Arquivos que existiam (e não estavam excluídos) e foram excluídos
+        """
+        nomes = list(dict.fromkeys(arquivos))
+        excluidos = []
+        agora = datetime.now().isoformat(timespec='seconds')
+        conn = self._conn()
+        with conn:
+            for inicio in range(0, len(nomes), chunk_size):
+                bloco = nomes[inicio:inicio + chunk_size]
+                marcadores = ', '.join('?' * len(bloco))
+                excluidos.extend(row[0] for row in conn.execute(
+                    f"SELECT arquivo FROM vagas WHERE arquivo IN ({marcadores}) AND excluido_em = ''", bloco
+                ))
+                conn.execute(
+                    "UPDATE vagas SET ativo = 0, excluido_em = ? "
+                    f"WHERE arquivo IN ({marcadores}) AND excluido_em = ''",
+                    [agora, *bloco]
+                )
+            if excluidos:
+                self._bump_versao(conn)
+        return excluidos
+
+    def count_por_cnae(self, cnae):
+        """Quantidade de vagas de um CNAE, sem as excluídas (índice idx_vagas_cnae)"""
+        return self._conn().execute(
+            "SELECT COUNT(*) FROM vagas WHERE cnae = ? AND excluido_em = ''", (cnae,)
+        ).fetchone()[0]
+
+    def count(self, apenas_ativas=False):
+        if apenas_ativas:
+            return self._conn().execute("SELECT COUNT(*) FROM vagas WHERE ativo = 1").fetchone()[0]
+        return self._conn().execute("SELECT COUNT(*) FROM vagas").fetchone()[0]
+
+    def contagens(self):
+        """
+        Totais do store em uma varredura
+
+        Returns:
+            tuple: (todas, ativas, excluídas)
+        """
+        total, ativas, excluidas = self._conn().execute(
+            "SELECT COUNT(*), SUM(ativo = 1), SUM(excluido_em <> '') FROM vagas"
+        ).fetchone()
+        return total, ativas or 0, excluidas or 0
+
+    @cronometrar(store_duracao, operacao='expirar')
+    def expirar(self, hoje, limite=500):
+        """
+        Marca como inativas (ativo = 0) até `limite` vagas com prazo anterior a hoje
+
+        prazo_expiracao é gravado como YYYY-MM-DD, então a comparação de
+        texto já é a comparação de datas e usa idx_vagas_ativo_prazo.
+
+        Args:
+            hoje (str): Data de corte no formato YYYY-MM-DD
+            limite (int): Tamanho do lote
+
+        Returns:
+            list: Arquivos das vagas expiradas neste lote
+        """
+        conn = self._conn()
+        with conn:
+            arquivos = [row[0] for row in conn.execute(
+                "SELECT arquivo FROM vagas "
+                "WHERE ativo = 1 AND prazo_expiracao <> '' AND prazo_expiracao < ? "
+                "ORDER BY prazo_expiracao LIMIT ?",
+                (hoje, limite)
+            )]
+            if arquivos:
+                conn.execute(
+                    f"UPDATE vagas SET ativo = 0 WHERE arquivo IN ({', '.join('?' * len(arquivos))})",
+                    arquivos
+                )
+                self._bump_versao(conn)
+        return arquivos
+
+    def iter_export(self, colunas, filtros=None):
+        """
+        Varre as vagas para exportação, no formato de DatabaseManager.export_servicos
+
+        Args:
+            colunas (list): Campos da vaga, mais "arquivo", "ativo" e "data_criacao"
+            filtros (dict, opcional): Mesmos filtros de export_servicos
+        """
+        filtros = filtros or {}
+        condicoes = []
+        params = []
+        if filtros.get('ativo') is not None:
+            condicoes.append("ativo = ?")
+            params.append(1 if filtros['ativo'] else 0)
+        for campo in ('orgao_demandante', 'bairro'):
+            if filtros.get(campo):
+                condicoes.append(f"{campo} = ?")
+                params.append(filtros[campo])
+        # criado_em é ISO (YYYY-MM-DDTHH:MM:SS): prefixo de data compara como data
+        if filtros.get('criado_desde'):
+            condicoes.append("criado_em >= ?")
+            params.append(filtros['criado_desde'])
+        if filtros.get('criado_ate'):
+            condicoes.append("substr(criado_em, 1, 10) <= ?")
+            params.append(filtros['criado_ate'])
+
+        selecao = ', '.join('criado_em AS data_criacao' if c == 'data_criacao' else c for c in colunas)
+        where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+        for row in self._conn().execute(f"SELECT {selecao} FROM vagas {where} ORDER BY id", params):
+            yield dict(row)
+
+    def iter_vagas(self, colunas=None, after_id=0, apenas_ativas=False):
+        """
+        Varre as vagas em ordem de id (inserção)
+
+        Args:
+            colunas (list, opcional): Colunas desejadas (padrão: todas)
+            after_id (int): Só vagas com id maior que este
+            apenas_ativas (bool): Ignora as vagas expiradas ou excluídas (ativo = 0)
+        """
+        selecao = ', '.join(['id', 'arquivo', *colunas]) if colunas else '*'
+        filtro = " AND ativo = 1" if apenas_ativas else ""
+        cur = self._conn().execute(
+            f"SELECT {selecao} FROM vagas WHERE id > ?{filtro} ORDER BY id", (after_id,)
+        )
+        for row in cur:
+            yield dict(row)